@@ -239,6 +239,17 @@ def scheduling():
     __output_json(vehicle_id_to_destination, vehicle_id_to_planned_route)
 
 
+def in_process_scheduling(input_info):
+    """
+    进程内调用的入口, 模拟器直接传入当前时间切片的输入
+    In-process entry, the simulator passes the live input of the current time slice
+    :param input_info: InputInfo object, must not be modified
+    """
+    return dispatch_orders_to_vehicles(input_info.id_to_unallocated_order_item,
+                                       input_info.id_to_vehicle,
+                                       input_info.id_to_factory)
+
+
 def __read_input_json():
     # read the factory info
     id_to_factory = get_factory_info(Configs.factory_info_file_path)
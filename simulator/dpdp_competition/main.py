@@ -21,9 +21,11 @@
 import traceback
 import datetime
 import numpy as np
+import os
 import sys
 
 from src.conf.configs import Configs
+from src.simulator.benchmark_runner import format_result_table, run_instances_in_parallel, write_result_table
 from src.simulator.simulate_api import simulate
 from src.utils.log_utils import ini_logger, remove_file_handler_of_logging
 from src.utils.logging_engine import logger
@@ -39,25 +41,33 @@ if __name__ == "__main__":
         test_instances = Configs.all_test_instances
 
     score_list = []
-    for idx in test_instances:
-        # Initial the log
-        log_file_name = f"dpdp_{datetime.datetime.now().strftime('%y%m%d%H%M%S')}.log"
-        ini_logger(log_file_name)
+    if Configs.PARALLEL_WORKER_NUM != 1:
+        results = run_instances_in_parallel(test_instances, Configs.PARALLEL_WORKER_NUM)
+        result_file = os.path.join(Configs.output_folder,
+                                   f"benchmark_{datetime.datetime.now().strftime('%y%m%d%H%M%S')}.csv")
+        write_result_table(results, result_file)
+        print(format_result_table(results))
+        score_list = [result["score"] for result in results]
+    else:
+        for idx in test_instances:
+            # Initial the log
+            log_file_name = f"dpdp_{datetime.datetime.now().strftime('%y%m%d%H%M%S')}.log"
+            ini_logger(log_file_name)
 
-        instance = "instance_%d" % idx
-        logger.info(f"Start to run {instance}")
+            instance = "instance_%d" % idx
+            logger.info(f"Start to run {instance}")
 
-        try:
-            score = simulate(Configs.factory_info_file, Configs.route_info_file, instance)
-            score_list.append(score)
-            logger.info(f"Score of {instance}: {score}")
-        except Exception as e:
-            logger.error("Failed to run simulator")
-            logger.error(f"Error: {e}, {traceback.format_exc()}")
-            score_list.append(sys.maxsize)
+            try:
+                score = simulate(Configs.factory_info_file, Configs.route_info_file, instance)
+                score_list.append(score)
+                logger.info(f"Score of {instance}: {score}")
+            except Exception as e:
+                logger.error("Failed to run simulator")
+                logger.error(f"Error: {e}, {traceback.format_exc()}")
+                score_list.append(sys.maxsize)
 
-        # 删除日志句柄
-        remove_file_handler_of_logging(log_file_name)
+            # 删除日志句柄
+            remove_file_handler_of_logging(log_file_name)
 
     avg_score = np.mean(score_list)
     # with report(True) as logs:
@@ -21,7 +21,13 @@
 import traceback
 
 from src.utils.logging_engine import logger
-from algorithm.algorithm_demo import scheduling
+from algorithm.algorithm_demo import scheduling, in_process_scheduling
+
+
+# 模拟器进程内调用的算法, 每个测试例创建一次, 见 Configs.ALGORITHM_IN_PROCESS_FACTORY
+# algorithm called in-process by the simulator, created once per instance
+def create_algorithm():
+    return in_process_scheduling
 
 if __name__ == '__main__':
     try:
@@ -20,6 +20,8 @@
 
 import sys
 
+import numpy as np
+
 from src.utils.logging_engine import logger
 
 
@@ -42,46 +44,126 @@ class RouteInfo(object):
 class Map(object):
     def __init__(self, code_to_route):
         self.__code_to_route = code_to_route
-        # distance between factories, unit is km
-        self.__factory_id_pair_to_distance = self.__get_distance_matrix_between_factories()
-        # time between factories, unit is second
-        self.__factory_id_pair_to_time = self.__get_time_matrix_between_factories()
+        # 工厂编号到矩阵下标, factory id ——> index of the distance and time matrices
+        self.factory_id_to_index = self.__get_factory_id_to_index()
+        self.factory_ids = list(self.factory_id_to_index.keys())
+        # distance between factories, unit is km, sys.maxsize if there is no route
+        self.distance_matrix = self.__get_distance_matrix_between_factories()
+        # time between factories, unit is second, sys.maxsize if there is no route
+        self.time_matrix = self.__get_time_matrix_between_factories()
+        # 逐段查询用的python列表, rows of the matrices as python lists for the lookups of single edges
+        self.__distance_rows = self.distance_matrix.tolist()
+        self.__time_rows = self.time_matrix.tolist()
 
-    def __get_distance_matrix_between_factories(self):
-        if len(self.__code_to_route) == 0:
-            return
+    def __get_factory_id_to_index(self):
+        factory_id_to_index = {}
+        for route in self.__code_to_route.values():
+            for factory_id in (route.start_factory_id, route.end_factory_id):
+                if factory_id not in factory_id_to_index:
+                    factory_id_to_index[factory_id] = len(factory_id_to_index)
+        return factory_id_to_index
 
-        dist_mat = {}
-        for route_code, route in self.__code_to_route.items():
-            if (route.start_factory_id, route.end_factory_id) not in dist_mat:
-                dist_mat[(route.start_factory_id, route.end_factory_id)] = route.distance
-        return dist_mat
+    def __get_matrix_between_factories(self, attr_name: str, dtype):
+        # 同一工厂对只保留第一条路线, only the first route of each factory pair is kept
+        factory_num = len(self.factory_id_to_index)
+        mat = np.full((factory_num, factory_num), sys.maxsize, dtype=dtype)
+        filled = np.zeros((factory_num, factory_num), dtype=bool)
+        for route in self.__code_to_route.values():
+            src_index = self.factory_id_to_index[route.start_factory_id]
+            dest_index = self.factory_id_to_index[route.end_factory_id]
+            if not filled[src_index, dest_index]:
+                mat[src_index, dest_index] = getattr(route, attr_name)
+                filled[src_index, dest_index] = True
+        np.fill_diagonal(mat, 0)
+        return mat
+
+    def __get_distance_matrix_between_factories(self):
+        return self.__get_matrix_between_factories("distance", np.float64)
 
     def __get_time_matrix_between_factories(self):
-        if len(self.__code_to_route) == 0:
-            return
+        return self.__get_matrix_between_factories("time", np.int64)
 
-        time_mat = {}
-        for route_code, route in self.__code_to_route.items():
-            if (route.start_factory_id, route.end_factory_id) not in time_mat:
-                time_mat[(route.start_factory_id, route.end_factory_id)] = route.time
-        return time_mat
+    def get_factory_indexes(self, factory_id_list):
+        """
+        :param factory_id_list: 工厂编号列表, list of factory id
+        :return: 工厂下标数组, array of factory indexes, None if some factory is not in the route map
+        """
+        indexes = np.empty(len(factory_id_list), dtype=np.int64)
+        for i, factory_id in enumerate(factory_id_list):
+            index = self.factory_id_to_index.get(factory_id)
+            if index is None:
+                logger.error(f"Factory {factory_id} is not in the route map")
+                return None
+            indexes[i] = index
+        return indexes
 
     def calculate_distance_between_factories(self, src_factory_id, dest_factory_id):
         if src_factory_id == dest_factory_id:
             return 0
 
-        if (src_factory_id, dest_factory_id) in self.__factory_id_pair_to_distance:
-            return self.__factory_id_pair_to_distance.get((src_factory_id, dest_factory_id))
-        else:
+        indexes = self.__get_indexes_of_factory_pair(src_factory_id, dest_factory_id)
+        if indexes is None:
             logger.error(f"({src_factory_id}, {dest_factory_id}) is not in distance matrix")
             return sys.maxsize
+        return self.__distance_rows[indexes[0]][indexes[1]]
 
     def calculate_transport_time_between_factories(self, src_factory_id, dest_factory_id):
         if src_factory_id == dest_factory_id:
             return 0
-        if (src_factory_id, dest_factory_id) in self.__factory_id_pair_to_time:
-            return self.__factory_id_pair_to_time.get((src_factory_id, dest_factory_id))
-        else:
+
+        indexes = self.__get_indexes_of_factory_pair(src_factory_id, dest_factory_id)
+        if indexes is None:
             logger.error(f"({src_factory_id}, {dest_factory_id}) is not in time matrix")
             return sys.maxsize
+        return self.__time_rows[indexes[0]][indexes[1]]
+
+    def __get_indexes_of_factory_pair(self, src_factory_id, dest_factory_id):
+        src_index = self.factory_id_to_index.get(src_factory_id)
+        dest_index = self.factory_id_to_index.get(dest_factory_id)
+        if src_index is None or dest_index is None or self.__time_rows[src_index][dest_index] == sys.maxsize:
+            return None
+        return src_index, dest_index
+
+    def calculate_distance_of_route(self, route):
+        """
+        :param route: 路线经过的工厂下标数组, array of factory indexes visited by the route,
+                      or 2-D array with one candidate route of the same length in each row
+        :return: 路线总距离, total distance of the route, or array of the distances of the routes, unit is km
+        """
+        route = np.asarray(route)
+        if route.shape[-1] <= 1:
+            return 0 if route.ndim == 1 else np.zeros(route.shape[0])
+        distances = self.distance_matrix[route[..., :-1], route[..., 1:]]
+        if np.any(self.time_matrix[route[..., :-1], route[..., 1:]] == sys.maxsize):
+            logger.error("Some edges of the route are not in distance matrix")
+        # 依次累加, 与逐段相加的结果一致; accumulate in order, the same as adding the edges one by one
+        total_distance = np.cumsum(distances, axis=-1)[..., -1]
+        return total_distance.item() if route.ndim == 1 else total_distance
+
+    def calculate_arrival_times_of_route(self, route, start_time: int, service_times=None):
+        """
+        :param route: 路线经过的工厂下标数组, array of factory indexes visited by the route
+        :param start_time: 离开第一个工厂的时间, leave time at the first factory, unit is second
+        :param service_times: 各工厂的服务时间数组, array of the service time at each factory, unit is second
+        :return: 到达各工厂的时间数组, array of the arrival time at each factory, sys.maxsize after a missing edge
+        """
+        arrival_times = np.empty(len(route), dtype=np.int64)
+        if len(route) == 0:
+            return arrival_times
+        arrival_times[0] = start_time
+        if len(route) == 1:
+            return arrival_times
+
+        transport_times = self.time_matrix[route[:-1], route[1:]]
+        missing = transport_times == sys.maxsize
+        if np.any(missing):
+            logger.error("Some edges of the route are not in time matrix")
+            transport_times = np.where(missing, 0, transport_times)
+        if service_times is not None:
+            # 离开中间工厂前的服务时间, service time before leaving the intermediate factories
+            transport_times = transport_times.copy()
+            transport_times[1:] += np.asarray(service_times, dtype=np.int64)[1:-1]
+        arrival_times[1:] = start_time + np.cumsum(transport_times)
+        if np.any(missing):
+            arrival_times[1 + np.argmax(missing):] = sys.maxsize
+        return arrival_times
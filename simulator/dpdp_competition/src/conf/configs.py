@@ -61,7 +61,11 @@ class Configs(object):
     route_info_file_path = os.path.join(benchmark_folder_path, route_info_file)
     factory_info_file_path = os.path.join(benchmark_folder_path, factory_info_file)
 
-    algorithm_data_interaction_folder_path = os.path.join(algorithm_folder_path, "data_interaction")
+    # 算法数据交互文件夹, 可由环境变量指定, 以便并行运行的测试例互不干扰
+    # folder of the json files exchanged with the algorithm, could be set by the environment variable for parallel runs
+    DATA_INTERACTION_FOLDER_ENV = "DPDP_DATA_INTERACTION_FOLDER"
+    algorithm_data_interaction_folder_path = os.environ.get(DATA_INTERACTION_FOLDER_ENV,
+                                                            os.path.join(algorithm_folder_path, "data_interaction"))
     if not os.path.exists(algorithm_data_interaction_folder_path):
         os.makedirs(algorithm_data_interaction_folder_path)
     algorithm_vehicle_input_info_path = os.path.join(algorithm_data_interaction_folder_path, "vehicle_info.json")
@@ -76,6 +80,11 @@ class Configs(object):
     # 算法入口文件名，不含扩展名
     ALGORITHM_ENTRY_FILE_NAME = 'main_algorithm'
 
+    # python算法入口中创建进程内算法的函数名, 不存在则通过子进程和json文件调用算法, 为空则始终通过子进程调用
+    # factory name in the python entry to create the in-process algorithm,
+    # otherwise call the algorithm within subprocess and json files, set '' to always use the subprocess
+    ALGORITHM_IN_PROCESS_FACTORY = 'create_algorithm'
+
     # 算法语言映射表
     ALGORITHM_LANGUAGE_MAP = {'py': 'python',
                               'class': 'java',
@@ -101,3 +110,24 @@ class Configs(object):
     # 数据集选项，列表为空则选择所有数据集，如[]，[1], [1, 2, 3], [64]
     selected_instances = [1]
     all_test_instances = range(1, 65)
+
+    # 并行运行测试例的进程数, 1则依次运行, 0则使用所有cpu
+    # number of processes to run the instances in parallel, 1 runs them one after another, 0 uses all cpus
+    PARALLEL_WORKER_NUM = 1
+
+    @classmethod
+    def set_data_interaction_folder(cls, folder_path: str):
+        """
+        修改算法数据交互文件夹, 通过环境变量传递给算法子进程
+        Change the folder of the json files exchanged with the algorithm, passed to the algorithm subprocess by the
+        environment variable
+        """
+        if not os.path.exists(folder_path):
+            os.makedirs(folder_path)
+        os.environ[cls.DATA_INTERACTION_FOLDER_ENV] = folder_path
+        cls.algorithm_data_interaction_folder_path = folder_path
+        cls.algorithm_vehicle_input_info_path = os.path.join(folder_path, "vehicle_info.json")
+        cls.algorithm_unallocated_order_items_input_path = os.path.join(folder_path, "unallocated_order_items.json")
+        cls.algorithm_ongoing_order_items_input_path = os.path.join(folder_path, "ongoing_order_items.json")
+        cls.algorithm_output_destination_path = os.path.join(folder_path, 'output_destination.json')
+        cls.algorithm_output_planned_route_path = os.path.join(folder_path, 'output_route.json')
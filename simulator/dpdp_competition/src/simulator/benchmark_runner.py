@@ -0,0 +1,125 @@
+# Copyright (C) 2021. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE
+
+import csv
+import datetime
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import traceback
+
+from src.conf.configs import Configs
+from src.simulator.simulate_api import create_simulation
+from src.utils.log_utils import delete_files
+from src.utils.logging_engine import logger
+
+RESULT_FIELDS = ["instance", "score", "wall_seconds", "dispatch_seconds", "violations", "status"]
+
+
+def run_instance(instance: str):
+    """
+    在独立的工作进程中运行测试例, 算法数据交互文件和日志文件按测试例区分
+    Run the instance in a worker process, with its own log file and folder of the json files for the algorithm
+    :param instance: 测试例, e.g. "instance_1"
+    :return: 运行结果, dict of RESULT_FIELDS
+    """
+    log_file = os.path.join(Configs.output_folder, 'log',
+                            f"dpdp_{instance}_{datetime.datetime.now().strftime('%y%m%d%H%M%S')}.log")
+    logger.remove_console_output()
+    logger.add_file_output(log_file)
+    logger.info(f"Start to run {instance}")
+
+    result = {"instance": instance, "score": sys.maxsize, "wall_seconds": 0, "dispatch_seconds": 0,
+              "violations": 0, "status": "failed"}
+    time_start = time.time()
+    simulate_env = None
+    with tempfile.TemporaryDirectory(prefix=f"dpdp_{instance}_") as scratch_folder:
+        Configs.set_data_interaction_folder(scratch_folder)
+        try:
+            simulate_env = create_simulation(Configs.factory_info_file, Configs.route_info_file, instance)
+            if simulate_env is not None:
+                simulate_env.run()
+        # 算法失败时调度器调用sys.exit, the dispatcher calls sys.exit when the algorithm fails
+        except (Exception, SystemExit) as e:
+            logger.error("Failed to run simulator")
+            logger.error(f"Error: {e}, {traceback.format_exc()}")
+    result["wall_seconds"] = time.time() - time_start
+
+    # 仿真中断时也记录已有的违规和用时, record the violations and used time of the interrupted simulation as well
+    if simulate_env is not None:
+        result["score"] = simulate_env.total_score
+        result["dispatch_seconds"] = simulate_env.dispatch_seconds
+        result["violations"] = len(simulate_env.violations)
+    if result["violations"] > 0:
+        result["status"] = "infeasible"
+    elif result["score"] != sys.maxsize:
+        result["status"] = "success"
+    logger.info(f"Score of {instance}: {result['score']}, {result['status']}")
+    return result
+
+
+def run_instances_in_parallel(test_instances, worker_num: int = 0):
+    """
+    用进程池并行运行测试例, 每个测试例使用新的工作进程
+    Run the instances with a process pool, each instance runs in a fresh worker process
+    :param test_instances: 测试例编号, e.g. [1, 2, 3]
+    :param worker_num: 进程数, 0则使用所有cpu, number of worker processes, 0 uses all cpus
+    :return: 按测试例编号排序的运行结果, list of results sorted by the instance number
+    """
+    instances = ["instance_%d" % idx for idx in test_instances]
+    # 先运行数据量大的测试例, 缩短总用时; run the larger instances first to shorten the total time
+    instances.sort(key=__get_size_of_instance, reverse=True)
+    worker_num = min(worker_num or os.cpu_count(), len(instances))
+
+    log_folder = os.path.join(Configs.output_folder, 'log')
+    delete_files(log_folder, max(Configs.MAX_LOG_FILE_NUM - len(instances), 0))
+
+    results = []
+    with multiprocessing.Pool(processes=worker_num, maxtasksperchild=1) as pool:
+        for result in pool.imap_unordered(run_instance, instances):
+            logger.info(f"{result['instance']}: score {result['score']}, {result['wall_seconds']: .2f}s, "
+                        f"{result['status']}")
+            results.append(result)
+
+    results.sort(key=lambda x: int(x["instance"].split("_")[-1]))
+    return results
+
+
+def __get_size_of_instance(instance: str):
+    instance_folder_path = os.path.join(Configs.benchmark_folder_path, instance)
+    return sum(os.path.getsize(os.path.join(instance_folder_path, file_name))
+               for file_name in os.listdir(instance_folder_path))
+
+
+def format_result_table(results: list):
+    lines = ["instance      score                  wall(s)   dispatch(s)  violations  status"]
+    for result in results:
+        lines.append(f"{result['instance']:<13} {result['score']:<22} {result['wall_seconds']:>7.2f}   "
+                     f"{result['dispatch_seconds']:>11.2f}  {result['violations']:>10}  {result['status']}")
+    return "\n".join(lines)
+
+
+def write_result_table(results: list, file_path: str):
+    with open(file_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
@@ -0,0 +1,172 @@
+# Copyright (C) 2021. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE
+
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from importlib import import_module
+
+from src.common.dispatch_result import DispatchResult
+from src.common.node import Node
+from src.conf.configs import Configs
+from src.utils.json_tools import convert_input_info_to_json_files
+from src.utils.json_tools import get_output_of_algorithm
+from src.utils.json_tools import subprocess_function, get_algorithm_calling_command
+from src.utils.logging_engine import logger
+
+
+class SubprocessDispatcher(object):
+    """
+    通过json文件和子进程调用算法, 支持任意语言的算法入口
+    Call the algorithm within a subprocess, exchange the data through the json files
+    """
+
+    def __init__(self):
+        self.algorithm_calling_command = get_algorithm_calling_command()
+
+    def dispatch(self, input_info, id_to_order_item: dict):
+        """
+        :param input_info: InputInfo of the current time slice
+        :param id_to_order_item: total order items, used to parse the output of the algorithm
+        :return: used seconds of the algorithm, DispatchResult
+        """
+        # 1. Prepare the input json of the algorithm
+        convert_input_info_to_json_files(input_info)
+
+        # 2. Run the algorithm
+        time_start_algorithm = time.time()
+        used_seconds, message = subprocess_function(self.algorithm_calling_command)
+
+        # 3. parse the output json of the algorithm
+        if Configs.ALGORITHM_SUCCESS_FLAG in message:
+            if (time_start_algorithm < os.stat(Configs.algorithm_output_destination_path).st_mtime < time.time()
+                    and time_start_algorithm < os.stat(
+                        Configs.algorithm_output_planned_route_path).st_mtime < time.time()):
+                vehicle_id_to_destination, vehicle_id_to_planned_route = get_output_of_algorithm(id_to_order_item)
+                dispatch_result = DispatchResult(vehicle_id_to_destination, vehicle_id_to_planned_route)
+                return used_seconds, dispatch_result
+            else:
+                logger.error("Output_json files from the algorithm is not the newest.")
+                sys.exit(-1)
+        else:
+            logger.error(message)
+            logger.error("Can not catch the 'SUCCESS' from the algorithm. 未寻获算法输出成功标识'SUCCESS'。")
+            sys.exit(-1)
+
+
+class AlgorithmTimeout(BaseException):
+    """
+    算法超时时在算法内抛出, 继承BaseException以免被算法的except Exception捕获
+    Raised inside the in-process algorithm over the run time limit, not caught by its `except Exception`
+    """
+
+
+class InProcessDispatcher(object):
+    """
+    在模拟器进程内调用python算法, 算法只加载一次, 可在时间切片之间保留状态
+    Call the python algorithm in-process with the live input, the algorithm could keep warm state between time slices
+
+    The algorithm is a callable: algorithm(input_info) -> (vehicle_id_to_destination, vehicle_id_to_planned_route),
+    it must not modify the vehicles and order items of the input.
+    """
+
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+
+    def dispatch(self, input_info, id_to_order_item: dict):
+        time_start_algorithm = time.time()
+        try:
+            with self.__time_limit(Configs.MAX_RUNTIME_OF_ALGORITHM):
+                vehicle_id_to_destination, vehicle_id_to_planned_route = self.algorithm(input_info)
+        except AlgorithmTimeout:
+            logger.error(f"Algorithm is stopped at the limit {Configs.MAX_RUNTIME_OF_ALGORITHM}s")
+            sys.exit(-1)
+        except Exception as e:
+            logger.error("Failed to run algorithm")
+            logger.error(f"Error: {e}, {traceback.format_exc()}")
+            sys.exit(-1)
+        used_seconds = time.time() - time_start_algorithm
+        if used_seconds > Configs.MAX_RUNTIME_OF_ALGORITHM:
+            logger.error(f"Algorithm runs {used_seconds: .2f}s, exceeds the limit {Configs.MAX_RUNTIME_OF_ALGORITHM}s")
+            sys.exit(-1)
+
+        # 复制节点, 模拟器对节点的修改不影响算法保留的状态
+        # copy the nodes, so the simulator never touches the nodes kept by the algorithm
+        vehicle_id_to_destination = {vehicle_id: self.__copy_node(node, id_to_order_item)
+                                     for vehicle_id, node in vehicle_id_to_destination.items()}
+        vehicle_id_to_planned_route = {vehicle_id: [self.__copy_node(node, id_to_order_item) for node in route]
+                                       for vehicle_id, route in vehicle_id_to_planned_route.items()}
+        return used_seconds, DispatchResult(vehicle_id_to_destination, vehicle_id_to_planned_route)
+
+    @staticmethod
+    @contextmanager
+    def __time_limit(seconds):
+        """
+        超时由SIGALRM中断算法, 仅在unix的主线程可用, 否则只在算法返回后检查用时
+        Interrupt the algorithm with SIGALRM at the limit. It is only available within the main thread on unix,
+        otherwise the used time is checked after the algorithm returns.
+        A long call into C code, e.g. a numpy operation, is interrupted once it returns.
+        """
+        if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+            yield
+            return
+
+        def on_timeout(signum, frame):
+            raise AlgorithmTimeout()
+
+        previous_handler = signal.signal(signal.SIGALRM, on_timeout)
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+        try:
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+    @staticmethod
+    def __copy_node(node, id_to_order_item: dict):
+        if node is None:
+            return None
+        return Node(node.id, node.lng, node.lat,
+                    [id_to_order_item.get(item.id) for item in node.pickup_items],
+                    [id_to_order_item.get(item.id) for item in node.delivery_items],
+                    node.arrive_time, node.leave_time)
+
+
+def get_dispatcher():
+    """
+    python算法入口若提供创建算法的函数, 则在进程内调用, 否则通过子进程调用
+    Use the in-process dispatcher if the python entry provides the algorithm factory, otherwise the subprocess
+    """
+    if Configs.ALGORITHM_IN_PROCESS_FACTORY:
+        entry_file = Configs.ALGORITHM_ENTRY_FILE_NAME + ".py"
+        if os.path.exists(os.path.join(Configs.root_folder_path, entry_file)):
+            if Configs.root_folder_path not in sys.path:
+                sys.path.insert(0, Configs.root_folder_path)
+            entry = import_module(Configs.ALGORITHM_ENTRY_FILE_NAME)
+            create_algorithm = getattr(entry, Configs.ALGORITHM_IN_PROCESS_FACTORY, None)
+            if create_algorithm is not None:
+                logger.info(f"Call the algorithm in-process with {entry_file}")
+                return InProcessDispatcher(create_algorithm())
+
+    return SubprocessDispatcher()
@@ -0,0 +1,80 @@
+# Copyright (C) 2021. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE
+
+import heapq
+
+from src.conf.configs import Configs
+
+
+class OrderItemIndex(object):
+    def __init__(self, id_to_order_item: dict):
+        """
+        按状态索引订单物料, 只在物料状态或释放时间变化时更新
+        Index the order items by delivery_state, updated only when the state of an item changes or it is released
+        :param id_to_order_item: 所有订单物料, total order items, ranked by their order in the dict
+        """
+        self.__items = list(id_to_order_item.values())
+        self.__id_to_rank = {item_id: rank for rank, item_id in enumerate(id_to_order_item)}
+
+        # delivery_state ——> set of item id
+        self.__state_to_item_ids = {code: set() for code in Configs.ORDER_STATUS_TO_CODE.values()}
+        # 未生成物料的创建时间最小堆, min-heap of (creation_time, rank) of the items in state "INITIALIZATION"
+        self.__creation_heap = []
+        for rank, item in enumerate(self.__items):
+            self.__state_to_item_ids.setdefault(item.delivery_state, set()).add(item.id)
+            if item.delivery_state == Configs.ORDER_STATUS_TO_CODE.get("INITIALIZATION"):
+                self.__creation_heap.append((item.creation_time, rank))
+        heapq.heapify(self.__creation_heap)
+
+    def set_state(self, item, state: int):
+        """修改物料状态, change the delivery_state of the item along with the index"""
+        if item.delivery_state != state:
+            self.__state_to_item_ids[item.delivery_state].discard(item.id)
+            self.__state_to_item_ids.setdefault(state, set()).add(item.id)
+        item.delivery_state = state
+
+    def count_of_state(self, state: int):
+        return len(self.__state_to_item_ids.get(state, ()))
+
+    def get_order_items_to_be_dispatched(self, cur_time: int):
+        """
+        :param cur_time: unix timestamp, unit is second
+        :return: 返回当前时间新生成和delivery_state=1("GENERATED")的所有订单物料,
+                 the generated items first, then the newly generated ones, both ranked as the total order items
+        """
+        generated_code = Configs.ORDER_STATUS_TO_CODE.get("GENERATED")
+        generated_ranks = sorted(self.__id_to_rank[item_id]
+                                 for item_id in self.__state_to_item_ids[generated_code])
+
+        # 获取当前之间之前新生成的订单, release the items created before cur_time
+        new_ranks = []
+        while self.__creation_heap and self.__creation_heap[0][0] <= cur_time:
+            _, rank = heapq.heappop(self.__creation_heap)
+            item = self.__items[rank]
+            if item.delivery_state == Configs.ORDER_STATUS_TO_CODE.get("INITIALIZATION"):
+                self.set_state(item, generated_code)
+                new_ranks.append(rank)
+        new_ranks.sort()
+
+        id_to_generated_order_item = {}
+        for rank in generated_ranks + new_ranks:
+            item = self.__items[rank]
+            id_to_generated_order_item[item.id] = item
+        return id_to_generated_order_item
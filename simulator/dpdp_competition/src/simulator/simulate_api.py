@@ -88,8 +88,23 @@ def __initial_position_of_vehicles(id_to_factory: dict, id_to_vehicle: dict, ini
 
 
 def simulate(factory_info_file: str, route_info_file: str, instance: str):
-    simulate_env = __initialize(factory_info_file, route_info_file, instance)
+    simulate_env = run_simulation(factory_info_file, route_info_file, instance)
+    return simulate_env.total_score
+
+
+def create_simulation(factory_info_file: str, route_info_file: str, instance: str):
+    """
+    :return: 初始化的模拟环境, SimulateEnvironment before the simulation, None if the initialization failed
+    """
+    return __initialize(factory_info_file, route_info_file, instance)
+
+
+def run_simulation(factory_info_file: str, route_info_file: str, instance: str):
+    """
+    :return: 完成仿真的模拟环境, SimulateEnvironment after the simulation, None if the initialization failed
+    """
+    simulate_env = create_simulation(factory_info_file, route_info_file, instance)
     if simulate_env is not None:
         # 模拟器仿真过程
         simulate_env.run()
-    return simulate_env.total_score
+    return simulate_env
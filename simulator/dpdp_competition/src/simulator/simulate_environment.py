@@ -19,23 +19,18 @@
 # THE SOFTWARE
 
 import datetime
-import os
 import sys
-import time
 
-from src.common.dispatch_result import DispatchResult
 from src.common.input_info import InputInfo
 from src.conf.configs import Configs
 from src.simulator.history import History
+from src.simulator.order_item_index import OrderItemIndex
 from src.simulator.vehicle_simulator import VehicleSimulator
-from src.utils.checker import Checker
+from src.utils.checker import Checker, Violation
 from src.utils.evaluator import Evaluator
-from src.utils.json_tools import convert_input_info_to_json_files
-from src.utils.json_tools import get_output_of_algorithm
-from src.utils.json_tools import subprocess_function, get_algorithm_calling_command
+from src.simulator.dispatcher import get_dispatcher
 from src.utils.logging_engine import logger
-from src.utils.tools import get_item_dict_from_order_dict, get_order_items_to_be_dispatched_of_cur_time
-from src.utils.tools import get_item_list_of_vehicles
+from src.utils.tools import get_item_dict_from_order_dict, get_item_id_set_of_vehicles
 
 
 class SimulateEnvironment(object):
@@ -65,6 +60,8 @@ class SimulateEnvironment(object):
         self.id_to_generated_order_item = {}  # state = 1
         self.id_to_ongoing_order_item = {}  # state = 2
         self.id_to_completed_order_item = {}  # state = 3
+        # 按状态和创建时间索引的物料, items indexed by delivery_state and creation_time
+        self.order_item_index = OrderItemIndex(self.id_to_order_item)
 
         # 车辆运行模拟器, simulate the vehicle status and order fulfillment in a given time interval [pre_time, cur_time]
         self.vehicle_simulator = VehicleSimulator(route_map, id_to_factory)
@@ -77,9 +74,14 @@ class SimulateEnvironment(object):
 
         # 目标函数值, objective
         self.total_score = sys.maxsize
+        # 算法累计用时, total seconds used by the algorithm
+        self.dispatch_seconds = 0
+        # 派单结果的违规记录, violations of the dispatch results
+        self.violations = []
 
-        # 算法调用命令
-        self.algorithm_calling_command = ''
+        # 算法调用接口, 首次派单时加载
+        # dispatching interface of the algorithm, loaded at the first dispatch
+        self.dispatcher = None
 
     # 初始化历史记录
     def __ini_history(self):
@@ -108,11 +110,16 @@ class SimulateEnvironment(object):
 
             # 派单环节, 设计与算法交互
             used_seconds, dispatch_result = self.dispatch(updated_input_info)
+            self.dispatch_seconds += used_seconds
             self.time_to_dispatch_result[self.cur_time] = dispatch_result
 
             # 校验, 车辆目的地不能改变
-            if not Checker.check_dispatch_result(dispatch_result, self.id_to_vehicle, self.id_to_order):
+            violations = Checker.validate_dispatch_result(dispatch_result, self.id_to_vehicle, self.id_to_order)
+            if len(violations) > 0:
                 logger.error("Dispatch result is infeasible")
+                for violation in violations:
+                    violation.time = self.cur_time
+                self.violations.extend(violations)
                 return
 
             # 根据派单指令更新车辆
@@ -127,7 +134,9 @@ class SimulateEnvironment(object):
             # 若订单已经超时, 但是算法依旧未分配, 模拟终止
             if self.ignore_allocating_timeout_orders(dispatch_result):
                 logger.error('Simulator terminated')
-                sys.exit(-1)
+                self.violations.append(Violation("timeout_item_ignored", "Timed out items are ignored in the "
+                                                                         "dispatch result", time=self.cur_time))
+                return
 
         # 模拟完成车辆剩下的订单
         self.simulate_the_left_ongoing_orders_of_vehicles(self.id_to_vehicle)
@@ -157,8 +166,7 @@ class SimulateEnvironment(object):
 
         # 根据当前时间选择待分配订单的物料集合
         # Select the item collection of the orders to be allocated according to the current time
-        self.id_to_generated_order_item = get_order_items_to_be_dispatched_of_cur_time(self.id_to_order_item,
-                                                                                       self.cur_time)
+        self.id_to_generated_order_item = self.order_item_index.get_order_items_to_be_dispatched(self.cur_time)
 
         # 汇总车辆、订单和路网信息, 作为派单算法的输入
         # create the input of algorithm
@@ -177,14 +185,14 @@ class SimulateEnvironment(object):
             if item is not None:
                 if item_id not in self.id_to_completed_order_item:
                     self.id_to_completed_order_item[item_id] = item
-                    item.delivery_state = Configs.ORDER_STATUS_TO_CODE.get("COMPLETED")
+                    self.order_item_index.set_state(item, Configs.ORDER_STATUS_TO_CODE.get("COMPLETED"))
 
         for item_id in ongoing_item_ids:
             item = self.id_to_order_item.get(item_id)
             if item is not None:
                 if item_id not in self.id_to_ongoing_order_item:
                     self.id_to_ongoing_order_item[item_id] = item
-                    item.delivery_state = Configs.ORDER_STATUS_TO_CODE.get("ONGOING")
+                    self.order_item_index.set_state(item, Configs.ORDER_STATUS_TO_CODE.get("ONGOING"))
 
         # remove expired items
         expired_item_id_list = []
@@ -221,37 +229,18 @@ class SimulateEnvironment(object):
 
     # 派单环节
     def dispatch(self, input_info):
-        # 1. Prepare the input json of the algorithm
-        convert_input_info_to_json_files(input_info)
-
-        # 2. Run the algorithm
-        if not self.algorithm_calling_command:
-            self.algorithm_calling_command = get_algorithm_calling_command()
-        time_start_algorithm = time.time()
-        used_seconds, message = subprocess_function(self.algorithm_calling_command)
-
-        # 3. parse the output json of the algorithm
-        if Configs.ALGORITHM_SUCCESS_FLAG in message:
-            if (time_start_algorithm < os.stat(Configs.algorithm_output_destination_path).st_mtime < time.time()
-                    and time_start_algorithm < os.stat(
-                        Configs.algorithm_output_planned_route_path).st_mtime < time.time()):
-                vehicle_id_to_destination, vehicle_id_to_planned_route = get_output_of_algorithm(self.id_to_order_item)
-                dispatch_result = DispatchResult(vehicle_id_to_destination, vehicle_id_to_planned_route)
-                return used_seconds, dispatch_result
-            else:
-                logger.error("Output_json files from the algorithm is not the newest.")
-                sys.exit(-1)
-        else:
-            logger.error(message)
-            logger.error("Can not catch the 'SUCCESS' from the algorithm. 未寻获算法输出成功标识'SUCCESS'。")
-            sys.exit(-1)
+        if self.dispatcher is None:
+            self.dispatcher = get_dispatcher()
+        return self.dispatcher.dispatch(input_info, self.id_to_order_item)
 
     # 判断是否完成所有订单的派发
     def complete_the_dispatch_of_all_orders(self):
-        for item in self.id_to_order_item.values():
-            if item.delivery_state <= 1:
-                logger.info(f"{datetime.datetime.fromtimestamp(self.cur_time)}, Item {item.id}: "
-                            f"state = {item.delivery_state} < 2, we can not finish the simulation")
+        for state_name in ("INITIALIZATION", "GENERATED"):
+            state = Configs.ORDER_STATUS_TO_CODE.get(state_name)
+            count = self.order_item_index.count_of_state(state)
+            if count > 0:
+                logger.info(f"{datetime.datetime.fromtimestamp(self.cur_time)}, {count} items: "
+                            f"state = {state} < 2, we can not finish the simulation")
                 return False
         logger.info(f"{datetime.datetime.fromtimestamp(self.cur_time)}, the status of all items is greater than 1, "
                     f"we could finish the simulation")
@@ -284,12 +273,7 @@ class SimulateEnvironment(object):
 
     # 检查当前是否有订单已经超时却依旧未分配
     def ignore_allocating_timeout_orders(self, dispatch_result):
-        vehicle_id_to_item_list = get_item_list_of_vehicles(dispatch_result, self.id_to_vehicle)
-        total_item_ids_in_dispatch_result = []
-        for vehicle_id, item_list in vehicle_id_to_item_list.items():
-            for item in item_list:
-                if item.id not in total_item_ids_in_dispatch_result:
-                    total_item_ids_in_dispatch_result.append(item.id)
+        total_item_ids_in_dispatch_result = get_item_id_set_of_vehicles(dispatch_result, self.id_to_vehicle)
 
         for item_id, item in self.id_to_generated_order_item.items():
             if item_id not in total_item_ids_in_dispatch_result:
@@ -19,16 +19,53 @@
 # THE SOFTWARE
 
 import datetime
-
-import simpy
+import heapq
+from collections import deque
 
 from src.conf.configs import Configs
 from src.utils.logging_engine import logger
 
+# 事件优先级, 同一时刻车辆的启动事件先于其他事件处理
+# priority of the events, the start of vehicles is handled before the other events at the same time
+URGENT = 0
+NORMAL = 1
+
+
+class DockResource(object):
+    def __init__(self, capacity: int, schedule):
+        """
+        工厂货口资源, 用计数器记录占用的货口, 等待的车辆先进先出
+        Docks of a factory, the occupied docks are counted and the waiting vehicles are served first in first out
+        :param capacity: 货口数量, number of docks
+        :param schedule: 事件调度函数, schedule(delay, priority, target)
+        """
+        self.capacity = capacity
+        self.users = 0
+        self.wait_queue = deque()
+        self.__schedule = schedule
+
+    def request(self, process):
+        self.wait_queue.append(process)
+        self.grant()
+
+    def release(self):
+        # 货口在释放事件处理时才分配给等待的车辆, the dock is granted to the waiting vehicle when the release is handled
+        self.users -= 1
+        self.__schedule(0, NORMAL, self)
+
+    def grant(self):
+        # 每次至多把一个货口分配给队首的车辆, grant at most one dock to the head of the wait queue
+        if len(self.wait_queue) > 0 and self.users < self.capacity:
+            self.users += 1
+            self.__schedule(0, NORMAL, self.wait_queue.popleft())
+
 
 class VehicleSimulator(object):
     def __init__(self, route_map, id_to_factory):
-        self.env = simpy.Environment()
+        self.now = 0
+        # 事件堆, heap of the events (time, priority, sequence, target)
+        self.events = []
+        self.__event_count = 0
         self.factory_id_to_dock_resource = {}
 
         self.route_map = route_map
@@ -43,7 +80,18 @@ class VehicleSimulator(object):
     def __ini_dock_resources_of_factories(self, id_to_factory: dict):
         self.factory_id_to_dock_resource = {}
         for factory_id, factory in id_to_factory.items():
-            self.factory_id_to_dock_resource[factory_id] = simpy.Resource(self.env, capacity=factory.dock_num)
+            self.factory_id_to_dock_resource[factory_id] = DockResource(factory.dock_num, self.schedule)
+
+    def schedule(self, delay, priority: int, target):
+        """
+        :param delay: unit is second
+        :param priority: URGENT or NORMAL
+        :param target: 待恢复的车辆过程或待分配的货口, the process of vehicle to resume or the dock resource to grant
+        """
+        if delay < 0:
+            raise ValueError(f"Negative delay {delay}")
+        heapq.heappush(self.events, (self.now + delay, priority, self.__event_count, target))
+        self.__event_count += 1
 
     def run(self, id_to_vehicle: dict, from_time: int):
         """
@@ -51,7 +99,8 @@ class VehicleSimulator(object):
         :param from_time: unit is second, start time of the simulator
         """
         # 初始化仿真环境, initial the simulation environment
-        self.env = simpy.rt.RealtimeEnvironment(initial_time=from_time, factor=0.000000000001, strict=False)
+        self.now = from_time
+        self.events = []
 
         # 初始化各工厂的货口资源, initial the port resource of each factory
         self.__ini_dock_resources_of_factories(self.id_to_factory)
@@ -61,8 +110,25 @@ class VehicleSimulator(object):
 
         # Each vehicle starts to visit its route
         for vehicle in sorted_vehicles:
-            self.env.process(self.work(vehicle))
-        self.env.run()
+            self.schedule(0, URGENT, self.work(vehicle))
+
+        while len(self.events) > 0:
+            self.now, _, _, target = heapq.heappop(self.events)
+            if isinstance(target, DockResource):
+                target.grant()
+            else:
+                self.__resume(target)
+
+    def __resume(self, process):
+        # 车辆过程产出的是等待时长或需要占用的货口, the process yields a delay or the dock resource to request
+        try:
+            command = next(process)
+        except StopIteration:
+            return
+        if isinstance(command, DockResource):
+            command.request(process)
+        else:
+            self.schedule(command, NORMAL, process)
 
     # Visiting process of each vehicle
     def work(self, vehicle):
@@ -70,15 +136,15 @@ class VehicleSimulator(object):
         # 当前在工厂: 1. 还处于装卸过程(占用货口资源); 2. 停车状态(不占用货口资源)
         if len(cur_factory_id) > 0:
             # 1.还处于装卸过程(占用货口资源);
-            if vehicle.leave_time_at_current_factory > self.env.now:
+            if vehicle.leave_time_at_current_factory > self.now:
                 resource = self.factory_id_to_dock_resource.get(cur_factory_id)
-                with resource.request() as req:
-                    yield req
-                    yield self.env.timeout(vehicle.leave_time_at_current_factory - self.env.now)
+                yield resource
+                yield vehicle.leave_time_at_current_factory - self.now
+                resource.release()
 
             # 2. 停车状态(不占用货口资源)
             else:
-                vehicle.leave_time_at_current_factory = self.env.now
+                vehicle.leave_time_at_current_factory = self.now
 
         if vehicle.destination is None:
             if len(cur_factory_id) == 0:
@@ -88,25 +154,25 @@ class VehicleSimulator(object):
         if len(cur_factory_id) > 0:
             next_factory_id = vehicle.destination.id
             transport_time = self.route_map.calculate_transport_time_between_factories(cur_factory_id, next_factory_id)
-            yield self.env.timeout(transport_time)
+            yield transport_time
         else:
             # driving towards destination
             arr_time = vehicle.destination.arrive_time
-            if arr_time >= self.env.now:
-                yield self.env.timeout(arr_time - self.env.now)
+            if arr_time >= self.now:
+                yield arr_time - self.now
             else:
                 logger.error(f"Vehicle {vehicle.id} is driving toward the destination, "
-                             f"however current time {datetime.datetime.fromtimestamp(self.env.now)} is greater than "
+                             f"however current time {datetime.datetime.fromtimestamp(self.now)} is greater than "
                              f"the arrival time {datetime.datetime.fromtimestamp(arr_time)} of destination!!!")
 
-        vehicle.destination.arrive_time = self.env.now
+        vehicle.destination.arrive_time = self.now
         service_time = vehicle.destination.service_time
         cur_factory_id = vehicle.destination.id
         resource = self.factory_id_to_dock_resource.get(cur_factory_id)
-        with resource.request() as req:
-            yield req
-            yield self.env.timeout(service_time + Configs.DOCK_APPROACHING_TIME)
-        vehicle.destination.leave_time = self.env.now
+        yield resource
+        yield service_time + Configs.DOCK_APPROACHING_TIME
+        resource.release()
+        vehicle.destination.leave_time = self.now
 
         # driving towards the left nodes
         for node in vehicle.planned_route:
@@ -114,16 +180,16 @@ class VehicleSimulator(object):
 
             # 计算运输时间
             transport_time = self.route_map.calculate_transport_time_between_factories(cur_factory_id, next_factory_id)
-            yield self.env.timeout(transport_time)
+            yield transport_time
 
             # 计算服务时间
-            arr_time = self.env.now
+            arr_time = self.now
             service_time = node.service_time
             resource = self.factory_id_to_dock_resource.get(next_factory_id)
-            with resource.request() as req:
-                yield req
-                yield self.env.timeout(service_time + Configs.DOCK_APPROACHING_TIME)
-            leave_time = self.env.now
+            yield resource
+            yield service_time + Configs.DOCK_APPROACHING_TIME
+            resource.release()
+            leave_time = self.now
 
             node.arrive_time = arr_time
             node.leave_time = leave_time
@@ -18,45 +18,82 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE
 
-import copy
+import datetime
 
 from src.utils.logging_engine import logger
-from src.utils.tools import get_item_list_of_vehicles
+
+
+class Violation(object):
+    def __init__(self, constraint: str, message: str, vehicle_id=None, item_id=None, time=None):
+        """
+        派单结果的违规记录, a violation of the dispatch result
+        :param constraint: 违反的约束, e.g. "capacity", "lifo", "duplicate_item", "factory_mismatch"
+        :param message: 违规描述, description of the violation
+        :param vehicle_id: 违规的车辆, None if the violation is not related to a single vehicle
+        :param item_id: 违规的物料, None if the violation is not related to a single item
+        :param time: 派单的时间切片, unix timestamp of the time slice, set by the simulator
+        """
+        self.constraint = constraint
+        self.message = message
+        self.vehicle_id = vehicle_id
+        self.item_id = item_id
+        self.time = time
+
+    def __str__(self):
+        if self.time is None:
+            return self.message
+        return f"{datetime.datetime.fromtimestamp(self.time)}, {self.message}"
+
+    def __repr__(self):
+        return f"Violation({self.constraint!r}, {self.message!r}, vehicle_id={self.vehicle_id!r}, " \
+               f"item_id={self.item_id!r}, time={self.time!r})"
 
 
 class Checker(object):
     @staticmethod
     def check_dispatch_result(dispatch_result, id_to_vehicle: dict, id_to_order: dict):
+        violations = Checker.validate_dispatch_result(dispatch_result, id_to_vehicle, id_to_order)
+        return len(violations) == 0
+
+    @staticmethod
+    def validate_dispatch_result(dispatch_result, id_to_vehicle: dict, id_to_order: dict):
+        """
+        :return: 违规记录列表, list of Violation, empty if the dispatch result is feasible
+        """
         vehicle_id_to_destination = dispatch_result.vehicle_id_to_destination
         vehicle_id_to_planned_route = dispatch_result.vehicle_id_to_planned_route
 
+        violations = []
         # 检查是否所有的车辆都有返回值
         if len(vehicle_id_to_destination) != len(id_to_vehicle):
-            logger.error(f"Num of returned destination {len(vehicle_id_to_destination)} "
-                         f"is not equal to vehicle number {len(id_to_vehicle)}")
-            return False
+            violations.append(Violation("missing_result", f"Num of returned destination "
+                                                          f"{len(vehicle_id_to_destination)} "
+                                                          f"is not equal to vehicle number {len(id_to_vehicle)}"))
 
         if len(vehicle_id_to_planned_route) != len(id_to_vehicle):
-            logger.error(f"Num of returned planned route {len(vehicle_id_to_planned_route)} "
-                         f"is not equal to vehicle number {len(id_to_vehicle)}")
-            return False
+            violations.append(Violation("missing_result", f"Num of returned planned route "
+                                                          f"{len(vehicle_id_to_planned_route)} "
+                                                          f"is not equal to vehicle number {len(id_to_vehicle)}"))
 
         # 逐个检查各车辆路径
         for vehicle_id, vehicle in id_to_vehicle.items():
             if vehicle_id not in vehicle_id_to_destination:
-                logger.error(f"Destination information of Vehicle {vehicle_id} is not in the returned result")
-                return False
+                violations.append(Violation("missing_result", f"Destination information of Vehicle {vehicle_id} "
+                                                              f"is not in the returned result", vehicle_id))
+                continue
 
             # check destination
             destination_in_result = vehicle_id_to_destination.get(vehicle_id)
-            if not Checker.__is_returned_destination_valid(destination_in_result, vehicle):
-                logger.error(f"Returned destination of Vehicle {vehicle_id} is not valid")
-                return False
+            violation = Checker.__check_returned_destination(destination_in_result, vehicle)
+            if violation is not None:
+                violations.append(violation)
+                continue
 
             # check routes
             if vehicle_id not in vehicle_id_to_planned_route:
-                logger.error(f"Planned route of Vehicle {vehicle_id} is not in the returned result")
-                return False
+                violations.append(Violation("missing_result", f"Planned route of Vehicle {vehicle_id} "
+                                                              f"is not in the returned result", vehicle_id))
+                continue
 
             route = []
             if destination_in_result is not None:
@@ -64,224 +101,172 @@ class Checker(object):
             route.extend(vehicle_id_to_planned_route.get(vehicle_id))
 
             if len(route) > 0:
-                # check capacity
-                if not Checker.__meet_capacity_constraint(route, copy.deepcopy(vehicle.carrying_items),
-                                                          vehicle.board_capacity):
-                    logger.error(f"Vehicle {vehicle_id} violates the capacity constraint")
-                    return False
-
-                # check LIFO
-                if not Checker.__meet_loading_and_unloading_constraint(route, copy.deepcopy(vehicle.carrying_items)):
-                    logger.error(f"Vehicle {vehicle_id} violates the LIFO constraint")
-                    return False
-
-                # check adjacent-duplicated nodes
-                Checker.__contain_duplicated_nodes(vehicle_id, route)
-
-                # check duplicated item id
-                if Checker.__contain_duplicate_items(route, copy.deepcopy(vehicle.carrying_items)):
-                    return False
-
-                if not Checker.__do_pickup_and_delivery_items_match_the_node(route):
-                    return False
+                violations.extend(Checker.__check_route(vehicle, route))
 
         # check order splitting
-        if not Checker.__meet_order_splitting_constraint(dispatch_result, id_to_vehicle, id_to_order):
-            return False
+        if len(violations) == 0:
+            violations.extend(Checker.__check_order_splitting(dispatch_result, id_to_vehicle, id_to_order))
 
-        return True
+        for violation in violations:
+            logger.error(violation.message)
+        return violations
 
     @staticmethod
-    def __is_returned_destination_valid(returned_destination, vehicle):
+    def __check_returned_destination(returned_destination, vehicle):
         origin_destination = vehicle.destination
         if origin_destination is not None:
             if returned_destination is None:
-                logger.error(f"Vehicle {vehicle.id}, returned destination is None, "
-                             f"however the origin destination is not None.")
-                return False
-            else:
-                if origin_destination.id != returned_destination.id:
-                    logger.error(f"Vehicle {vehicle.id}, returned destination id is {returned_destination.id}, "
-                                 f"however the origin destination id is {origin_destination.id}.")
-                    return False
-
-                if origin_destination.arrive_time != returned_destination.arrive_time:
-                    logger.error(f"Vehicle {vehicle.id}, arrive time of returned destination is "
-                                 f"{returned_destination.arrive_time}, "
-                                 f"however the arrive time of origin destination is "
-                                 f"{origin_destination.arrive_time}.")
-                    return False
+                return Violation("destination", f"Vehicle {vehicle.id}, returned destination is None, "
+                                                f"however the origin destination is not None.", vehicle.id)
+
+            if origin_destination.id != returned_destination.id:
+                return Violation("destination", f"Vehicle {vehicle.id}, returned destination id is "
+                                                f"{returned_destination.id}, however the origin destination id is "
+                                                f"{origin_destination.id}.", vehicle.id)
+
+            if origin_destination.arrive_time != returned_destination.arrive_time:
+                return Violation("destination", f"Vehicle {vehicle.id}, arrive time of returned destination is "
+                                                f"{returned_destination.arrive_time}, "
+                                                f"however the arrive time of origin destination is "
+                                                f"{origin_destination.arrive_time}.", vehicle.id)
         elif len(vehicle.cur_factory_id) == 0 and returned_destination is None:
-            logger.error(f"Currently, Vehicle {vehicle.id} is not in the factory(cur_factory_id==''), "
-                         f"however, returned destination is also None, we cannot locate the vehicle.")
-            return False
+            return Violation("destination", f"Currently, Vehicle {vehicle.id} is not in the factory"
+                                            f"(cur_factory_id==''), however, returned destination is also None, "
+                                            f"we cannot locate the vehicle.", vehicle.id)
+        return None
 
-        return True
-
-    # 载重约束
     @staticmethod
-    def __meet_capacity_constraint(route: list, carrying_items, capacity):
+    def __check_route(vehicle, route: list):
+        """
+        沿路线遍历一次, 同时检查载重、后进先出、物料重复以及取送货工厂是否匹配, 每种约束只记录第一次违规
+        Walk the route once with a stack of item ids, checking the capacity, LIFO, duplicate items and the factories
+        of the pickup and delivery items together, only the first violation of each constraint is recorded
+        """
+        vehicle_id = vehicle.id
+        capacity = vehicle.board_capacity
+        capacity_violation = None
+        lifo_violation = None
+        duplicate_violation = None
+        factory_violation = None
+
+        # 车上物料编号栈, 栈底在前; stack of the ids of carrying items, the bottom first
+        carrying_items = vehicle.carrying_items.items
+        item_id_stack = [item.id for item in carrying_items]
+        visited_item_ids = set()
+
+        # Stack, 从栈顶开始; from the top of the stack
         left_capacity = capacity
-
-        # Stack
-        while not carrying_items.is_empty():
-            item = carrying_items.pop()
+        for item in reversed(carrying_items):
             left_capacity -= item.demand
-            if left_capacity < 0:
-                logger.error(f"left capacity {left_capacity} < 0")
-                return False
+            if left_capacity < 0 and capacity_violation is None:
+                capacity_violation = Violation("capacity", f"Vehicle {vehicle_id} violates the capacity constraint, "
+                                                           f"left capacity {left_capacity} < 0", vehicle_id, item.id)
+            if item.id in visited_item_ids:
+                if duplicate_violation is None:
+                    duplicate_violation = Violation("duplicate_item", f"Item {item.id}: duplicate item id",
+                                                    vehicle_id, item.id)
+            else:
+                visited_item_ids.add(item.id)
 
+        pre_factory_id = None
         for node in route:
-            delivery_items = node.delivery_items
-            pickup_items = node.pickup_items
-            for item in delivery_items:
+            factory_id = node.id
+            # 检查相邻的节点是否重复，并警告，鼓励把相邻重复节点进行合并
+            if factory_id == pre_factory_id:
+                logger.warning(f"{vehicle_id} has adjacent-duplicated nodes "
+                               f"which are encouraged to be combined in one.")
+            pre_factory_id = factory_id
+
+            for item in node.delivery_items:
+                item_id = item.id
                 left_capacity += item.demand
-                if left_capacity > capacity:
-                    logger.error(f"left capacity {left_capacity} > capacity {capacity}")
-                    return False
-
-            for item in pickup_items:
+                if left_capacity > capacity and capacity_violation is None:
+                    capacity_violation = Violation("capacity", f"Vehicle {vehicle_id} violates the capacity "
+                                                               f"constraint, left capacity {left_capacity} > "
+                                                               f"capacity {capacity}", vehicle_id, item_id)
+
+                if lifo_violation is None and (len(item_id_stack) == 0 or item_id_stack.pop() != item_id):
+                    lifo_violation = Violation("lifo", f"Vehicle {vehicle_id} violates the LIFO constraint, "
+                                                       f"item {item_id} is not on the top of the stack",
+                                               vehicle_id, item_id)
+
+                if item.delivery_factory_id != factory_id and factory_violation is None:
+                    factory_violation = Violation("factory_mismatch", f"Delivery factory of item {item_id} is "
+                                                                      f"{item.delivery_factory_id}, however you "
+                                                                      f"allocate the vehicle to delivery this item "
+                                                                      f"in {factory_id}", vehicle_id, item_id)
+
+            for item in node.pickup_items:
+                item_id = item.id
                 left_capacity -= item.demand
-                if left_capacity < 0:
-                    logger.error(f"left capacity {left_capacity} < 0")
-                    return False
-        return True
-
-    # LIFO约束
-    @staticmethod
-    def __meet_loading_and_unloading_constraint(route: list, carrying_items):
-        for node in route:
-            delivery_items = node.delivery_items
-            pickup_items = node.pickup_items
-            for item in delivery_items:
-                unload_item = carrying_items.pop()
-                if unload_item is None or unload_item.id != item.id:
-                    return False
-
-            for item in pickup_items:
-                carrying_items.push(item)
+                if left_capacity < 0 and capacity_violation is None:
+                    capacity_violation = Violation("capacity", f"Vehicle {vehicle_id} violates the capacity "
+                                                               f"constraint, left capacity {left_capacity} < 0",
+                                                   vehicle_id, item_id)
 
-        return carrying_items.is_empty()
+                item_id_stack.append(item_id)
 
-    # 检查相邻的节点是否重复，并警告，鼓励把相邻重复节点进行合并
-    @staticmethod
-    def __contain_duplicated_nodes(vehicle_id, route):
-        for n in range(len(route) - 1):
-            if route[n].id == route[n + 1].id:
-                logger.warning(f"{vehicle_id} has adjacent-duplicated nodes which are encouraged to be combined in one.")
+                if item_id not in visited_item_ids:
+                    visited_item_ids.add(item_id)
+                elif duplicate_violation is None:
+                    duplicate_violation = Violation("duplicate_item", f"Item {item_id}: duplicate item id",
+                                                    vehicle_id, item_id)
 
-    @staticmethod
-    def __contain_duplicate_items(route, carrying_items):
-        item_id_list = []
-        while not carrying_items.is_empty():
-            item = carrying_items.pop()
-            if item.id not in item_id_list:
-                item_id_list.append(item.id)
-            else:
-                logger.error(f"Item {item.id}: duplicate item id")
-                return True
+                if item.pickup_factory_id != factory_id and factory_violation is None:
+                    factory_violation = Violation("factory_mismatch", f"Pickup factory of item {item_id} is "
+                                                                      f"{item.pickup_factory_id}, however you "
+                                                                      f"allocate the vehicle to pickup this item "
+                                                                      f"in {factory_id}", vehicle_id, item_id)
 
-        for node in route:
-            pickup_items = node.pickup_items
-            for item in pickup_items:
-                if item.id not in item_id_list:
-                    item_id_list.append(item.id)
-                else:
-                    logger.error(f"Item {item.id}: duplicate item id")
-                    return True
-        return False
+        if len(item_id_stack) > 0 and lifo_violation is None:
+            lifo_violation = Violation("lifo", f"Vehicle {vehicle_id} violates the LIFO constraint, "
+                                               f"{len(item_id_stack)} items are not delivered at the end of the route",
+                                       vehicle_id)
 
-    @staticmethod
-    def __do_pickup_and_delivery_items_match_the_node(route: list):
-        for node in route:
-            factory_id = node.id
-            pickup_items = node.pickup_items
-            for item in pickup_items:
-                if item.pickup_factory_id != factory_id:
-                    logger.error(f"Pickup factory of item {item.id} is {item.pickup_factory_id}, "
-                                 f"however you allocate the vehicle to pickup this item in {factory_id}")
-                    return False
-            delivery_items = node.delivery_items
-            for item in delivery_items:
-                if item.delivery_factory_id != factory_id:
-                    logger.error(f"Delivery factory of item {item.id} is {item.delivery_factory_id}, "
-                                 f"however you allocate the vehicle to delivery this item in {factory_id}")
-                    return False
-        return True
+        return [violation for violation in (capacity_violation, lifo_violation, duplicate_violation,
+                                            factory_violation) if violation is not None]
 
     @staticmethod
-    def __meet_order_splitting_constraint(dispatch_result, id_to_vehicle: dict, id_to_order: dict):
+    def __check_order_splitting(dispatch_result, id_to_vehicle: dict, id_to_order: dict):
         vehicle_id_to_destination = dispatch_result.vehicle_id_to_destination
         vehicle_id_to_planned_route = dispatch_result.vehicle_id_to_planned_route
 
-        vehicle_id_to_item_list = get_item_list_of_vehicles(dispatch_result, id_to_vehicle)
-
         capacity = 0
-        split_order_id_list = Checker.__find_split_orders_from_vehicles(vehicle_id_to_item_list)
-
+        # 订单 ——> 装载该订单物料的车辆, order id ——> ids of the vehicles carrying or picking up its items
+        order_id_to_vehicle_ids = {}
+        # 被拆分的订单, split orders, the dict keeps the order of detection
+        split_order_ids = {}
         for vehicle_id, vehicle in id_to_vehicle.items():
-            logger.debug(f"Find split orders of vehicle {vehicle_id}")
-
             capacity = vehicle.board_capacity
-            carrying_items = copy.deepcopy(vehicle.carrying_items)
+            # 订单 ——> 首次装载的节点下标, 车上物料为-1; order id ——> index of the node first picking it up, -1 if carried
+            order_id_to_node_index = {item.order_id: -1 for item in vehicle.carrying_items.items}
+
             route = []
-            if vehicle_id in vehicle_id_to_destination and vehicle_id_to_destination.get(vehicle_id) is not None:
-                route.append(vehicle_id_to_destination.get(vehicle_id))
-            if vehicle_id in vehicle_id_to_planned_route:
-                route.extend(vehicle_id_to_planned_route.get(vehicle_id))
-            split_order_id_list.extend(Checker.__find_split_orders_in_vehicle_routes(route, carrying_items))
+            destination = vehicle_id_to_destination.get(vehicle_id)
+            if destination is not None:
+                route.append(destination)
+            route.extend(vehicle_id_to_planned_route.get(vehicle_id, []))
 
-        for order_id in split_order_id_list:
-            if order_id in id_to_order:
-                order = id_to_order.get(order_id)
-                if order.demand <= capacity:
-                    logger.error(f"order {order.id} demand: {order.demand} <= {capacity}, we can not split this order.")
-                    return False
-        return True
+            # 同一车辆在不同节点装载的订单被拆分, orders picked up at more than one node of the vehicle are split
+            for index, node in enumerate(route):
+                for item in node.pickup_items:
+                    node_index = order_id_to_node_index.setdefault(item.order_id, index)
+                    if node_index != index:
+                        split_order_ids[item.order_id] = True
+
+            for order_id in order_id_to_node_index:
+                order_id_to_vehicle_ids.setdefault(order_id, set()).add(vehicle_id)
 
-    @staticmethod
-    def __find_split_orders_from_vehicles(vehicle_id_to_item_list: dict):
-        order_id_to_vehicle_ids = {}
-        for vehicle_id, item_list in vehicle_id_to_item_list.items():
-            order_id_list = []
-            for item in item_list:
-                order_id = item.order_id
-                if order_id not in order_id_list:
-                    order_id_list.append(order_id)
-            logger.debug(f"Vehicle {vehicle_id} contains {len(order_id_list)} orders, {len(item_list)} order items")
-
-            for order_id in order_id_list:
-                if order_id not in order_id_to_vehicle_ids:
-                    order_id_to_vehicle_ids[order_id] = []
-                order_id_to_vehicle_ids[order_id].append(vehicle_id)
-
-        split_order_ids = []
         for order_id, vehicle_ids in order_id_to_vehicle_ids.items():
             if len(vehicle_ids) > 1:
-                split_order_ids.append(order_id)
-        logger.debug(f"Find {len(split_order_ids)} split orders from vehicles")
-        return split_order_ids
-
-    @staticmethod
-    def __find_split_orders_in_vehicle_routes(route, carrying_items):
-        order_id_list = []
-        split_order_ids = []
-        while not carrying_items.is_empty():
-            item = carrying_items.pop()
-            order_id = item.order_id
-            if order_id not in order_id_list:
-                order_id_list.append(order_id)
+                split_order_ids[order_id] = True
+        logger.debug(f"Find {len(split_order_ids)} split orders")
 
-        for node in route:
-            tmp_order_id_list = []
-            pickup_items = node.pickup_items
-            for item in pickup_items:
-                if item.order_id not in tmp_order_id_list:
-                    tmp_order_id_list.append(item.order_id)
-            for order_id in tmp_order_id_list:
-                if order_id not in order_id_list:
-                    order_id_list.append(order_id)
-                else:
-                    split_order_ids.append(order_id)
-        logger.debug(f"find {len(split_order_ids)} split orders")
-        return split_order_ids
+        violations = []
+        for order_id in split_order_ids:
+            if order_id in id_to_order:
+                order = id_to_order.get(order_id)
+                if order.demand <= capacity:
+                    violations.append(Violation("order_splitting", f"order {order.id} demand: {order.demand} <= "
+                                                                   f"{capacity}, we can not split this order."))
+        return violations
@@ -105,7 +105,7 @@ def calculate_traveling_distance_of_routes(factory_id_list, route_map):
     if len(factory_id_list) <= 1:
         return travel_distance
 
-    for index in range(len(factory_id_list) - 1):
-        travel_distance += route_map.calculate_distance_between_factories(factory_id_list[index],
-                                                                          factory_id_list[index + 1])
-    return travel_distance
+    route = route_map.get_factory_indexes(factory_id_list)
+    if route is None:
+        return sys.maxsize
+    return route_map.calculate_distance_of_route(route)
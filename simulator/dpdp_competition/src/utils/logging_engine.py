@@ -98,6 +98,11 @@ class LoggingEngine:
         if file_path in self.handlers:
             self.logger.removeHandler(self.handlers.get(file_path))
 
+    def remove_console_output(self):
+        for handler in list(self.logger.handlers):
+            if type(handler) is logging.StreamHandler:
+                self.logger.removeHandler(handler)
+
     def debug(self, msg: str):
         pass
 
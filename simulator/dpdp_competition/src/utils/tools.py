@@ -18,8 +18,6 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE
 
-import copy
-
 from src.conf.configs import Configs
 
 
@@ -43,68 +41,24 @@ def get_item_dict_from_order_dict(id_to_order: dict):
     return id_to_order_item
 
 
-# 获取当前待分配的订单
-def get_order_items_to_be_dispatched_of_cur_time(id_to_order_item: dict, cur_time: int):
+def get_item_id_set_of_vehicles(dispatch_result, id_to_vehicle: dict):
     """
-    :param id_to_order_item: 所有订单物料, total order items
-    :param cur_time: unix timestamp, unit is second
-    :return: 返回当前时间新生成和delivery_state=1("GENERATED")的所有订单物料
+    获取车辆装载和派单结果中待取货的所有物料编号, 不复制车辆的装载物料
+    Get the ids of the items carried by the vehicles or picked up in the dispatch result, without copying the items
     """
-    # 获取当前时间之前还未到装货环节的订单, 依旧可以再分配
-    id_to_generated_order_item = {item.id: item for item in id_to_order_item.values()
-                                  if item.delivery_state == Configs.ORDER_STATUS_TO_CODE.get("GENERATED")}
-
-    # 获取当前之间之前新生成的订单
-    id_to_generated_order_item.update(__get_newly_generated_items(id_to_order_item, cur_time))
-
-    return id_to_generated_order_item
-
-
-def __get_newly_generated_items(id_to_order_item: dict, cur_time: int):
-    id_to_item = {}
-    for item_id, item in id_to_order_item.items():
-        if item.creation_time <= cur_time:
-            if item.delivery_state == Configs.ORDER_STATUS_TO_CODE.get("INITIALIZATION"):
-                # 修改订单状态
-                item.delivery_state = Configs.ORDER_STATUS_TO_CODE.get("GENERATED")
-                id_to_item[item_id] = item
-    return id_to_item
-
-
-# 获取各车辆分配的物料集合
-def get_item_list_of_vehicles(dispatch_result, id_to_vehicle: dict):
-    vehicle_id_to_item_list = {}
+    item_ids = set()
 
     vehicle_id_to_destination = dispatch_result.vehicle_id_to_destination
     vehicle_id_to_planned_route = dispatch_result.vehicle_id_to_planned_route
 
     for vehicle_id, vehicle in id_to_vehicle.items():
-        item_list = []
-        item_id_list = []
-        carrying_items = copy.deepcopy(vehicle.carrying_items)
-        while not carrying_items.is_empty():
-            item = carrying_items.pop()
-            if item.id not in item_id_list:
-                item_id_list.append(item.id)
-                item_list.append(item)
-
-        if vehicle_id in vehicle_id_to_destination:
-            destination = vehicle_id_to_destination.get(vehicle_id)
-            if destination is not None:
-                pickup_items = destination.pickup_items
-                for item in pickup_items:
-                    if item.id not in item_id_list:
-                        item_id_list.append(item.id)
-                        item_list.append(item)
+        item_ids.update(item.id for item in vehicle.carrying_items.items)
 
-        if vehicle_id in vehicle_id_to_planned_route:
-            for node in vehicle_id_to_planned_route.get(vehicle_id):
-                pickup_items = node.pickup_items
-                for item in pickup_items:
-                    if item.id not in item_id_list:
-                        item_id_list.append(item.id)
-                        item_list.append(item)
+        destination = vehicle_id_to_destination.get(vehicle_id)
+        if destination is not None:
+            item_ids.update(item.id for item in destination.pickup_items)
 
-        vehicle_id_to_item_list[vehicle_id] = item_list
+        for node in vehicle_id_to_planned_route.get(vehicle_id, []):
+            item_ids.update(item.id for item in node.pickup_items)
 
-    return vehicle_id_to_item_list
+    return item_ids
@@ -0,0 +1,41 @@
+import numpy as np
+
+from xt.agent.advantage import discount_cumsum, gae_advantage, n_step_returns
+
+
+def test_gae_matches_reverse_loop():
+    """
+    test blocked gae against the per-step reverse loop, across episode ends
+    """
+    steps, gamma, lam = 300, 0.99, 0.95
+    value = np.random.randn(steps + 1, 1).astype(np.float32)
+    reward = np.random.randn(steps, 1)
+    done = np.random.rand(steps) < 0.05
+
+    discount = ~np.expand_dims(done, 1) * gamma
+    expected = reward + discount * value[1:] - value[:-1]
+    for j in range(steps - 2, -1, -1):
+        expected[j] += expected[j + 1] * discount[j] * lam
+
+    adv = gae_advantage(reward, value[:-1], value[1:], done, gamma, lam)
+    assert adv.shape == expected.shape
+    assert np.allclose(adv, expected)
+
+
+def test_discount_cumsum_scalar():
+    """
+    test the scalar discount on a short sequence
+    """
+    assert np.allclose(discount_cumsum(np.ones(3), 0.5), [1.75, 1.5, 1.0])
+    assert discount_cumsum(np.zeros((0, 2)), 0.5).shape == (0, 2)
+
+
+def test_n_step_returns_truncate_at_done():
+    """
+    test n-step returns bootstrap and stop at the episode end
+    """
+    rewards = np.array([1.0, 1.0, 1.0, 1.0])
+    values = np.array([0.0, 0.0, 0.0, 0.0, 10.0])
+    dones = np.array([False, True, False, False])
+    ret = n_step_returns(rewards, values, dones, 0.5, 2)
+    assert np.allclose(ret, [1.5, 1.0, 1.0 + 0.5 + 0.25 * 10.0, 1.0 + 0.5 * 10.0])
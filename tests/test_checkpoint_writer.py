@@ -0,0 +1,25 @@
+import os
+
+import numpy as np
+
+from xt.framework.checkpoint_writer import CheckpointWriter
+
+
+def test_writer_keeps_order_and_prunes(tmp_path):
+    """
+    test the checkpoints written in submit order, pruned beyond max_to_keep
+    """
+    old = tmp_path / "actor_00000.npz"
+    np.savez(str(old), w=np.zeros(2))
+
+    writer = CheckpointWriter(max_to_keep=3)
+    for i in range(1, 6):
+        writer.submit(str(tmp_path / "actor_{}.npz".format(str(i).zfill(5))),
+                      {"w": np.full(2, i, dtype=np.float32)})
+    writer.close()
+
+    kept = sorted(os.listdir(str(tmp_path)))
+    assert kept == ["actor_00003.npz", "actor_00004.npz", "actor_00005.npz"]
+    assert [os.path.basename(_f) for _f in writer.saved_files(str(tmp_path))] == kept
+    with np.load(str(tmp_path / "actor_00005.npz")) as data:
+        assert np.all(data["w"] == 5)
@@ -0,0 +1,54 @@
+from collections import deque
+
+import numpy as np
+
+from xt.environment.gym.frame_stack import FrameStack
+
+
+def _frames(num, dim=8):
+    return [np.full((dim, dim, 1), i + 1, dtype=np.uint8) for i in range(num)]
+
+
+def test_stack_matches_deque_concatenate():
+    """
+    test every mode against the deque and concatenate stacking
+    """
+    frames = _frames(11)
+    blank = np.zeros_like(frames[0])
+    for mode in ("copy", "inplace", "view"):
+        stacker = FrameStack(frames[0].shape, 4, mode=mode)
+        expected = deque([blank] * 3 + [frames[0]], maxlen=4)
+        stack = stacker.reset(frames[0])
+        assert np.array_equal(stack, np.concatenate(expected, -1))
+        for frame in frames[1:]:
+            expected.append(frame)
+            stack = stacker.push(frame)
+            assert np.array_equal(stack, np.concatenate(expected, -1))
+
+
+def test_copy_mode_keeps_old_stacks():
+    """
+    test the copy mode stacks are not overwritten by later pushes
+    """
+    frames = _frames(6)
+    stacker = FrameStack(frames[0].shape, 4)
+    first = stacker.reset(frames[0])
+    for frame in frames[1:]:
+        stacker.push(frame)
+    assert np.array_equal(first[..., -1], frames[0][..., 0])
+    assert not first[..., :-1].any()
+
+
+def test_newest_mode_stack_index():
+    """
+    test the newest mode emits one frame and the stacked frame ids
+    """
+    frames = _frames(6)
+    stacker = FrameStack(frames[0].shape, 4, mode="newest")
+    frame, index = stacker.reset(frames[0])
+    assert np.array_equal(frame, frames[0])
+    assert list(index) == [-1, -1, -1, 0]
+    for frame in frames[1:]:
+        frame_out, index = stacker.push(frame)
+    assert np.array_equal(frame_out, frames[-1])
+    assert list(index) == [2, 3, 4, 5]
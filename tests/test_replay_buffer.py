@@ -0,0 +1,94 @@
+import numpy as np
+
+from xt.algorithm.replay_buffer import ArrayReplayBuffer
+
+STACK = 4
+
+
+def _frame(frame_id):
+    """Frame of [2, 2], unique to the frame id."""
+    return np.array([[frame_id % 256, frame_id // 256 % 256], [7, 9]], np.uint8)
+
+
+def _episode(first_frame, first_action, length):
+    """Transitions of an episode, the frames slide by one each step."""
+    frames = [_frame(first_frame + _i) for _i in range(length + STACK)]
+    return [{"cur_state": np.stack(frames[_t: _t + STACK], axis=-1),
+             "action": first_action + _t,
+             "reward": float(_t),
+             "next_state": np.stack(frames[_t + 1: _t + 1 + STACK], axis=-1),
+             "done": _t == length - 1} for _t in range(length)]
+
+
+def _add(buf, transitions, stream, chunk):
+    """Add the transitions as trajectory messages of chunk length."""
+    for start in range(0, len(transitions), chunk):
+        part = transitions[start: start + chunk]
+        buf.add({key: [_trans[key] for _trans in part] for key in part[0]}, stream)
+
+
+def _check_sample(buf, inserted, rounds=32):
+    """Check the sampled transitions equal the inserted, return their actions."""
+    sampled = set()
+    for _ in range(rounds):
+        cur_state, action, reward, next_state, done = buf.get_batch(buf.size())
+        for index, _action in enumerate(action):
+            trans = inserted[int(_action)]
+            assert np.array_equal(cur_state[index], trans["cur_state"])
+            assert np.array_equal(next_state[index], trans["next_state"])
+            assert reward[index] == trans["reward"] and done[index] == trans["done"]
+        sampled.update(int(_a) for _a in action)
+    return sampled
+
+
+def test_round_trip():
+    """
+    test the sampled states equal the inserted, with the frames stored once
+    """
+    np.random.seed(0)
+    buf = ArrayReplayBuffer(64)
+    episode = _episode(0, 0, 40)
+    _add(buf, episode, stream=0, chunk=16)
+
+    assert buf.size() == 40
+    # the first stack, then one new frame each step
+    assert buf._frame_count == 40 + STACK
+    cur_state, *_ = buf.get_batch(8)
+    assert cur_state.shape == (8, 2, 2, STACK) and cur_state.dtype == np.uint8
+    assert _check_sample(buf, episode) == set(range(40))
+
+
+def test_eviction_with_shared_frames():
+    """
+    test the oldest transitions evicted once the frames wrapped, the kept ones intact
+    """
+    np.random.seed(1)
+    buf = ArrayReplayBuffer(512)
+    # short episodes write more frames than transitions, the frames wrap first;
+    # the transitions of an episode share frames across the eviction boundary
+    episodes = list()
+    for index in range(600):
+        episodes.extend(_episode(10 * index, 3 * index, 3))
+    _add(buf, episodes, stream=0, chunk=10)
+
+    assert buf._frame_count > 2 * buf._frame_capacity
+    assert 0 < buf.size() < 512
+    sampled = _check_sample(buf, episodes)
+    assert sampled == set(range(len(episodes) - buf.size(), len(episodes)))
+
+
+def test_interleaved_episodes():
+    """
+    test the messages of two streams interleaved, each with the episodes restarted
+    """
+    np.random.seed(2)
+    buf = ArrayReplayBuffer(256)
+    streams = {0: _episode(0, 0, 30) + _episode(100, 30, 20),
+               1: _episode(1000, 50, 25) + _episode(1100, 75, 25)}
+    inserted = streams[0] + streams[1]
+    for start in range(0, 50, 5):
+        for stream, transitions in streams.items():
+            _add(buf, transitions[start: start + 5], stream, chunk=5)
+
+    assert buf.size() == 100
+    assert _check_sample(buf, inserted) == set(range(100))
@@ -0,0 +1,50 @@
+import numpy as np
+
+from xt.algorithm.segment_tree import SumSegmentTree, MinSegmentTree
+from xt.algorithm.prioritized_replay_buffer_muzero import PrioritizedReplayBuffer
+
+
+def test_batch_update_and_reduce():
+    """
+    test batched update against numpy reductions
+    """
+    values = np.random.rand(16)
+    it_sum = SumSegmentTree(16)
+    it_min = MinSegmentTree(16)
+    it_sum.update(np.arange(16), values)
+    it_min.update(np.arange(16), values)
+
+    assert np.isclose(it_sum.sum(), values.sum())
+    assert np.isclose(it_sum.sum(3, 11), values[3:11].sum())
+    assert it_min.min(5, 9) == values[5:9].min()
+
+
+def test_batch_find_prefixsum_idx():
+    """
+    test batched prefix search matches the scalar search
+    """
+    values = np.random.rand(32)
+    it_sum = SumSegmentTree(32)
+    it_sum.update(np.arange(32), values)
+
+    mass = np.random.rand(256) * values.sum()
+    idxes = it_sum.find_prefixsum_idx(mass)
+    expected = np.searchsorted(np.cumsum(values), mass, side="right")
+    assert np.array_equal(idxes, expected)
+    assert idxes[0] == it_sum.find_prefixsum_idx(float(mass[0]))
+
+
+def test_prioritized_sample_and_update():
+    """
+    test prioritized buffer sampling and batched priority update
+    """
+    buff = PrioritizedReplayBuffer(100, alpha=1)
+    for i in range(60):
+        buff.add(i, i + 1.0)
+
+    data, weights, idxes = buff.sample(16, 1)
+    assert len(data) == 16 and weights.shape == (16, )
+    assert np.all(weights <= 1.0)
+
+    buff.update_priorities(idxes, np.full(16, 100.0))
+    assert buff._it_max.max() == 100.0
@@ -0,0 +1,82 @@
+import multiprocessing
+import time
+
+import numpy as np
+
+import xt  # noqa: F401, the registers are set up by xt before the comm modules
+from zeus.common.ipc.share_by_ring import ShareByRing
+
+
+def _message(index, size=16):
+    return {"ctr_info": {"cmd": "train", "index": index}, "data": [np.full(size, index, np.int64)]}
+
+
+def _produce(ring, start, count, size):
+    for index in range(start, start + count):
+        ring.send(_message(index, size))
+
+
+def _fork_producer(ring, start, count, size=16):
+    proc = multiprocessing.get_context("fork").Process(target=_produce, args=(ring, start, count, size))
+    proc.start()
+    return proc
+
+
+def _recv(ring, timeout=10):
+    """Receive one message, fail instead of waiting forever."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        received = ring.recv(block=False)
+        if received is not None:
+            return received
+        time.sleep(0.001)
+    raise AssertionError("no message within {}s".format(timeout))
+
+
+def _recv_all(ring, count, size=16):
+    for index in range(count):
+        ctr_info, data = _recv(ring)
+        assert ctr_info["index"] == index
+        assert np.array_equal(data[0], np.full(size, index, np.int64))
+
+
+def test_round_trip_single_process():
+    """
+    test the messages received in order, and nothing left after them
+    """
+    ring = ShareByRing({"size": 1 << 16})
+    _produce(ring, 0, 10, 16)
+    _recv_all(ring, 10)
+    assert ring.recv_bytes(block=False) == (None, None)
+    ring.close()
+
+
+def test_cross_process_with_wrap_around():
+    """
+    test a forked producer filling a small ring many laps over
+    """
+    ring = ShareByRing({"size": 8192})
+    proc = _fork_producer(ring, 0, 500, size=100)
+    _recv_all(ring, 500, size=100)
+    proc.join()
+    assert proc.exitcode == 0
+    ring.close()
+
+
+def test_producer_restart():
+    """
+    test a second producer forked on the same ring continues the records
+    """
+    ring = ShareByRing({"size": 8192, "send_timeout": 10})
+    first = _fork_producer(ring, 0, 30, size=100)
+    _recv_all(ring, 30, size=100)
+    first.join()
+
+    second = _fork_producer(ring, 30, 3)
+    for index in range(30, 33):
+        ctr_info, data = _recv(ring)
+        assert ctr_info["index"] == index
+    second.join()
+    assert second.exitcode == 0
+    assert ring.recv_bytes(block=False) == (None, None)
+    ring.close()
@@ -0,0 +1,35 @@
+from zeus.common.util.logger import StatsRecorder
+from zeus.common.util.profile_stats import PredictStats
+
+
+class _Board(object):
+    def __init__(self):
+        self.records = list()
+
+    def insert_records(self, records):
+        self.records.extend(records)
+
+    def close(self):
+        pass
+
+
+def test_predictor_batch_hist_recorded(tmp_path):
+    """
+    test the batch histogram of predictor summarized into the recorder output
+    """
+    tmp_path.joinpath("benchmark").mkdir()
+    board = _Board()
+    recorder = StatsRecorder(None, dict(), str(tmp_path), bm_board=board, show_interval=0)
+
+    for batch_sizes in ([1, 8, 8, 8], [8, 8, 16, 16]):
+        stats = PredictStats()
+        for batch_size in batch_sizes:
+            stats.add_batch(batch_size, 0.001, 0.002)
+        recorder.process_stats({"ctr_info": {"cmd": "stats_msg" + recorder.name},
+                                "data": stats.get()})
+    assert len(recorder.explore_stats["predictor_batch_hist"]) == 2
+
+    recorder.process_stats({"step": 100, "train_count": 1})
+    records = {key: val for key, val, _step in board.records}
+    assert records["predictor/predictor_batch_p50"] == 8
+    assert records["predictor/predictor_batch_p90"] == 16
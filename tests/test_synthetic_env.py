@@ -0,0 +1,16 @@
+import numpy as np
+
+from xt.environment.synthetic.synthetic_env import SyntheticEnv
+
+
+def test_synthetic_env_episode():
+    """
+    test the observation shape and the episode length of the synthetic env
+    """
+    env = SyntheticEnv({"obs_shape": [84, 84, 4], "obs_dtype": "uint8", "episode_len": 5})
+    assert env.get_env_info()["action_type"] == "Categorical"
+
+    state = env.reset()
+    assert state.shape == (84, 84, 4) and state.dtype == np.uint8
+    dones = [env.step(0)[2] for _ in range(5)]
+    assert dones == [False] * 4 + [True]
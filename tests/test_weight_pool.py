@@ -0,0 +1,67 @@
+import pickle
+import threading
+
+import numpy as np
+
+from zeus.common.ipc.weight_pool import ShmWeightPool
+
+
+def test_exploit_copy_between_slots():
+    """
+    test the weights published by one member, copied into the other slot
+    """
+    meta = dict()
+    top_pool = ShmWeightPool(meta)
+    bottom_pool = pickle.loads(pickle.dumps(top_pool))
+    bottom_pool.meta = meta  # shared by the manager dict within train
+
+    top_pool.publish("top", {"w": np.zeros(4, np.float32), "b": np.arange(3)})
+    assert bottom_pool.copy("top", "bottom") == 2
+
+    # layout changed, the slot re-created
+    assert top_pool.publish("top", {"w": np.full(4, 7.0, np.float32)}) == 2
+    assert meta["top"]["shm"].endswith("_1")
+    assert bottom_pool.copy("top", "bottom") == 2
+
+    weights = bottom_pool.read("bottom")
+    assert list(weights) == ["w"]
+    assert np.all(weights["w"] == 7.0)
+    assert bottom_pool.version("bottom") == 2
+    del weights
+    bottom_pool.close()
+    top_pool.close()
+
+
+def test_concurrent_publish_and_copy():
+    """
+    test the copies between the publishes with layout changed, by threads sharing one pool
+    """
+    pool = ShmWeightPool(dict())
+    pool.publish("top", {"w": np.zeros(1 << 18, np.float32)})
+    errors = list()
+
+    def _publish():
+        try:
+            for step in range(200):
+                # the layout changes every step, the slot re-created
+                pool.publish("top", {"w": np.full((1 << 18) + step % 2, step, np.float32)})
+        except Exception as err:  # pylint: disable=broad-except
+            errors.append(err)
+
+    def _copy():
+        try:
+            for _ in range(200):
+                pool.copy("top", "bottom")
+                weights = pool.read("bottom")["w"]
+                assert np.all(weights == weights[0]), "torn copy"
+                del weights
+        except Exception as err:  # pylint: disable=broad-except
+            errors.append(err)
+
+    threads = [threading.Thread(target=_publish), threading.Thread(target=_copy)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pool.close()
+    assert not errors, errors
@@ -0,0 +1,110 @@
+import numpy as np
+
+from xt.framework.weights_codec import WeightsEncoder, WeightsDecoder
+
+BROADCAST = {"broker_id": -1, "explorer_id": -1}
+
+
+def _weights(step):
+    """Weights of the train step, only a few rows of w change each step."""
+    w = np.random.RandomState(0).randn(64, 8).astype(np.float32)
+    w[:step] += np.float32(0.1 * step)
+    return {"w": w, "b": np.full(8, step, np.float32)}
+
+
+def _encode_one(encoder, weights, ctr=BROADCAST):
+    (data, _ctr), = encoder.encode(weights, [ctr])
+    return data
+
+
+def test_round_trip_with_ack():
+    """
+    test the full snapshot first, then the deltas decoded as the canonical weights
+    """
+    encoder = WeightsEncoder(mode="delta", full_interval=0)
+    encoder.register([0], [0, 1])
+    decoders = [WeightsDecoder(), WeightsDecoder()]
+
+    data = _encode_one(encoder, _weights(1))
+    assert data["weights_encoding"] == "full"
+    for explorer_id, decoder in enumerate(decoders):
+        decoder.decode(data)
+        encoder.ack(0, explorer_id, decoder.version)
+
+    for step in range(2, 5):
+        data = _encode_one(encoder, _weights(step))
+        assert data["weights_encoding"] == "delta"
+        for explorer_id, decoder in enumerate(decoders):
+            weights = decoder.decode(data)
+            encoder.ack(0, explorer_id, decoder.version)
+            for name, value in _weights(step).items():
+                assert np.allclose(weights[name], value, atol=1e-5)
+    assert decoders[0].version == decoders[1].version == 4
+
+
+def test_unacked_explorer_gets_full():
+    """
+    test a broadcast kept full while any registered explorer never acked
+    """
+    encoder = WeightsEncoder(mode="delta", full_interval=0)
+    encoder.register([0, 1], [0])
+    decoder = WeightsDecoder()
+    decoder.decode(_encode_one(encoder, _weights(1)))
+    encoder.ack(0, 0, decoder.version)
+
+    # broker 1 holds nothing yet
+    assert _encode_one(encoder, _weights(2))["weights_encoding"] == "full"
+    # the acked one alone could take the delta
+    data = _encode_one(encoder, _weights(3), {"broker_id": 0, "explorer_id": 0})
+    assert data["weights_encoding"] == "delta"
+
+    encoder.ack(1, 0, 3)
+    assert _encode_one(encoder, _weights(4))["weights_encoding"] == "delta"
+
+
+def test_stale_base():
+    """
+    test the full snapshot beyond max_delta_steps, and the delta skipped by a stale decoder
+    """
+    encoder = WeightsEncoder(mode="delta", max_delta_steps=2, full_interval=0)
+    encoder.register([0], [0])
+    full = _encode_one(encoder, _weights(1))
+    encoder.ack(0, 0, 1)
+
+    stale = WeightsDecoder()
+    stale.decode(full)
+    stale.decode(_encode_one(encoder, _weights(2)))
+    assert stale.version == 2
+    for step in range(3, 5):
+        _encode_one(encoder, _weights(step))
+    # acked version 1, its increments have been dropped
+    assert _encode_one(encoder, _weights(5))["weights_encoding"] == "full"
+
+    encoder.ack(0, 0, 5)
+    delta = _encode_one(encoder, _weights(6))
+    assert delta["weights_encoding"] == "delta" and delta["base"] == 5
+    # version 2 is older than the base, wait a full snapshot
+    assert stale.decode(delta) is None
+    assert stale.version == 2
+
+
+def test_quantized_delta():
+    """
+    test the int8 delta decoded equal to the canonical chain, and near the weights
+    """
+    encoder = WeightsEncoder(mode="delta", quantize="int8", full_interval=0)
+    encoder.register([0], [0])
+    decoder = WeightsDecoder()
+    decoder.decode(_encode_one(encoder, _weights(1)))
+    encoder.ack(0, 0, decoder.version)
+
+    for step in range(2, 6):
+        data = _encode_one(encoder, _weights(step))
+        assert data["weights_encoding"] == "delta"
+        assert all(_encoded[-2].dtype == np.int8 for _encoded in data["increments"][-1].values())
+        weights = decoder.decode(data)
+        encoder.ack(0, 0, decoder.version)
+
+    for name, value in _weights(5).items():
+        assert np.array_equal(weights[name], encoder._canonical[name])
+        assert np.max(np.abs(weights[name] - value)) < 0.05
@@ -0,0 +1,133 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Advantage and return estimation shared by the on-policy agents.
+
+The backward recursions `y[t] = x[t] + c[t] * y[t + 1]` are evaluated as a
+blocked scan: inside a block of `block_size` steps the recursion is a
+triangular matrix product, and the carries between blocks are the same
+recursion over the block heads, solved one level up. A rollout of T steps
+costs about log(T) / log(block_size) levels of NumPy calls instead of T
+Python iterations.
+Episode boundaries are handled through `done`, which zeroes the discount.
+"""
+
+import numpy as np
+
+DEFAULT_BLOCK_SIZE = 16
+
+
+def _step_discount(discount, length, dtype):
+    """Broadcast a scalar or per-step discount to shape (length, )."""
+    discount = np.asarray(discount, dtype=dtype)
+    if discount.ndim == 0:
+        return np.full(length, discount, dtype=dtype)
+    return discount.reshape(length)
+
+
+def discount_cumsum(x, discount, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Reverse discounted cumulative sum along the first axis.
+
+    :param x: array with shape (T, ...)
+    :param discount: scalar or per-step discount with T elements,
+        `y[t] = x[t] + discount[t] * y[t + 1]`
+    :param block_size: steps solved together in one matrix product
+    :return: array with the same shape as `x`
+    """
+    x = np.asarray(x)
+    dtype = np.result_type(x, np.asarray(discount), np.float32)
+    length = x.shape[0]
+    if length == 0:
+        return np.zeros(x.shape, dtype=dtype)
+
+    disc = _step_discount(discount, length, dtype)
+    block = min(block_size, length)
+    n_block = -(-length // block)
+    pad = n_block * block - length
+
+    flat = x.reshape(length, -1).astype(dtype, copy=False)
+    flat = np.pad(flat, ((0, pad), (0, 0)))
+    disc = np.pad(disc, (0, pad))
+
+    # decay[b, j, k] = prod(disc[j:k]) inside block b, for k >= j.
+    upper = np.triu(np.ones((block, block), dtype=bool))
+    factors = np.where(upper, disc.reshape(n_block, 1, block), 1.0)
+    cum = np.cumprod(factors, axis=-1)
+    decay = np.concatenate((np.ones((n_block, block, 1), dtype=dtype), cum[..., :-1]), axis=-1)
+    decay = np.where(upper, decay, 0.0)
+
+    out = np.matmul(decay, flat.reshape(n_block, block, -1))
+    if n_block > 1:
+        # the block heads follow the same recursion, one level up.
+        tail = cum[..., -1]
+        heads = discount_cumsum(out[:, 0], tail[:, 0], block_size)
+        out[:-1] += tail[:-1, :, None] * heads[1:, None]
+
+    return out.reshape((-1, ) + x.shape[1:])[:length]
+
+
+def gae_advantage(rewards, values, next_values, dones, gamma, lam, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Generalized advantage estimation over one rollout.
+
+    :param rewards: rewards with shape (T, ...)
+    :param values: value estimates of the visited states, shape (T, ...)
+    :param next_values: value estimates of the next states, shape (T, ...)
+    :param dones: episode end flags with T elements
+    :param gamma: discount factor
+    :param lam: GAE lambda
+    :return: advantages, with the shape of `values`
+    """
+    discount = ~np.asarray(dones, dtype=bool).reshape(-1) * gamma
+    deltas = rewards + discount.reshape((-1, ) + (1, ) * (np.ndim(values) - 1)) * next_values - values
+    return discount_cumsum(deltas, discount * lam, block_size)
+
+
+def n_step_returns(rewards, values, dones, gamma, n_step):
+    """
+    Bootstrapped n-step returns over one rollout.
+
+    `G[t] = r[t] + ... + gamma^(m-1) * r[t+m-1] + gamma^m * values[t+m]`
+    with `m = min(n_step, T - t)`, truncated at the first episode end.
+
+    :param rewards: rewards with T elements
+    :param values: value estimates with T + 1 elements, the last one
+        being the bootstrap value after the rollout
+    :param dones: episode end flags with T elements
+    :param gamma: discount factor
+    :param n_step: horizon of the returns
+    :return: returns with shape (T, )
+    """
+    rewards = np.asarray(rewards, dtype=np.float64).reshape(-1)
+    values = np.asarray(values, dtype=np.float64).reshape(-1)
+    dones = np.asarray(dones, dtype=bool).reshape(-1)
+    length = rewards.shape[0]
+
+    discount = ~dones * gamma
+    full_returns = np.append(discount_cumsum(rewards, discount), 0.0)
+
+    start = np.arange(length)
+    end = np.minimum(start + n_step, length)
+    done_count = np.concatenate(([0], np.cumsum(dones)))
+    alive = done_count[end] == done_count[start]
+    scale = np.where(alive, gamma ** (end - start), 0.0)
+
+    return full_returns[start] - scale * full_returns[end] + scale * values[end]
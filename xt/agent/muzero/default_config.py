@@ -3,6 +3,7 @@
 PB_C_BASE = 19652
 PB_C_INIT = 1.25
 NUM_SIMULATIONS = 50
+MCTS_LEAVES_PER_TREE = 4
 ROOT_DIRICHLET_ALPHA = 0.25
 ROOT_EXPLORATION_FRACTION = 0.25
 GAMMA = 0.997
@@ -1,7 +1,6 @@
 """MCTS module: where MuZero thinks inside the tree."""
 
-import math
-import random
+from time import time
 
 import numpy as np
 
@@ -10,17 +9,27 @@ from xt.agent.muzero.default_config import ROOT_DIRICHLET_ALPHA
 from xt.agent.muzero.default_config import ROOT_EXPLORATION_FRACTION
 from xt.agent.muzero.default_config import GAMMA
 
-from xt.agent.muzero.util import MinMaxStats, Node, soft_max_sample
-from xt.model.muzero.muzero_model import NetworkOutput
+from xt.agent.muzero.util import soft_max_sample
 
 
-class Mcts(object):
-    """MCTS operation."""
-    def __init__(self, agent, root_state):
+class BatchMcts(object):
+    """
+    Array-backed MCTS running several trees in lockstep.
+
+    Node statistics live in preallocated arrays indexed by (tree, node id),
+    node 0 being the root of each tree. Every simulation step descends all
+    trees together and evaluates the new leaves with a single batched
+    `recurrent_inference_batch` call. With `leaves_per_tree` > 1, each tree
+    collects several leaves per step, separated by a visit-count virtual loss;
+    leaves claimed in the same step are skipped, and a descent left with no
+    other choice is dropped, without spending the simulation budget.
+    """
+
+    def __init__(self, agent, root_states, leaves_per_tree=1):
         self.network = agent.alg.actor
         self.action_dim = agent.alg.action_dim
         self.num_simulations = agent.num_simulations
-        self.min_max_stats = MinMaxStats(None)
+        self.leaves_per_tree = max(1, int(leaves_per_tree))
         self.discount = GAMMA
         self.actions = range(self.action_dim)
         self.pb_c_base = PB_C_BASE
@@ -28,105 +37,198 @@ class Mcts(object):
         self.root_dirichlet_alpha = ROOT_DIRICHLET_ALPHA
         self.root_exploration_fraction = ROOT_EXPLORATION_FRACTION
 
-        self.root = Node(0)
-
-        root_state = root_state.reshape((1, ) + root_state.shape)
-        network_output = self.network.initial_inference(root_state)
-
-        self.init_node(self.root, network_output)
-
-    def init_node(self, node, network_output):
-        node.hidden_state = network_output.hidden_state
-        node.reward = network_output.reward
-
-        policy = [p for p in network_output.policy]
-
-        for action in self.actions:
-            node.children[action] = Node(policy[action])
-
-    def backpropagate(self, search_path, value):
-        """Propagate the evaluation all the way up the tree to the root at the end of a simulation."""
-        for node in search_path[::-1]:
-            node.value_sum += value
-            node.visit_count += 1
-            self.min_max_stats.update(node.value())
+        self.num_trees = root_states.shape[0]
+        self.capacity = self.num_simulations + 1
+        shape = (self.num_trees, self.capacity)
+        self.visit_count = np.zeros(shape, dtype=np.int64)
+        self.value_sum = np.zeros(shape, dtype=np.float64)
+        self.reward = np.zeros(shape, dtype=np.float64)
+        self.expanded = np.zeros(shape, dtype=bool)
+        self.prior = np.zeros(shape + (self.action_dim, ), dtype=np.float64)
+        self.children = np.full(shape + (self.action_dim, ), -1, dtype=np.int64)
+        self.num_nodes = np.ones(self.num_trees, dtype=np.int64)
+        self.minimum = np.full(self.num_trees, np.inf)
+        self.maximum = np.full(self.num_trees, -np.inf)
+
+        self.num_searched = 0
+        self.search_time = 0.0
+
+        network_output = self.network.initial_inference_batch(root_states)
+        hidden = np.asarray(network_output.hidden_state)
+        self.hidden_state = np.zeros(shape + hidden.shape[1:], dtype=hidden.dtype)
+
+        roots = np.zeros(self.num_trees, dtype=np.int64)
+        self.init_nodes(np.arange(self.num_trees), roots, network_output)
+
+    def init_nodes(self, trees, nodes, network_output):
+        self.hidden_state[trees, nodes] = network_output.hidden_state
+        self.reward[trees, nodes] = network_output.reward
+        self.prior[trees, nodes] = network_output.policy
+        self.expanded[trees, nodes] = True
+
+    def node_value(self, trees, nodes):
+        """Mean value of the nodes, 0 for nodes never visited."""
+        visits = self.visit_count[trees, nodes]
+        return np.where(visits > 0, self.value_sum[trees, nodes] / np.maximum(visits, 1), 0.0)
+
+    def normalize(self, trees, value):
+        low, high = self.minimum[trees], self.maximum[trees]
+        known = high > low
+        return np.where(known, (value - low) / np.where(known, high - low, 1.0), value)
+
+    def ucb_score(self, trees, nodes):
+        """UCB score of every child of the given nodes, shape (len(trees), action_dim)."""
+        parent_visits = self.visit_count[trees, nodes][:, None]
+        children = self.children[trees, nodes]
+        has_child = children >= 0
+        tree_index = np.broadcast_to(trees[:, None], children.shape)
+        child_ids = np.where(has_child, children, 0)
+        child_visits = np.where(has_child, self.visit_count[tree_index, child_ids], 0)
+
+        pb_c = np.log((parent_visits + self.pb_c_base + 1) / self.pb_c_base) + self.pb_c_init
+        pb_c = pb_c * np.sqrt(parent_visits) / (child_visits + 1)
+        prior_score = pb_c * self.prior[trees, nodes]
+
+        child_value = self.node_value(tree_index, child_ids)
+        value_score = np.where(child_visits > 0, self.normalize(trees[:, None], child_value), 0.0)
+        # leaves claimed in the current step but not evaluated yet are not selectable.
+        pending = has_child & ~self.expanded[tree_index, child_ids]
+        return np.where(pending, -np.inf, prior_score + value_score)
+
+    def select_leaves(self, active):
+        """
+        Descend the active trees once from their roots.
 
-            value = node.reward + self.discount * value
+        Return the search paths (one row per tree, -1 padded), the parent and
+        action leading to each new leaf, and the mask of trees whose descent
+        produced a fresh leaf.
+        """
+        trees = np.arange(self.num_trees)
+        nodes = np.zeros(self.num_trees, dtype=np.int64)
+        parents = np.zeros(self.num_trees, dtype=np.int64)
+        actions = np.zeros(self.num_trees, dtype=np.int64)
+        valid = active.copy()
+        active = active.copy()
+        path = [nodes.copy()]
+
+        while active.any():
+            act_trees = trees[active]
+            act_nodes = nodes[active]
+            scores = self.ucb_score(act_trees, act_nodes)
+            # tie break on the highest action, like max() over (score, action) tuples.
+            action = self.action_dim - 1 - np.argmax(scores[:, ::-1], axis=1)
+            child = self.children[act_trees, act_nodes, action]
+
+            new_leaf = child < 0
+            if new_leaf.any():
+                leaf_trees = act_trees[new_leaf]
+                child[new_leaf] = self.num_nodes[leaf_trees]
+                self.num_nodes[leaf_trees] += 1
+                self.children[act_trees[new_leaf], act_nodes[new_leaf], action[new_leaf]] = child[new_leaf]
+            # leaf claimed by an earlier descent of this step, and not evaluated yet.
+            pending = ~new_leaf & ~self.expanded[act_trees, child]
+
+            parents[act_trees] = act_nodes
+            actions[act_trees] = action
+            nodes[act_trees] = child
+            valid[act_trees[pending]] = False
+
+            step = np.full(self.num_trees, -1, dtype=np.int64)
+            step[act_trees] = child
+            path.append(step)
+            active[act_trees[new_leaf | pending]] = False
+
+        path = np.stack(path, axis=1)
+        return path, parents, actions, valid
+
+    def backpropagate(self, trees, paths, value):
+        """Propagate the leaf values up every search path, deepest level first."""
+        for depth in range(paths.shape[1] - 1, -1, -1):
+            nodes = paths[:, depth]
+            on_path = nodes >= 0
+            if not on_path.any():
+                continue
+            _trees, _nodes = trees[on_path], nodes[on_path]
+            np.add.at(self.value_sum, (_trees, _nodes), value[on_path])
+
+            node_value = self.value_sum[_trees, _nodes] / self.visit_count[_trees, _nodes]
+            np.minimum.at(self.minimum, _trees, node_value)
+            np.maximum.at(self.maximum, _trees, node_value)
+
+            value = np.where(on_path, self.reward[trees, np.maximum(nodes, 0)] + self.discount * value, value)
 
     def run_mcts(self):
         """
-        Run Core Monte Carlo Tree Search algorithm.
+        Run the simulations of all trees in lockstep.
 
-        To decide on an action, we run N simulations, always starting at the root of
-        the search tree and traversing the tree according to the UCB formula until we
-        reach a leaf node.
+        Each step selects up to `leaves_per_tree` leaves per tree, then expands
+        all of them with one batched recurrent inference. The first descent of
+        a step always finds a fresh leaf, so every step makes progress.
         """
-        for _ in range(self.num_simulations):
-            node = self.root
-            search_path = [node]
-            history = []
-
-            while node.expanded():
-                action, node = self.select_child(node)
-                search_path.append(node)
-                history.append(action)
-            # Inside the search tree we use the dynamics function to obtain the next
-            # hidden state given an action and the previous hidden state.
-            parent = search_path[-2]
-            network_output = self.network.recurrent_inference(parent.hidden_state, history[-1])
-            self.init_node(node, network_output)
-
-            self.backpropagate(search_path, network_output.value)
+        start = time()
+        remain = np.full(self.num_trees, self.num_simulations, dtype=np.int64)
+        while remain.any():
+            step_trees, step_paths, step_parents, step_actions = [], [], [], []
+            for _ in range(self.leaves_per_tree):
+                path, parents, actions, valid = self.select_leaves(remain > 0)
+                if not valid.any():
+                    # nothing changed since, the next descents would be dropped too
+                    break
+                trees = np.flatnonzero(valid)
+                remain[trees] -= 1
+                path = path[valid]
+                # virtual loss: count the visit now, so the next descent of this step diverges.
+                for depth in range(path.shape[1]):
+                    on_path = path[:, depth] >= 0
+                    self.visit_count[trees[on_path], path[on_path, depth]] += 1
+
+                step_trees.append(trees)
+                step_paths.append(path)
+                step_parents.append(parents[valid])
+                step_actions.append(actions[valid])
+
+            depth = max(path.shape[1] for path in step_paths)
+            paths = np.concatenate(
+                [np.pad(path, ((0, 0), (0, depth - path.shape[1])), constant_values=-1)
+                 for path in step_paths])
+            trees = np.concatenate(step_trees)
+            parents = np.concatenate(step_parents)
+            actions = np.concatenate(step_actions)
+            leaves = paths[np.arange(len(paths)), (paths >= 0).sum(axis=1) - 1]
+
+            network_output = self.network.recurrent_inference_batch(
+                self.hidden_state[trees, parents], actions)
+            self.init_nodes(trees, leaves, network_output)
+            self.backpropagate(trees, paths, np.asarray(network_output.value, dtype=np.float64))
+            self.num_searched += len(trees)
+
+        self.search_time += time() - start
+
+    def root_child_visits(self):
+        children = self.children[:, 0]
+        tree_index = np.broadcast_to(np.arange(self.num_trees)[:, None], children.shape)
+        return np.where(children >= 0, self.visit_count[tree_index, np.maximum(children, 0)], 0)
 
     def select_action(self, mode='softmax'):
-        """
-        Select action.
-
-        After running simulations inside in MCTS, we select an action based on the root's children visit counts.
-        During training we use a softmax sample for exploration.
-        During evaluation we select the most visited child.
-        """
-        node = self.root
-        visit_counts = [child.visit_count for child in node.children.values()]
-        actions = self.actions
-        action = None
+        """Select one action per tree from the root visit counts."""
+        visit_counts = self.root_child_visits()
         if mode == 'softmax':
-            action = soft_max_sample(visit_counts, actions, 1)
-        elif mode == 'max':
-            action = np.argmax(visit_counts)
-        return action
-
-    def ucb_score(self, parent, child):
-        """
-        Calculate UCB score.
+            return np.asarray([soft_max_sample(counts, self.actions, 1) for counts in visit_counts])
+        return np.argmax(visit_counts, axis=1)
 
-        The score for a node is based on its value, plus an exploration bonus based on the prior.
-        """
-        pb_c = math.log((parent.visit_count + self.pb_c_base + 1) / self.pb_c_base) + self.pb_c_init
-        pb_c *= math.sqrt(parent.visit_count) / (child.visit_count + 1)
-
-        prior_score = pb_c * child.prior
-        if child.visit_count > 0:
-            value_score = self.min_max_stats.normalize(child.value())
-        else:
-            value_score = 0
-        return prior_score + value_score
-
-    def add_exploration_noise(self, node):
-        actions = self.actions
-        noise = np.random.dirichlet([self.root_dirichlet_alpha] * self.action_dim)
+    def add_exploration_noise(self):
+        """Mix Dirichlet noise into the root priors of every tree."""
+        noise = np.random.dirichlet([self.root_dirichlet_alpha] * self.action_dim, size=self.num_trees)
         frac = self.root_exploration_fraction
-        for i, _noise in zip(actions, noise):
-            node.children[i].prior = node.children[i].prior * (1 - frac) + _noise * frac
+        self.prior[:, 0] = self.prior[:, 0] * (1 - frac) + noise * frac
 
     def get_info(self):
-        """Get train info from mcts tree."""
-        child_visits = [self.root.children[a].visit_count for a in self.actions]
-        sum_visits = sum(child_visits)
-        child_visits = [visits / sum_visits for visits in child_visits]
-        return {"child_visits": child_visits, "root_value": self.root.value()}
-
-    def select_child(self, node):
-        """Select the child with the highest UCB score."""
-        _, action, child = max((self.ucb_score(node, child), action, child) for action, child in node.children.items())
-        return action, child
+        """Get train info of every tree."""
+        visit_counts = self.root_child_visits()
+        child_visits = visit_counts / visit_counts.sum(axis=1, keepdims=True)
+        root_value = self.node_value(np.arange(self.num_trees), np.zeros(self.num_trees, dtype=np.int64))
+        return [{"child_visits": list(visits), "root_value": value}
+                for visits, value in zip(child_visits, root_value)]
+
+    def sims_per_sec(self):
+        return self.num_searched / self.search_time if self.search_time > 0 else 0.0
@@ -22,8 +22,8 @@
 import numpy as np
 
 from xt.agent.agent import Agent
-from xt.agent.muzero.default_config import NUM_SIMULATIONS, GAMMA, TD_STEP
-from xt.agent.muzero.mcts import Mcts
+from xt.agent.muzero.default_config import NUM_SIMULATIONS, GAMMA, TD_STEP, MCTS_LEAVES_PER_TREE
+from xt.agent.muzero.mcts import BatchMcts
 from zeus.common.util.register import Registers
 from zeus.common.util.common import import_config
 
@@ -36,6 +36,20 @@ class Muzero(Agent):
         import_config(globals(), agent_config)
         super().__init__(env, alg, agent_config, **kwargs)
         self.num_simulations = NUM_SIMULATIONS
+        self.leaves_per_tree = MCTS_LEAVES_PER_TREE
+        self._mcts_sims = 0
+        self._mcts_time = 0.0
+
+    def run_search(self, state, use_explore):
+        """Run the batched MCTS on a single root and record its throughput."""
+        mcts = BatchMcts(self, np.expand_dims(state, 0), self.leaves_per_tree)
+        if use_explore:
+            mcts.add_exploration_noise()
+
+        mcts.run_mcts()
+        self._mcts_sims += mcts.num_searched
+        self._mcts_time += mcts.search_time
+        return mcts
 
     def infer_action(self, state, use_explore):
         """
@@ -44,15 +58,11 @@ class Muzero(Agent):
         We then run a Monte Carlo Tree Search using only action sequences and the
         model learned by the networks.
         """
-        mcts = Mcts(self, state)
-        if use_explore:
-            mcts.add_exploration_noise(mcts.root)
-
-        mcts.run_mcts()
-        action = mcts.select_action()
+        mcts = self.run_search(state, use_explore)
+        action = mcts.select_action()[0]
 
         self.transition_data.update({"cur_state": state, "action": action})
-        self.transition_data.update(mcts.get_info())
+        self.transition_data.update(mcts.get_info()[0])
 
         return action
 
@@ -67,6 +77,14 @@ class Muzero(Agent):
 
         return self.transition_data
 
+    def get_perf_stats(self):
+        _stats_info = super().get_perf_stats()
+        if self._mcts_time > 0:
+            _stats_info.update({"mean_mcts_sims_per_sec": self._mcts_sims / self._mcts_time})
+        self._mcts_sims = 0
+        self._mcts_time = 0.0
+        return _stats_info
+
     def get_trajectory(self):
         self.data_proc()
         return super().get_trajectory()
@@ -19,7 +19,6 @@
 # THE SOFTWARE.
 import numpy as np
 from xt.agent.muzero.muzero import Muzero
-from xt.agent.muzero.mcts import Mcts
 from xt.agent.muzero.default_config import NUM_SIMULATIONS, GAMMA, TD_STEP
 from zeus.common.util.register import Registers
 
@@ -19,7 +19,6 @@
 # THE SOFTWARE.
 import numpy as np
 from xt.agent.muzero.muzero import Muzero
-from xt.agent.muzero.mcts import Mcts
 from xt.agent.muzero.default_config import NUM_SIMULATIONS
 from zeus.common.util.register import Registers
 
@@ -42,19 +41,15 @@ class MuzeroAtariFull(Muzero):
         # print("all shape", state.shape, action_plane.shape)
         state = np.concatenate((state, action_plane), axis=-1)
 
-        mcts = Mcts(self, state)
-        if use_explore:
-            mcts.add_exploration_noise(mcts.root)
-
-        mcts.run_mcts()
-        action = mcts.select_action()
+        mcts = self.run_search(state, use_explore)
+        action = mcts.select_action()[0]
 
         action_plane = np.full((96, 96, 1), action * 14, dtype='uint8')
         self.history_acton = np.roll(self.history_acton, shift=-1, axis=-1)
         self.history_acton[..., -action_plane.shape[-1]:] = action_plane
 
         self.transition_data.update({"cur_state": state, "action": action})
-        self.transition_data.update(mcts.get_info())
+        self.transition_data.update(mcts.get_info()[0])
 
         return action
 
@@ -22,6 +22,7 @@
 import numpy as np
 
 from xt.agent import Agent
+from xt.agent.advantage import gae_advantage
 from xt.agent.ppo.default_config import GAMMA, LAM
 from zeus.common.util.register import Registers
 
@@ -100,11 +101,7 @@ class CartpolePpo(Agent):
         state = np.asarray(self.trajectory["cur_state"])
         real_action = np.asarray(self.trajectory["action"])
 
-        discounts = ~dones * GAMMA
-        deltas = rewards + discounts * next_value - value
-        adv = deltas
-        for j in range(len(adv) - 2, -1, -1):
-            adv[j] += adv[j + 1] * discounts[j] * LAM
+        adv = gae_advantage(rewards, value, next_value, dones, GAMMA, LAM)
 
         self.trajectory["adv"] = adv
         self.trajectory["target_value"] = adv + value
@@ -22,6 +22,7 @@
 import numpy as np
 
 from xt.agent import Agent
+from xt.agent.advantage import gae_advantage
 from xt.agent.ppo.default_config import GAMMA, LAM
 from zeus.common.util.register import Registers
 
@@ -87,14 +88,8 @@ class PPO(Agent):
         next_value = value[1:]
         value = value[:-1]
 
-        done = np.expand_dims(done, axis=1)
         reward = np.expand_dims(reward, axis=1)
-        discount = ~done * GAMMA
-        delta_t = reward + discount * next_value - value
-        adv = delta_t
-
-        for j in range(len(adv) - 2, -1, -1):
-            adv[j] += adv[j + 1] * discount[j] * LAM
+        adv = gae_advantage(reward, value, next_value, done, GAMMA, LAM)
 
         self.trajectory['cur_state'] = state
         self.trajectory['action'] = action
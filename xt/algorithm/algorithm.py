@@ -24,6 +24,8 @@ import numpy as np
 
 from absl import logging
 from xt.model import model_builder
+from xt.model.model import XTModel
+from xt.model.tf_utils import FLAT_WEIGHTS_KEY
 from xt.algorithm.alg_utils import DefaultAlgDistPolicy
 
 AGENT_PREFIX = "agent"
@@ -134,6 +136,20 @@ class Algorithm(object):
 
         return np.argmax(out)
 
+    def predict_batch(self, states):
+        """
+        Predict actions for a list of states with one model call.
+
+        Used by the batching predictor. The default works with the default
+        `predict`, algorithms which overwrite `predict` fall back to
+        predicting the states one by one, unless they overwrite this as well.
+        """
+        if type(self).predict is not Algorithm.predict:
+            return [self.predict(state) for state in states]
+
+        out = self.actor.predict(np.stack(states))
+        return list(np.argmax(out, axis=-1))
+
     def train_ready(self, elapsed_episode, **kwargs):
         """
         Support custom train logic.
@@ -193,6 +209,31 @@ class Algorithm(object):
             os.path.join(model_path, "actor_{}".format(str(model_index).zfill(ZFILL_LENGTH))))
         return [model_name]
 
+    def save_snapshot(self, model_path, model_index):
+        """
+        Snapshot the actor weights for the asynchronous checkpoint writer.
+
+        Only support the default `save` with the `TFVariables` actor, whose
+        checkpoint is the npz of the weights dict.
+        :param model_path: model save path
+        :param model_index: the index will been zfill with 5.
+        :return: (file name, weights dict) same as `save` would write,
+            None if the algorithm must save by itself.
+        """
+        actor_var = getattr(self.actor, "actor_var", None)
+        if type(self).save is not Algorithm.save or actor_var is None:
+            return None
+        if type(self.actor).save_model is not XTModel.save_model or \
+                getattr(self.actor, "model_format", None) == "pb":
+            return None
+
+        weights = self.actor.get_weights()
+        if FLAT_WEIGHTS_KEY in weights:  # keep the checkpoint format per variable
+            weights = actor_var.unpack_flat(weights[FLAT_WEIGHTS_KEY])
+        file_name = os.path.join(
+            model_path, "actor_{}".format(str(model_index).zfill(ZFILL_LENGTH)))
+        return file_name + ".npz", weights
+
     def restore(self, model_name=None, model_weights=None):
         """
         Restore the model with the priority: model_weight > model_name.
@@ -24,7 +24,7 @@ import numpy as np
 
 from xt.algorithm import Algorithm
 from xt.algorithm.dqn.default_config import BUFFER_SIZE, GAMMA, TARGET_UPDATE_FREQ, BATCH_SIZE
-from xt.algorithm.replay_buffer import ReplayBuffer
+from xt.algorithm.replay_buffer import ArrayReplayBuffer
 from zeus.common.util.register import Registers
 from xt.model import model_builder
 from zeus.common.util.common import import_config
@@ -55,7 +55,7 @@ class DQN(Algorithm):
         )
 
         self.target_actor = model_builder(model_info)
-        self.buff = ReplayBuffer(BUFFER_SIZE)
+        self.buff = ArrayReplayBuffer(BUFFER_SIZE)
         self.double_dqn = alg_config.get('double_dqn', False)
 
     def train(self, **kwargs):
@@ -63,36 +63,29 @@ class DQN(Algorithm):
         Train process for DQN algorithm.
 
         1. predict the newest state with actor & target actor;
-        2. calculate TD error;
+        2. calculate TD target of the whole batch, masked with done;
         3. train operation;
         4. update target actor if need.
         :return: loss of this train step.
         """
         batch_size = BATCH_SIZE
 
-        batch = self.buff.get_batch(batch_size)
-        states = np.asarray([e[0] for e in batch])
-        actions = np.asarray([e[1] for e in batch])
-        rewards = np.asarray([e[2] for e in batch])
-        new_states = np.asarray([e[3] for e in batch])
-        dones = np.asarray([e[4] for e in batch])
+        states, actions, rewards, new_states, dones = self.buff.get_batch(batch_size)
+        batch_index = np.arange(len(dones))
         if self.double_dqn:
-            y_t = self.actor.predict(states)
-            q_values = self.actor.predict(new_states)
-            best_action = np.argmax(q_values, 1)
+            # states and new states share one forward pass of actor
+            q_values = self.actor.predict(np.concatenate((states, new_states)))
+            y_t, next_q_values = q_values[:len(dones)], q_values[len(dones):]
+            best_action = np.argmax(next_q_values, 1)
             target_q_values = self.target_actor.predict(new_states)
-            max_q_val = target_q_values[range(len(batch)), best_action]
+            max_q_val = target_q_values[batch_index, best_action]
         else:
             y_t = self.actor.predict(states)
             target_q_values = self.target_actor.predict(new_states)
             max_q_val = np.max(target_q_values, 1)
 
-        for k in range(len(batch)):
-            if dones[k]:
-                q_value = rewards[k]
-            else:
-                q_value = rewards[k] + GAMMA * max_q_val[k]
-            y_t[k][actions[k]] = q_value
+        not_done = 1.0 - np.asarray(dones, dtype=np.float32)
+        y_t[batch_index, actions] = rewards + GAMMA * max_q_val * not_done
 
         loss = self.actor.train(states, y_t)
 
@@ -122,21 +115,15 @@ class DQN(Algorithm):
         """
         Prepare the train data for DQN.
 
-        here, just add once new data into replay buffer.
+        here, just add the whole new data into replay buffer.
+        Transitions from the same agent are chained, so that
+        their shared frames could be stored only once.
         :param train_data:
         :return:
         """
-        buff = self.buff
-        data_len = len(train_data["done"])
-        for index in range(data_len):
-            data = (
-                train_data["cur_state"][index],
-                train_data["action"][index],
-                train_data["reward"][index],
-                train_data["next_state"][index],
-                train_data["done"][index],
-            )
-            buff.add(data)  # Add replay buffer
+        ctr_info = kwargs.get("ctr_info") or dict()
+        stream = (ctr_info.get("broker_id"), ctr_info.get("explorer_id"), ctr_info.get("agent_id"))
+        self.buff.add(train_data, stream=stream)
 
     def update_target(self):
         """
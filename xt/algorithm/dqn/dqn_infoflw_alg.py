@@ -96,7 +96,6 @@ class DQNInfoFlowAlg(Algorithm):
         history_click = []
         history_no_click = []
         item_input = []
-        target_batch = []
 
         next_user_input = []
         next_history_click = []
@@ -150,20 +149,12 @@ class DQNInfoFlowAlg(Algorithm):
         q_values = np.array(self.actor.predict(next_q_input_batch)).reshape(-1)
         # target_q_values = self.target_model.predict_on_batch(next_q_input_batch)
 
-        new_q_values = []
-        # new_target_q_values = []
-        curr_idx = 0
-        for length in cand_length:
-            new_q_values.append(q_values[curr_idx:curr_idx + length])
-            # new_target_q_values.append(target_q_values[curr_idx : curr_idx + length])
-            curr_idx += length
-        for i in range(self.batch_size):
-            if dones[i]:
-                target_batch.append(rewards[i])
-            else:
-                max_idx = np.argmax(new_q_values[i])
-                target_batch.append(new_q_values[i][max_idx] * self.gamma + rewards[i])
-        target_batch = np.array(target_batch)
+        # max q of the candidates of each transition, within one reduce.
+        # padding, the done transition may be without candidates.
+        cand_start = np.concatenate(([0], np.cumsum(cand_length)[:-1]))
+        max_q_val = np.maximum.reduceat(np.append(q_values, -np.inf), cand_start)
+        max_q_val = np.where(np.asarray(dones, dtype=bool), 0.0, max_q_val)
+        target_batch = np.asarray(rewards, dtype=np.float32) + self.gamma * max_q_val
 
         loss = self.actor.train(q_input_batch, target_batch,
                                 batch_size=self.batch_size, verbose=False)
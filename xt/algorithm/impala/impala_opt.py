@@ -21,13 +21,15 @@
 
 import os
 import threading
+from queue import Queue
+from time import time
 
 import numpy as np
 
 from xt.algorithm import Algorithm
 from xt.algorithm.impala.default_config import BATCH_SIZE
-from zeus.common.ipc.uni_comm import UniComm
 from zeus.common.util.register import Registers
+from zeus.common.util.profile_stats import TimerRecorder
 from xt.model.tf_compat import loss_to_val
 from zeus.common.util.common import import_config
 from xt.algorithm.alg_utils import DivideDistPolicy, FIFODistPolicy, EqualDistPolicy
@@ -54,24 +56,71 @@ class IMPALAOpt(Algorithm):
             alg_config["instance_num"],
             prepare_times=self._prepare_times_per_train)
 
-        self.use_train_thread = False
+        # assemble the train batches in background, while the former one trains.
+        self.use_train_thread = alg_config.get("use_train_thread", True)
         if self.use_train_thread:
-            self.send_train = UniComm("LocalMsg")
-            train_thread = threading.Thread(target=self._train_thread)
+            # bounded, a full queue blocks prepare_data, and then the broker.
+            # hold one train round at least, the batches only free within train.
+            self._traj_q = Queue(maxsize=max(
+                alg_config.get("input_queue_size", 2 * self._prepare_times_per_train),
+                self._prepare_times_per_train))
+            self._ready_q = Queue()
+            self._free_q = Queue()
+            for _ in range(alg_config.get("batch_buffer_num", 2)):
+                self._free_q.put(None)  # buffers allocated with the first data
+
+            self._pending_rows = 0
+            self._input_metric = TimerRecorder("impala_input", maxlen=50,
+                                               fields=("assemble", "learner_idle", "train"))
+            train_thread = threading.Thread(target=self._assemble_thread)
             train_thread.setDaemon(True)
             train_thread.start()
 
-    def _train_thread(self):
+    @staticmethod
+    def _alloc_batch(data):
+        """Preallocate one fixed-shape batch like the trajectory fields."""
+        return [np.empty((BATCH_SIZE, ) + _item.shape[1:], dtype=_item.dtype) for _item in data]
+
+    def _assemble_thread(self):
+        """Copy the trajectories into fixed-shape batch buffers, in order."""
+        batch, filled, assemble_time = None, 0, 0.0
         while True:
-            data = self.send_train.recv()
-            batch_state, batch_logit, batch_action, batch_done, batch_reward = data
-            actor_loss = self.actor.train(
-                batch_state,
-                [batch_logit, batch_action, batch_done, batch_reward],
-            )
+            data = self._traj_q.get()
+            if data is None:
+                break
+
+            traj_len, offset = len(data[0]), 0
+            while offset < traj_len:
+                if batch is None:
+                    batch = self._free_q.get()
+                    if batch is None:
+                        batch = self._alloc_batch(data)
+                    filled, assemble_time = 0, 0.0
+
+                _t0 = time()
+                rows = min(BATCH_SIZE - filled, traj_len - offset)
+                for _buf, _item in zip(batch, data):
+                    _buf[filled:filled + rows] = _item[offset:offset + rows]
+                filled += rows
+                offset += rows
+                assemble_time += time() - _t0
+
+                if filled == BATCH_SIZE:
+                    self._input_metric.append(assemble=assemble_time)
+                    self._ready_q.put(batch)
+                    batch = None
+
+    def train_ready(self, elapsed_episode, **kwargs):
+        """Train only with full batches, if the input pipeline is used."""
+        if self.use_train_thread:
+            return self._pending_rows >= BATCH_SIZE
+        return super().train_ready(elapsed_episode, **kwargs)
 
     def train(self, **kwargs):
         """Train impala agent by calling tf.sess."""
+        if self.use_train_thread:
+            return self._train_from_pipeline()
+
         states = np.concatenate(self.states)
         behavior_logits = np.concatenate(self.behavior_logits)
         actions = np.concatenate(self.actions)
@@ -105,6 +154,28 @@ class IMPALAOpt(Algorithm):
         self.rewards.clear()
         return np.mean(loss_list)
 
+    def _train_from_pipeline(self):
+        """Train on every full batch submitted, the rows left wait the next train."""
+        count = self._pending_rows // BATCH_SIZE
+        self._pending_rows -= count * BATCH_SIZE
+        loss_list = []
+
+        for _ in range(count):
+            _t0 = time()
+            batch = self._ready_q.get()
+            _t1 = time()
+            batch_state, batch_logit, batch_action, batch_done, batch_reward = batch
+            actor_loss = self.actor.train(
+                batch_state,
+                [batch_logit, batch_action, batch_done, batch_reward],
+            )
+            loss_list.append(loss_to_val(actor_loss))
+            self._free_q.put(batch)
+            self._input_metric.append(learner_idle=_t1 - _t0, train=time() - _t1)
+
+        self._input_metric.report_if_need()
+        return np.mean(loss_list)
+
     def save(self, model_path, model_index):
         """Save model."""
         actor_name = "actor" + str(model_index).zfill(5)
@@ -116,6 +187,12 @@ class IMPALAOpt(Algorithm):
     def prepare_data(self, train_data, **kwargs):
         """Prepare the data for impala algorithm."""
         state, logit, action, done, reward = self._data_proc(train_data)
+        if self.use_train_thread:
+            data = [np.asarray(_item) for _item in (state, logit, action, done, reward)]
+            self._traj_q.put(data)
+            self._pending_rows += len(data[0])
+            return
+
         self.states.append(state)
         self.behavior_logits.append(logit)
         self.actions.append(action)
@@ -145,3 +222,9 @@ class IMPALAOpt(Algorithm):
         rewards = np.asarray(episode_data["reward"])
 
         return states, behavior_logits, actions, dones, rewards
+
+    def shutdown(self):
+        """Stop the batch assembling thread."""
+        if self.use_train_thread:
+            self._traj_q.put(None)
+        super().shutdown()
@@ -70,7 +70,7 @@ class PbtInfo(object):
 
 class PbtAid(object):
     """PBT aid will help to calculate the explore and exploit."""
-    def __init__(self, learner_id, alg_para, config, metric_stub, weight_stub, **kwargs):
+    def __init__(self, learner_id, alg_para, config, metric_stub, weight_pool, **kwargs):
         self._lid = learner_id
 
         # raw alg_para, used to build new algorithm.
@@ -82,7 +82,8 @@ class PbtAid(object):
         self._metric_type = config.get("metric_type", "max")
         self._last_ready_step = 0
         self.metric_stub = metric_stub
-        self.weight_stub = weight_stub
+        # ShmWeightPool, the weights never pass the manager
+        self.weight_pool = weight_pool
 
         # history step of each organism, exclude current exploit
         self._previous_acc_episode = 0
@@ -107,11 +108,11 @@ class PbtAid(object):
             "elapsed_step": 0,
             "end": False,
             "checkpoint": False,
+            "weights_version": 0,
             self._mutation_key: mutation_vars,
         }
 
         self.metric_stub.update({self._lid: raw_metric})
-        self.weight_stub.update({self._lid: {}})
 
     def meet_stop(self, cur_episode_index):
         """Need stop the population."""
@@ -132,14 +133,12 @@ class PbtAid(object):
         # print("after update: ", self.metric_stub[self._lid])
 
     def _update_self_weight(self, weight):
-        weight_handler = self.weight_stub[self._lid]
-        weight_handler.update(dict(weight))
-        self.weight_stub[self._lid] = weight_handler
-        self._set_checkpoint_bit()
+        version = self.weight_pool.publish(self._lid, weight)
+        self._set_checkpoint_bit(version)
 
-    def _set_checkpoint_bit(self):
+    def _set_checkpoint_bit(self, version):
         metric_handler = self.metric_stub[self._lid]
-        metric_handler.update({"checkpoint": True})
+        metric_handler.update({"checkpoint": True, "weights_version": version})
         self.metric_stub[self._lid] = metric_handler
 
     def _unset_checkpoint_bit(self):
@@ -171,7 +170,9 @@ class PbtAid(object):
         return self.metric_stub[learner_id][key]
 
     def _get_weight(self, learner_id):
-        return self.weight_stub[learner_id]
+        """Copy the weights of learner_id into own slot, return the views."""
+        self.weight_pool.copy(learner_id, self._lid)
+        return self.weight_pool.read(self._lid)
 
     def _sort_organism(self, metric):
         """Sort organism of the Population, get the top and bottom organism.name."""
@@ -355,6 +356,10 @@ class PbtAid(object):
             #     self._lid, target_organ, p_weight))
         return None
 
+    def close(self):
+        """Release the own weights slot."""
+        self.weight_pool.close(self._lid)
+
     def summary(self):
         """Get the best organism, and Summary the Population as well."""
         pass
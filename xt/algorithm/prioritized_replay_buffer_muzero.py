@@ -118,15 +118,11 @@ class PrioritizedReplayBuffer(ReplayBufferBase):
         return idx
 
     def _sample_proportional(self, batch_size):
-        """to be filled"""
-        res = []
+        """Draw one index from each of `batch_size` equal slices of the total priority mass."""
         p_total = self._it_sum.sum(0, len(self._storage) - 1)
         every_range_len = p_total / batch_size
-        for i in range(batch_size):
-            mass = random.random() * every_range_len + i * every_range_len
-            idx = self._it_sum.find_prefixsum_idx(mass)
-            res.append(idx)
-        return res
+        mass = (np.random.random(batch_size) + np.arange(batch_size)) * every_range_len
+        return self._it_sum.find_prefixsum_idx(mass)
 
     def sample(self, batch_size, beta):
         """Sample a batch of experiences.
@@ -168,16 +164,13 @@ class PrioritizedReplayBuffer(ReplayBufferBase):
 
         idxes = self._sample_proportional(batch_size)
 
-        weights = []
-        p_min = self._it_min.min() / self._it_sum.sum()
+        p_total = self._it_sum.sum()
+        p_min = self._it_min.min() / p_total
         p_min = max(p_min, 1e-5)
         max_weight = (p_min * len(self._storage))**(-beta)
 
-        for idx in idxes:
-            p_sample = self._it_sum[idx] / self._it_sum.sum()
-            weight = (p_sample * len(self._storage))**(-beta)
-            weights.append(weight / max_weight)
-        weights = np.array(weights)
+        p_sample = self._it_sum[idxes] / p_total
+        weights = (p_sample * len(self._storage))**(-beta) / max_weight
         encoded_sample = self._encode_sample(idxes)
         return encoded_sample, weights, idxes
 
@@ -189,22 +182,27 @@ class PrioritizedReplayBuffer(ReplayBufferBase):
 
         Parameters
         ----------
-        idxes: [int]
+        idxes: [int] or np.ndarray
             List of idxes of sampled transitions
-        priorities: [float]
+        priorities: [float] or np.ndarray
             List of updated priorities corresponding to
             transitions at the sampled idxes denoted by
             variable `idxes`.
         """
+        idxes = np.asarray(idxes, dtype=np.int64).reshape(-1)
+        priorities = np.asarray(priorities, dtype=np.float64).reshape(-1)
         assert len(idxes) == len(priorities)
-        for idx, priority in zip(idxes, priorities):
-            assert priority > 0
-            assert 0 <= idx < len(self._storage)
-            self._it_sum[idx] = priority**self._alpha
-            self._it_min[idx] = priority**self._alpha
-            self._it_max[idx] = priority**self._alpha
-
-            self._max_priority = max(self._max_priority, priority)
+        if len(idxes) == 0:
+            return
+        assert np.all(priorities > 0)
+        assert np.all((idxes >= 0) & (idxes < len(self._storage)))
+
+        priorities_alpha = priorities**self._alpha
+        self._it_sum.update(idxes, priorities_alpha)
+        self._it_min.update(idxes, priorities_alpha)
+        self._it_max.update(idxes, priorities_alpha)
+
+        self._max_priority = max(self._max_priority, float(priorities.max()))
 
     def avg(self):
         if len(self._storage) == 0:
@@ -20,6 +20,8 @@
 import random
 from collections import deque
 
+import numpy as np
+
 
 class ReplayBuffer(object):
     """Build ReplayBuffer class."""
@@ -40,3 +42,171 @@ class ReplayBuffer(object):
     def add(self, train_data):
         """Put data to buffer."""
         self.buffer.append(train_data)
+
+
+class ArrayReplayBuffer(object):
+    """
+    Build a columnar ring buffer over preallocated numpy arrays.
+
+    Columns are allocated on the first insertion from the shape and dtype
+    of the incoming data. Image stacks (uint8 with shape [h, w, stack]) are
+    stored frame by frame: every transition keeps the frame indexes of its
+    `cur_state` and `next_state`, and a frame shared by consecutive
+    transitions of the same stream is written only once.
+    """
+
+    def __init__(self, buffer_size, dedup_frames=True):
+        self.buffer_size = int(buffer_size)
+        self.dedup_frames = dedup_frames
+
+        self._head = 0
+        self._size = 0
+        self._columns = None
+
+        # frame storage, used while the states are deduplicated image stacks
+        self._frames = None
+        self._frame_idx = None
+        self._frame_count = 0
+        self._frame_capacity = 0
+        self._stream_tail = dict()
+
+        # frames are reused only if they are at most `_reuse_window` frames
+        # older than the newest transition, which keeps the transitions
+        # nearly ordered by frame age, so eviction only checks the oldest.
+        self._reuse_window = 256
+        self._high_water = 0
+
+    def size(self):
+        """Get buffer size."""
+        return self._size
+
+    def _use_frames(self, state):
+        return self.dedup_frames and state.dtype == np.uint8 and state.ndim == 3
+
+    def _allocate(self, train_data):
+        cur_state = np.asarray(train_data["cur_state"][0])
+        self._columns = dict()
+        if self._use_frames(cur_state):
+            stack = cur_state.shape[-1]
+            # keep a small margin so that episode starts, which write a whole
+            # stack, do not evict transitions before their turn.
+            self._frame_capacity = self.buffer_size + max(self.buffer_size // 16, 4 * stack) \
+                + self._reuse_window
+            self._frames = np.zeros((self._frame_capacity, ) + cur_state.shape[:-1], dtype=np.uint8)
+            self._frame_idx = np.zeros((self.buffer_size, 2 * stack), dtype=np.int64)
+            keys = ("action", "reward", "done")
+        else:
+            keys = ("cur_state", "action", "reward", "next_state", "done")
+
+        dtypes = {"reward": np.float32, "done": np.bool_}
+        for key in keys:
+            sample = np.asarray(train_data[key][0])
+            self._columns[key] = np.zeros((self.buffer_size, ) + sample.shape,
+                                          dtype=dtypes.get(key, sample.dtype))
+
+    def add(self, train_data, stream=None):
+        """
+        Put a whole trajectory message into the buffer.
+
+        :param train_data: dict of equal-length sequences, with keys
+            `cur_state`, `action`, `reward`, `next_state` and `done`.
+        :param stream: identify the sender, consecutive transitions of the
+            same stream could share their frames.
+        """
+        data_len = len(train_data["done"])
+        if data_len == 0:
+            return
+        if self._columns is None:
+            self._allocate(train_data)
+
+        if self._frames is not None:
+            self._add_frame_transitions(train_data, data_len, stream)
+            return
+
+        if data_len > self.buffer_size:
+            train_data = {key: train_data[key][-self.buffer_size:] for key in self._columns}
+            data_len = self.buffer_size
+        slots = (self._head + np.arange(data_len)) % self.buffer_size
+        for key, column in self._columns.items():
+            column[slots] = np.asarray(train_data[key])
+
+        self._head = (self._head + data_len) % self.buffer_size
+        self._size = min(self._size + data_len, self.buffer_size)
+
+    def _add_frame_transitions(self, train_data, data_len, stream):
+        cur_states = train_data["cur_state"]
+        next_states = train_data["next_state"]
+        last_next, last_next_idx = self._stream_tail.get(stream, (None, None))
+
+        slots = np.empty(data_len, dtype=np.int64)
+        for index in range(data_len):
+            cur_state = np.asarray(cur_states[index])
+            next_state = np.asarray(next_states[index])
+
+            if last_next is not None and last_next_idx[0] >= self._high_water - self._reuse_window \
+                    and np.array_equal(cur_state, last_next):
+                cur_idx = last_next_idx
+            else:
+                cur_idx = self._write_frames(cur_state)
+
+            if np.array_equal(next_state[..., :-1], cur_state[..., 1:]):
+                next_idx = np.append(cur_idx[1:], self._write_frames(next_state[..., -1:]))
+            else:
+                next_idx = self._write_frames(next_state)
+
+            self._high_water = max(self._high_water, cur_idx[0])
+            slot = self._head
+            self._frame_idx[slot, :len(cur_idx)] = cur_idx
+            self._frame_idx[slot, len(cur_idx):] = next_idx
+            slots[index] = slot
+            self._head = (self._head + 1) % self.buffer_size
+            self._size = min(self._size + 1, self.buffer_size)
+
+            last_next, last_next_idx = next_state, next_idx
+
+        self._stream_tail[stream] = (last_next, last_next_idx)
+        for key, column in self._columns.items():
+            column[slots] = np.asarray(train_data[key])
+
+    def _write_frames(self, stack):
+        """Write the frames of an [h, w, n] stack, return their frame counters."""
+        num = stack.shape[-1]
+        counters = np.arange(self._frame_count, self._frame_count + num)
+        self._frame_count += num
+
+        # evict the oldest transitions, whose frames are about to be overwritten
+        overwrite_below = self._frame_count - self._frame_capacity + self._reuse_window
+        while self._size > 0:
+            oldest = (self._head - self._size) % self.buffer_size
+            if self._frame_idx[oldest, 0] >= overwrite_below:
+                break
+            self._size -= 1
+
+        self._frames[counters % self._frame_capacity] = np.moveaxis(stack, -1, 0)
+        return counters
+
+    def get_batch(self, batch_size):
+        """
+        Sample batch_size transitions uniformly, with replacement.
+
+        :return: tuple of arrays (cur_state, action, reward, next_state, done)
+        """
+        sample_size = min(self._size, int(batch_size))
+        offsets = np.random.randint(0, self._size, size=sample_size)
+        slots = (self._head - self._size + offsets) % self.buffer_size
+
+        if self._frames is not None:
+            frame_idx = self._frame_idx[slots] % self._frame_capacity
+            stack = frame_idx.shape[1] // 2
+            # a single gather of [batch, 2 * stack, h, w] frames, moved to channel last
+            states = np.moveaxis(self._frames[frame_idx], 1, -1)
+            cur_state, next_state = states[..., :stack], states[..., stack:]
+        else:
+            cur_state = self._columns["cur_state"][slots]
+            next_state = self._columns["next_state"][slots]
+
+        return (cur_state,
+                self._columns["action"][slots],
+                self._columns["reward"][slots],
+                next_state,
+                self._columns["done"][slots])
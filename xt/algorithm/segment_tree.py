@@ -1,7 +1,10 @@
 """
 Build a Segment Tree data structure.
+
+Node values live in a flat numpy array, so point updates and prefix-sum
+searches can be issued for a whole batch of indexes at once.
 """
-import operator
+import numpy as np
 
 
 class SegmentTree(object):
@@ -26,8 +29,8 @@ class SegmentTree(object):
         ---------
         capacity: int
             Total size of the array - must be a power of two.
-        operation: lambda obj, obj -> obj
-            and operation for combining elements (eg. sum, max)
+        operation: numpy binary ufunc
+            and operation for combining elements (eg. np.add, np.maximum)
             must form a mathematical group together with the set of
             possible values for array elements (i.e. be associative)
         neutral_element: obj
@@ -37,25 +40,10 @@ class SegmentTree(object):
         assert capacity > 0 and capacity & (capacity - 1) == 0, \
             "capacity must be positive and a power of 2."
         self._capacity = capacity
-        self._value = [neutral_element for _ in range(2 * capacity)]
+        self._depth = capacity.bit_length() - 1
+        self._value = np.full(2 * capacity, neutral_element, dtype=np.float64)
         self._operation = operation
-
-    def _reduce_helper(self, start, end, node, node_start, node_end):
-        """
-        Dostring.
-
-        to be filled
-        """
-        if start == node_start and end == node_end:
-            return self._value[node]
-        mid = (node_start + node_end) // 2
-        if end <= mid:
-            return self._reduce_helper(start, end, 2 * node, node_start, mid)
-
-        if mid + 1 <= start:
-            return self._reduce_helper(start, end, 2 * node + 1, mid + 1, node_end)
-        return self._operation(self._reduce_helper(start, mid, 2 * node, node_start, mid),
-                               self._reduce_helper(mid + 1, end, 2 * node + 1, mid + 1, node_end))
+        self._neutral_element = neutral_element
 
     def reduce(self, start=0, end=None):
         """
@@ -81,8 +69,51 @@ class SegmentTree(object):
             end = self._capacity
         if end < 0:
             end += self._capacity
-        end -= 1
-        return self._reduce_helper(start, end, 1, 0, self._capacity - 1)
+        if start == 0 and end == self._capacity:
+            return float(self._value[1])
+
+        # iterative bottom-up walk over the half-open leaf range [start, end)
+        result = self._neutral_element
+        start += self._capacity
+        end += self._capacity
+        while start < end:
+            if start & 1:
+                result = self._operation(result, self._value[start])
+                start += 1
+            if end & 1:
+                end -= 1
+                result = self._operation(result, self._value[end])
+            start >>= 1
+            end >>= 1
+        return float(result)
+
+    def update(self, idxes, values):
+        """
+        Set the leaves at `idxes` to `values` and refresh their ancestors.
+
+        All the touched paths are recomputed together, one tree level
+        per numpy operation, instead of walking them one index at a time.
+
+        Parameters
+        ----------
+        idxes: array_like of int
+            leaf indexes to set
+        values: array_like of float
+            new leaf values, same length as `idxes`
+        """
+        idxes = np.asarray(idxes, dtype=np.int64).reshape(-1)
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        assert len(idxes) == len(values)
+        if len(idxes) == 0:
+            return
+
+        # with duplicated indexes, the last value wins as in sequential setitem
+        nodes = idxes + self._capacity
+        self._value[nodes] = values
+        for _ in range(self._depth):
+            nodes = np.unique(nodes >> 1)
+            self._value[nodes] = self._operation(self._value[2 * nodes],
+                                                 self._value[2 * nodes + 1])
 
     def __setitem__(self, idx, val):
         # index of the leaf
@@ -94,8 +125,12 @@ class SegmentTree(object):
             idx //= 2
 
     def __getitem__(self, idx):
+        if np.ndim(idx) > 0:
+            idx = np.asarray(idx, dtype=np.int64)
+            assert np.all((idx >= 0) & (idx < self._capacity))
+            return self._value[self._capacity + idx]
         assert 0 <= idx < self._capacity
-        return self._value[self._capacity + idx]
+        return float(self._value[self._capacity + idx])
 
 
 class SumSegmentTree(SegmentTree):
@@ -103,7 +138,7 @@ class SumSegmentTree(SegmentTree):
 
     def __init__(self, capacity):
         super(SumSegmentTree, self).__init__(capacity=capacity,
-                                             operation=operator.add, neutral_element=0.0)
+                                             operation=np.add, neutral_element=0.0)
 
     def sum(self, start=0, end=None):
         """Return sum(arr[start] + ... + arr[end])."""
@@ -116,44 +151,56 @@ class SumSegmentTree(SegmentTree):
         if array values are probabilities, this function
         allows to sample indexes according to the discrete
         probability efficiently.
+        A whole array of prefix sums is searched in one pass, descending
+        all the queries together level by level.
 
         Parameters
         ----------
-        perfixsum: float
+        perfixsum: float or np.ndarray
             upperbound on the sum of array prefix
 
         Returns
         -------
-        idx: int
-            highest index satisfying the prefixsum constraint
+        idx: int or np.ndarray
+            highest index satisfying the prefixsum constraint,
+            with the same shape as `prefixsum`
         """
-        assert 0 <= prefixsum <= self.sum() + 1e-5
-        idx = 1
-        while idx < self._capacity:  # while non-leaf
-            if self._value[2 * idx] > prefixsum:
-                idx = 2 * idx
-            else:
-                prefixsum -= self._value[2 * idx]
-                idx = 2 * idx + 1
-        return idx - self._capacity
+        is_scalar = np.ndim(prefixsum) == 0
+        prefixsum = np.array(prefixsum, dtype=np.float64).reshape(-1)
+        assert np.all(prefixsum >= 0) and np.all(prefixsum <= self.sum() + 1e-5)
+
+        idx = np.ones(len(prefixsum), dtype=np.int64)
+        for _ in range(self._depth):  # while non-leaf
+            left = self._value[2 * idx]
+            go_right = left <= prefixsum
+            prefixsum -= np.where(go_right, left, 0.0)
+            idx = 2 * idx + go_right
+        idx -= self._capacity
+
+        if is_scalar:
+            return int(idx[0])
+        return idx
 
 
 class MinSegmentTree(SegmentTree):
     """Build MinSegmentTree."""
 
     def __init__(self, capacity):
-        super(MinSegmentTree, self).__init__(capacity=capacity, operation=min,
+        super(MinSegmentTree, self).__init__(capacity=capacity, operation=np.minimum,
                                              neutral_element=float('inf'))
 
     def min(self, start=0, end=None):
         """Return min(arr[start], ...,  arr[end])."""
         return super(MinSegmentTree, self).reduce(start, end)
+
+
 class MaxSegmentTree(SegmentTree):
-    """MinSegmentTree"""
+    """Build MaxSegmentTree."""
+
     def __init__(self, capacity):
-        super().__init__(capacity=capacity, operation=max, neutral_element=0.)
+        super(MaxSegmentTree, self).__init__(capacity=capacity, operation=np.maximum,
+                                             neutral_element=0.)
 
     def max(self, start=0, end=None):
-        """Returns min(arr[start], ...,  arr[end])"""
-
-        return super().reduce(start, end)
+        """Return max(arr[start], ...,  arr[end])."""
+        return super(MaxSegmentTree, self).reduce(start, end)
@@ -0,0 +1,190 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Micro benchmark of the UniComm backends, with trajectory messages.
+
+A producer, in a forked process (a thread for LocalMsg), sends the
+messages to the consumer within the main process. The burst run reports
+the throughput, and the paced run reports the latency percentiles
+without queueing.
+Usage:
+    python -m xt.benchmark.comm_bench --steps 16 128 --count 200 --output comm.json
+"""
+import argparse
+import threading
+from multiprocessing import Process
+from time import sleep, time
+
+from xt.benchmark.report import latency_summary, make_report, write_report
+from xt.benchmark.serialize_bench import make_trajectory
+from zeus.common.ipc.serialize import packed_size, serialize
+from zeus.common.ipc.uni_comm import UniComm
+
+
+class _Backend(object):
+    """Consumer and producer side of a comm, with the same message flow."""
+
+    name = None
+    use_thread = False
+
+    def __init__(self, msg_bytes):
+        self.msg_bytes = msg_bytes
+        self.consumer = None
+
+    def setup(self):
+        """Create the consumer side, before forking the producer."""
+        self.consumer = UniComm(self.name)
+
+    def producer(self):
+        """Return the comm to send, within the producer."""
+        return self.consumer
+
+    def send(self, comm, ctr_info, data):
+        comm.send({"ctr_info": ctr_info, "data": data})
+
+    def recv(self):
+        """Return the ctr_info received."""
+        return self.consumer.recv()[0]
+
+    def close(self):
+        self.consumer.close()
+
+
+class _LocalMsg(_Backend):
+    name = "LocalMsg"
+    use_thread = True
+
+    def recv(self):
+        return self.consumer.recv()["ctr_info"]
+
+
+class _ShareByPlasma(_Backend):
+    name = "ShareByPlasma"
+
+    def setup(self):
+        self.consumer = UniComm(self.name, size=max(64 * self.msg_bytes, 2 ** 28))
+
+
+class _ShareByRing(_Backend):
+    name = "ShareByRing"
+
+    def setup(self):
+        self.consumer = UniComm(self.name, size=max(8 * self.msg_bytes, 2 ** 25))
+
+
+class _CommByZmq(_Backend):
+    name = "CommByZmq"
+
+    def setup(self):
+        self.consumer = UniComm(self.name, type="PULL")
+
+    def producer(self):
+        # the zmq socket must not cross the fork, connect within the producer
+        return UniComm(self.name, type="PUSH", addr="127.0.0.1", port=self.consumer.comm.bound_port)
+
+    def send(self, comm, ctr_info, data):
+        comm.send(ctr_info, data)
+
+
+BACKENDS = (_LocalMsg, _ShareByPlasma, _ShareByRing, _CommByZmq)
+
+
+def _produce(backend, data, count, interval):
+    comm = backend.producer()
+    for index in range(count):
+        if interval:
+            sleep(interval)
+        backend.send(comm, {"cmd": "bench", "index": index, "send_time": time()}, dict(data))
+    if comm is not backend.consumer:
+        comm.close()
+
+
+def run_case(backend, data, count, interval):
+    """Run the producer and consume `count` messages, return the recv stats.
+
+    Each case sets up a fresh comm for its own producer, as the ring and the
+    zmq socket are paired with a single producer.
+    """
+    backend.setup()
+    try:
+        args = (backend, data, count, interval)
+        producer = threading.Thread(target=_produce, args=args) if backend.use_thread \
+            else Process(target=_produce, args=args)
+        producer.start()
+
+        costs, first_send = list(), None
+        for _ in range(count):
+            ctr_info = backend.recv()
+            costs.append(time() - ctr_info["send_time"])
+            if first_send is None:
+                first_send = ctr_info["send_time"]
+        elapsed = time() - first_send
+        producer.join()
+    finally:
+        backend.close()
+    return costs, elapsed
+
+
+def bench_backend(backend_cls, data, count, interval):
+    """Return the throughput and latency of one backend."""
+    msg_bytes = packed_size(serialize(data))
+    backend = backend_cls(msg_bytes)
+    _, elapsed = run_case(backend, data, count, 0)
+    costs, _ = run_case(backend, data, max(count // 4, 10), interval)
+
+    ret = {"backend": backend.name, "msg_bytes": msg_bytes,
+           "msgs_per_sec": count / elapsed,
+           "mbytes_per_sec": count * msg_bytes / elapsed / 2 ** 20}
+    ret.update({"latency_" + k: v for k, v in latency_summary(costs).items()})
+    return ret
+
+
+def main():
+    parser = argparse.ArgumentParser(description="comm backend benchmark.")
+    parser.add_argument("--steps", nargs="+", type=int, default=[16, 128])
+    parser.add_argument("--dim", type=int, default=84)
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--interval_ms", type=float, default=2.0,
+                        help="send interval of the paced latency run.")
+    parser.add_argument("--backends", nargs="+", default=[_b.name for _b in BACKENDS])
+    parser.add_argument("--output", default=None, help="json report path, '-' for stdout.")
+    args = parser.parse_args()
+
+    cases = list()
+    print("{:>6} {:>14} {:>12} {:>10} {:>10} {:>10} {:>10}".format(
+        "steps", "backend", "msg_bytes", "msgs/s", "MB/s", "p50_ms", "p99_ms"))
+    for steps in args.steps:
+        data = make_trajectory(steps, args.dim)
+        for backend_cls in BACKENDS:
+            if backend_cls.name not in args.backends:
+                continue
+            ret = bench_backend(backend_cls, data, args.count, args.interval_ms / 1000.)
+            ret.update({"steps": steps})
+            cases.append(ret)
+            print("{:>6} {:>14} {:>12} {:>10.1f} {:>10.1f} {:>10.3f} {:>10.3f}".format(
+                steps, ret["backend"], ret["msg_bytes"], ret["msgs_per_sec"],
+                ret["mbytes_per_sec"], ret["latency_p50_ms"], ret["latency_p99_ms"]))
+
+    if args.output:
+        write_report(make_report("comm_bench", cases, **vars(args)), args.output)
+
+
+if __name__ == "__main__":
+    main()
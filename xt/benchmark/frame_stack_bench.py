@@ -0,0 +1,72 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Benchmark the Atari frame stacking, with steps per second.
+
+Compare the deque + concatenate stacking with the ring buffer FrameStack.
+Usage:
+    python -m xt.benchmark.frame_stack_bench --steps 20000 --dim 84
+"""
+import argparse
+from collections import deque
+from time import time
+
+import numpy as np
+
+from xt.environment.gym.frame_stack import FrameStack
+
+
+def deque_stack(frames, stack_size):
+    """The previous AtariEnv stacking."""
+    stack_obs = deque([np.zeros_like(frames[0])] * stack_size, maxlen=stack_size)
+    for frame in frames:
+        stack_obs.append(frame)
+        np.concatenate(stack_obs, -1)
+
+
+def ring_stack(frames, stack_size, mode):
+    stacker = FrameStack(frames[0].shape, stack_size, mode=mode)
+    for frame in frames:
+        stacker.push(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="frame stack benchmark.")
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=84)
+    parser.add_argument("--stack_size", type=int, default=4)
+    args = parser.parse_args()
+
+    pool = np.random.randint(0, 255, (64, args.dim, args.dim, 1), dtype=np.uint8)
+    frames = [pool[i % len(pool)] for i in range(args.steps)]
+
+    cases = [("deque_concat", lambda: deque_stack(frames, args.stack_size))]
+    for mode in ("copy", "inplace", "view", "newest"):
+        cases.append(("ring_" + mode, lambda _mode=mode: ring_stack(frames, args.stack_size, _mode)))
+
+    print("{:>14} {:>14}".format("stacker", "steps/sec"))
+    for name, run in cases:
+        _t0 = time()
+        run()
+        print("{:>14} {:>14.0f}".format(name, args.steps / (time() - _t0)))
+
+
+if __name__ == "__main__":
+    main()
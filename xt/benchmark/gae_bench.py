@@ -0,0 +1,86 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Benchmark the GAE computation of the PPO agents on rollout sizes.
+
+Compare the blocked scan of xt.agent.advantage with the reverse Python loop.
+Usage:
+    python -m xt.benchmark.gae_bench --steps 128 512 2048 --repeat 200
+"""
+import argparse
+from time import time
+
+import numpy as np
+
+from xt.agent.advantage import gae_advantage
+from xt.agent.ppo.default_config import GAMMA, LAM
+
+
+def make_rollout(steps, done_prob=0.01):
+    """Create the PPO data_proc inputs of a rollout with `steps` transitions."""
+    value = np.random.randn(steps + 1, 1).astype(np.float32)
+    return {
+        "reward": np.random.randn(steps, 1),
+        "value": value[:-1],
+        "next_value": value[1:],
+        "done": np.random.rand(steps) < done_prob,
+    }
+
+
+def loop_gae(reward, value, next_value, done):
+    """The previous PPO.data_proc advantage loop."""
+    done = np.expand_dims(done, axis=1)
+    discount = ~done * GAMMA
+    adv = reward + discount * next_value - value
+    for j in range(len(adv) - 2, -1, -1):
+        adv[j] += adv[j + 1] * discount[j] * LAM
+    return adv
+
+
+def scan_gae(reward, value, next_value, done):
+    return gae_advantage(reward, value, next_value, done, GAMMA, LAM)
+
+
+def run_case(func, rollout, repeat):
+    """Return the mean cost in ms and the result."""
+    ret = None
+    _t0 = time()
+    for _ in range(repeat):
+        ret = func(**rollout)
+    return (time() - _t0) * 1000 / repeat, ret
+
+
+def main():
+    parser = argparse.ArgumentParser(description="gae benchmark.")
+    parser.add_argument("--steps", nargs="+", type=int, default=[128, 512, 2048])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print("{:>6} {:>10} {:>10} {:>9} {:>12}".format("steps", "loop_ms", "scan_ms", "speedup", "max_abs_err"))
+    for steps in args.steps:
+        rollout = make_rollout(steps)
+        loop_ms, loop_adv = run_case(loop_gae, rollout, args.repeat)
+        scan_ms, scan_adv = run_case(scan_gae, rollout, args.repeat)
+        print("{:>6} {:>10.3f} {:>10.3f} {:>9.1f} {:>12.2e}".format(
+            steps, loop_ms, scan_ms, loop_ms / scan_ms, np.abs(loop_adv - scan_adv).max()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Benchmark the PBT weights exchange on model sizes.
+
+Compare the `multiprocessing.Manager` dict, which the population used to
+share the weights, with the shared memory ShmWeightPool.
+Usage:
+    python -m xt.benchmark.pbt_weights_bench --mbytes 1 16 64 --repeat 20
+"""
+import argparse
+from multiprocessing import Manager
+from time import time
+
+import numpy as np
+
+from zeus.common.ipc.weight_pool import ShmWeightPool
+
+
+def make_weights(mbytes, layers=8):
+    """Create the weights dict with `layers` float32 arrays."""
+    size = int(mbytes * 2 ** 20 / 4 / layers)
+    return {"layer_{}".format(i): np.random.rand(size).astype(np.float32)
+            for i in range(layers)}
+
+
+def run_manager(store, weights, repeat):
+    """Return the mean cost in ms of publish and exploit via manager dict."""
+    _t0 = time()
+    for _ in range(repeat):
+        store["top"] = weights
+    publish_ms = (time() - _t0) * 1000 / repeat
+
+    _t0 = time()
+    for _ in range(repeat):
+        ret = store["top"]
+    return publish_ms, (time() - _t0) * 1000 / repeat, ret
+
+
+def run_pool(pool, weights, repeat):
+    """Return the mean cost in ms of publish and exploit via weight pool."""
+    _t0 = time()
+    for _ in range(repeat):
+        pool.publish("top", weights)
+    publish_ms = (time() - _t0) * 1000 / repeat
+
+    _t0 = time()
+    for _ in range(repeat):
+        pool.copy("top", "bottom")
+        ret = pool.read("bottom")
+    return publish_ms, (time() - _t0) * 1000 / repeat, ret
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pbt weights benchmark.")
+    parser.add_argument("--mbytes", nargs="+", type=float, default=[1, 16, 64])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    manager = Manager()
+    pool = ShmWeightPool(manager.dict())
+    print("{:>7} {:>12} {:>12} {:>12} {:>12}".format(
+        "mbytes", "mgr_pub_ms", "mgr_get_ms", "pool_pub_ms", "pool_get_ms"))
+    try:
+        for mbytes in args.mbytes:
+            weights = make_weights(mbytes)
+            mgr_pub, mgr_get, _ = run_manager(manager.dict(), weights, args.repeat)
+            pool_pub, pool_get, ret = run_pool(pool, weights, args.repeat)
+            assert all(np.array_equal(ret[k], v) for k, v in weights.items())
+            del ret
+            print("{:>7.1f} {:>12.3f} {:>12.3f} {:>12.3f} {:>12.3f}".format(
+                mbytes, mgr_pub, mgr_get, pool_pub, pool_get))
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+End-to-end throughput benchmark of the train pipeline.
+
+Drive the real Controller, Broker, Explorer and TrainWorker with the
+SyntheticEnv and a tiny PPO model on CPU, record the stats delivered to
+the StatsRecorder, and report the throughput and latency of each stage:
+    explorer: env steps/sec per explorer, env step and inference latency;
+    trajectory: messages/sec received by the learner, wait/prepare latency;
+    learner: samples/sec, train/sec and train latency;
+    weights: learner fix and send latency, explorer wait and restore latency.
+Usage:
+    python -m xt.benchmark.pipeline_bench --env_num 4 --steps 200000 --output pipeline.json
+"""
+import argparse
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from xt.benchmark.report import latency_summary, make_report, write_report
+from xt.train import start_train
+
+
+def make_config(args):
+    """Assemble the train config of PPO with the SyntheticEnv."""
+    return {
+        "alg_para": {
+            "alg_name": "PPO",
+            "alg_config": {"process_num": 1, "save_model": False},
+        },
+        "env_para": {
+            "env_name": "SyntheticEnv",
+            "env_info": {"obs_shape": [args.obs_dim], "action_dim": 2,
+                         "episode_len": args.episode_len, "step_ms": args.step_ms},
+        },
+        "agent_para": {
+            "agent_name": "PPO",
+            "agent_num": 1,
+            "agent_config": {"max_steps": args.episode_len, "complete_step": args.steps},
+        },
+        "model_para": {
+            "actor": {
+                "model_name": "PpoMlp",
+                "state_dim": [args.obs_dim],
+                "action_dim": 2,
+                "input_dtype": "float32",
+                "model_config": {
+                    "BATCH_SIZE": args.batch_size,
+                    "CRITIC_LOSS_COEF": 1.0,
+                    "ENTROPY_LOSS": 0.01,
+                    "LR": 0.0003,
+                    "LOSS_CLIPPING": 0.2,
+                    "MAX_GRAD_NORM": 5.0,
+                    "NUM_SGD_ITER": 1,
+                    "SUMMARY": False,
+                    "VF_SHARE_LAYERS": False,
+                    "activation": "tanh",
+                    "hidden_sizes": [16, 16],
+                },
+            },
+        },
+        "env_num": args.env_num,
+        "speedup": False,
+        "benchmark": {"log_interval_to_train": 1, "archive_root": args.archive_root},
+    }
+
+
+class PipelineProbe(object):
+    """Record the stats received by the StatsRecorder, with the receiving time."""
+
+    def __init__(self, warmup=0.):
+        self.start_time = time.time()
+        self.warmup = warmup
+        self.learner = defaultdict(list)
+        self.explorer = defaultdict(list)
+
+    def on_stats(self, task_name, stats):
+        """Listener of StatsRecorder."""
+        now = time.time()
+        if now - self.start_time < self.warmup:
+            return
+        ctr_info = stats.get("ctr_info")
+        if ctr_info:
+            self.explorer[(task_name, ctr_info.get("explorer_id"))].append(dict(stats["data"]))
+        elif not stats.get("is_bm"):
+            self.learner[task_name].append((now, dict(stats)))
+
+    @staticmethod
+    def _rate(records, key):
+        """Return the overall and windowed rate of the accumulated `key`."""
+        points = [(_t, _s[key]) for _t, _s in records
+                  if key in _s and not np.isnan(_s[key])]
+        if len(points) < 2:
+            return {}
+        stamps, values = np.array(points, dtype=np.float64).T
+        window = np.diff(values) / np.maximum(np.diff(stamps), 1e-6)
+        return {"per_sec": float((values[-1] - values[0]) / (stamps[-1] - stamps[0])),
+                "window_p50": float(np.percentile(window, 50)),
+                "window_p10": float(np.percentile(window, 10))}
+
+    @staticmethod
+    def _values(records, key):
+        return [_s[key] for _s in records if key in _s and not np.isnan(_s[key])]
+
+    def _learner_report(self, records):
+        stats = [_s for _, _s in records]
+        return {
+            "trajectory": {
+                "msgs": self._rate(records, "train_msg_count"),
+                "wait_sample": latency_summary(self._values(stats, "mean_wait_sample_ms"), scale=1.),
+                "prepare_data": latency_summary(self._values(stats, "mean_prepare_data_ms"), scale=1.),
+            },
+            "learner": {
+                "samples": self._rate(records, "step"),
+                "trains": self._rate(records, "train_count"),
+                "train": latency_summary(self._values(stats, "mean_train_time_ms"), scale=1.),
+            },
+            "weights": {
+                "fix_weight": latency_summary(
+                    self._values(stats, "leaner_model_fix_weight_mean_ms"), scale=1.),
+                "send": latency_summary(self._values(stats, "leaner_model_send_mean_ms"), scale=1.),
+            },
+        }
+
+    def _explorer_report(self, records):
+        steps_per_sec = [_s["iters"] / _s["explore_ms"] * 1000. for _s in records
+                         if _s.get("explore_ms") and "iters" in _s]
+        return {
+            "env_steps_per_sec": float(np.mean(steps_per_sec)) if steps_per_sec else None,
+            "env_step": latency_summary(self._values(records, "mean_env_step_ms"), scale=1.),
+            "inference": latency_summary(self._values(records, "mean_inference_ms"), scale=1.),
+            "wait_model": latency_summary(self._values(records, "wait_model_ms"), scale=1.),
+            "restore_model": latency_summary(self._values(records, "restore_model_ms"), scale=1.),
+        }
+
+    def report(self):
+        """Assemble the stage report of each learner and its explorers."""
+        ret = dict()
+        for task_name, records in self.learner.items():
+            ret[task_name] = self._learner_report(records)
+            ret[task_name]["explorers"] = {
+                str(_eid): self._explorer_report(_records)
+                for (_task, _eid), _records in sorted(self.explorer.items(),
+                                                      key=lambda x: str(x[0]))
+                if _task == task_name
+            }
+        return ret
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pipeline throughput benchmark.")
+    parser.add_argument("--env_num", type=int, default=2)
+    parser.add_argument("--steps", type=int, default=100000, help="env steps to run.")
+    parser.add_argument("--obs_dim", type=int, default=4)
+    parser.add_argument("--episode_len", type=int, default=200)
+    parser.add_argument("--step_ms", type=float, default=0., help="busy time of each env step.")
+    parser.add_argument("--batch_size", type=int, default=200)
+    parser.add_argument("--warmup", type=float, default=10., help="seconds skipped in the report.")
+    parser.add_argument("--archive_root", default=os.path.join(os.path.expanduser("~"), "xt_archive"))
+    parser.add_argument("--output", default="-", help="json report path, '-' for stdout.")
+    parser.add_argument("--verbosity", default="warning")
+    args = parser.parse_args()
+
+    controller = start_train(make_config(args), "train", verbosity=args.verbosity)
+    probe = PipelineProbe(warmup=args.warmup)
+    for recorder in controller.stats.tasks.values():
+        recorder.listeners.append(probe.on_stats)
+
+    _start = time.time()
+    controller.tasks_loop()
+    cases = probe.report()
+    write_report(make_report("pipeline_bench", cases, elapsed_sec=time.time() - _start,
+                             **vars(args)), args.output)
+
+    # the explorers are stopped along with the process, as xt.train does
+    controller.stop()
+    time.sleep(1)
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Machine-readable report of the benchmarks.
+
+Each benchmark assembles a dict of cases, and writes it as json with the
+host information, so the results of different commits could be diffed.
+"""
+import json
+import os
+import platform
+import socket
+import subprocess
+from time import strftime
+
+import numpy as np
+
+
+def latency_summary(costs, scale=1000.):
+    """
+    Summarize the latency samples.
+
+    :param costs: samples in seconds.
+    :param scale: multiply to the unit reported, ms as default.
+    :return: dict with count, mean and the percentiles.
+    """
+    costs = np.asarray(costs, dtype=np.float64) * scale
+    if not costs.size:
+        return {"count": 0}
+    p50, p90, p99 = np.percentile(costs, (50, 90, 99))
+    return {"count": int(costs.size), "mean_ms": float(costs.mean()),
+            "p50_ms": float(p50), "p90_ms": float(p90), "p99_ms": float(p99),
+            "max_ms": float(costs.max())}
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_report(name, cases, **config):
+    """Wrap the cases with the host and config information."""
+    return {
+        "benchmark": name,
+        "time": strftime("%Y-%m-%d %H:%M:%S"),
+        "host": socket.gethostname(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "revision": _git_revision(),
+        "config": config,
+        "cases": cases,
+    }
+
+
+def write_report(report, path):
+    """Write the report into json file, '-' for stdout."""
+    content = json.dumps(report, indent=2, sort_keys=True, default=str)
+    if path == "-":
+        print(content)
+        return
+    with open(path, "w") as report_file:
+        report_file.write(content)
@@ -0,0 +1,113 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Benchmark the message serialization on IMPALA Atari trajectory sizes.
+
+Compare the zero-copy serializer with the legacy pyarrow + lz4 path.
+Usage:
+    python -m xt.benchmark.serialize_bench --steps 128 500 --repeat 20 --output serialize.json
+"""
+import argparse
+from time import time
+
+import numpy as np
+
+from xt.benchmark.report import make_report, write_report
+from zeus.common.ipc.serialize import serialize, deserialize, packed_size, pack_into
+
+
+def make_trajectory(steps, dim=84, action_dim=6):
+    """Create an IMPALA Atari trajectory with `steps` transitions."""
+    return {
+        "cur_state": np.random.randint(0, 255, (steps, dim, dim, 4), dtype=np.uint8),
+        "logit": np.random.rand(steps, action_dim).astype(np.float32),
+        "action": np.random.randint(0, action_dim, steps).astype(np.int32),
+        "reward": np.random.rand(steps).astype(np.float32),
+        "done": np.zeros(steps, dtype=np.bool_),
+        "info": [{"eval_reward": 0.0, "real_done": False} for _ in range(steps)],
+    }
+
+
+def zero_copy_roundtrip(data, share_mem):
+    """Serialize into the (shared) memory, and deserialize from it."""
+    frames = serialize(data)
+    size = pack_into(frames, share_mem)
+    return deserialize(memoryview(share_mem)[:size]), size
+
+
+def pyarrow_lz4_roundtrip(data, share_mem):
+    """Mirror the legacy path: pyarrow serialize, lz4 compress and copy in."""
+    import lz4.frame
+    import pyarrow
+
+    msg = lz4.frame.compress(pyarrow.serialize(data).to_buffer())
+    share_mem[:len(msg)] = msg
+    return pyarrow.deserialize(lz4.frame.decompress(memoryview(share_mem)[:len(msg)])), len(msg)
+
+
+def run_case(name, roundtrip, data, share_mem, repeat):
+    """Return mean/p50/p99 roundtrip time in ms."""
+    costs = list()
+    size = 0
+    for _ in range(repeat):
+        _t0 = time()
+        _, size = roundtrip(data, share_mem)
+        costs.append((time() - _t0) * 1000)
+    costs = np.array(costs)
+    return {"path": name, "msg_bytes": size, "mean_ms": float(costs.mean()),
+            "p50_ms": float(np.percentile(costs, 50)), "p99_ms": float(np.percentile(costs, 99))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="serialize benchmark.")
+    parser.add_argument("--steps", nargs="+", type=int, default=[128, 500, 1000])
+    parser.add_argument("--dim", type=int, default=84)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", default=None, help="json report path, '-' for stdout.")
+    args = parser.parse_args()
+
+    cases = [("zero_copy", zero_copy_roundtrip)]
+    try:
+        import lz4.frame  # pylint: disable=W0611
+        import pyarrow
+        if hasattr(pyarrow, "serialize"):
+            cases.append(("pyarrow_lz4", pyarrow_lz4_roundtrip))
+    except ImportError:
+        pass
+
+    cases = list()
+    print("{:>6} {:>12} {:>12} {:>10} {:>10} {:>10}".format(
+        "steps", "path", "msg_bytes", "mean_ms", "p50_ms", "p99_ms"))
+    for steps in args.steps:
+        data = make_trajectory(steps, args.dim)
+        share_mem = bytearray(packed_size(serialize(data)) * 2)
+        for name, roundtrip in cases:
+            ret = run_case(name, roundtrip, data, share_mem, args.repeat)
+            ret.update({"steps": steps})
+            cases.append(ret)
+            print("{:>6} {:>12} {:>12} {:>10.3f} {:>10.3f} {:>10.3f}".format(
+                steps, ret["path"], ret["msg_bytes"], ret["mean_ms"], ret["p50_ms"], ret["p99_ms"]))
+
+    if args.output:
+        write_report(make_report("serialize_bench", cases, **vars(args)), args.output)
+
+
+if __name__ == "__main__":
+    main()
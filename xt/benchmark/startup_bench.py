@@ -0,0 +1,88 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Benchmark the process startup, with lazy or eager module registering.
+
+Each case runs within fresh python processes, and measures:
+    import_xt: `import xt` only.
+    explorer_ready: `import xt`, then look up the env, agent, algorithm
+        and model of the config within the Registers, as the explorer does
+        before its first step; with `--build_env`, create the env too.
+Usage:
+    python -m xt.benchmark.startup_bench --config examples/cartpole_ppo.yaml --repeat 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+from time import time
+
+import numpy as np
+
+IMPORT_XT = "import xt"
+
+EXPLORER_READY = """
+import yaml
+import xt
+from zeus.common.util.register import Registers
+with open({config!r}) as conf_file:
+    config = yaml.safe_load(conf_file)
+Registers.algorithm[config["alg_para"]["alg_name"]]
+Registers.agent[config["agent_para"]["agent_name"]]
+Registers.model[config["model_para"]["actor"]["model_name"]]
+env_cls = Registers.env[config["env_para"]["env_name"]]
+if {build_env!r}:
+    env_cls(config["env_para"].get("env_info", dict())).close()
+"""
+
+
+def run_case(code, eager, repeat):
+    """Return the wall time of each python process running `code`, in ms."""
+    env = dict(os.environ, XT_EAGER_REGISTER="1" if eager else "0")
+    costs = list()
+    for _ in range(repeat):
+        _t0 = time()
+        subprocess.run([sys.executable, "-c", code], env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        costs.append((time() - _t0) * 1000)
+    return np.array(costs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="startup benchmark.")
+    parser.add_argument("--config", default="examples/cartpole_ppo.yaml")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--build_env", action="store_true")
+    args = parser.parse_args()
+
+    cases = [("import_xt", IMPORT_XT),
+             ("explorer_ready", EXPLORER_READY.format(config=os.path.abspath(args.config),
+                                                      build_env=args.build_env))]
+
+    print("{:>16} {:>8} {:>10} {:>10}".format("case", "register", "mean_ms", "min_ms"))
+    for name, code in cases:
+        for eager in (True, False):
+            costs = run_case(code, eager, args.repeat)
+            print("{:>16} {:>8} {:>10.1f} {:>10.1f}".format(
+                name, "eager" if eager else "lazy", costs.mean(), costs.min()))
+
+
+if __name__ == "__main__":
+    main()
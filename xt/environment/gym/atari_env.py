@@ -18,13 +18,17 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 """Make atari env for simulation."""
+from ctypes import c_uint8
+from multiprocessing import Pipe, Process
+from multiprocessing.sharedctypes import RawArray
+
 import cv2
 import numpy as np
-from collections import deque
 
 from xt.environment.environment import Environment
 from xt.environment.gym import infer_action_type
 from xt.environment.gym.atari_wrappers import make_atari
+from xt.environment.gym.frame_stack import FrameStack
 from zeus.common.util.register import Registers
 
 cv2.ocl.setUseOpenCL(False)
@@ -46,20 +50,18 @@ class AtariEnv(Environment):
         self.dim = env_info.get('dim', 84)
         self.action_type = infer_action_type(env.action_space)
 
-        self.init_obs = np.zeros((self.dim, self.dim, 1), np.uint8)
         self.stack_size = 4
-        self.stack_obs = deque(maxlen=4)
+        # `view` and `inplace` states are overwritten by the next step,
+        # use them only if the consumer copies the state out at once.
+        self.frame_stack = FrameStack((self.dim, self.dim, 1), self.stack_size,
+                                      mode=env_info.get("frame_stack_mode", "copy"))
 
-        self.init_stack_obs(self.stack_size)
         self.init_state = None
+        self.state = None
         self.done = True
 
         return env
 
-    def init_stack_obs(self, num):
-        for _ in range(num):
-            self.stack_obs.append(self.init_obs)
-
     def reset(self):
         """
         Reset the environment, if done is true, must clear obs array.
@@ -68,10 +70,9 @@ class AtariEnv(Environment):
         """
         if self.done:
             obs = self.env.reset()
-            self.init_stack_obs(self.stack_size - 1)
-            self.stack_obs.append(self.obs_proc(obs))
+            self.state = self._unpack_stack(self.frame_stack.reset(self.obs_proc(obs)))
 
-        state = np.concatenate(self.stack_obs, -1)
+        state = self.state
         self.init_state = state
         return state
 
@@ -87,13 +88,22 @@ class AtariEnv(Environment):
         """
         obs, reward, done, info = self.env.step(action)
         if done:
-            self.init_stack_obs(self.stack_size - 1)
+            stack = self.frame_stack.reset(self.obs_proc(obs))
+        else:
+            stack = self.frame_stack.push(self.obs_proc(obs))
 
-        self.stack_obs.append(self.obs_proc(obs))
-        # self.stack_obs.append(obs)
-        state = np.concatenate(self.stack_obs, -1)
+        self.state = self._unpack_stack(stack, info)
         self.done = done
-        return state, reward, done, info
+        return self.state, reward, done, info
+
+    def _unpack_stack(self, stack, info=None):
+        """Split the newest frame and its stack index, within `newest` mode."""
+        if self.frame_stack.mode != "newest":
+            return stack
+        frame, stack_index = stack
+        if info is not None:
+            info.update({"frame_stack_index": stack_index})
+        return frame
 
     def obs_proc(self, obs):
         obs = cv2.cvtColor(obs, cv2.COLOR_RGB2GRAY)
@@ -103,47 +113,139 @@ class AtariEnv(Environment):
         return obs
 
 
+def _vector_env_worker(remote, parent_remote, env_info, env_id, shared_obs, obs_shape):
+    """
+    Run one sub-environment of VectorAtariEnv within a worker process.
+
+    The observation is written into slot `env_id` of the shared array,
+    only reward, done and info go back through the pipe.
+    """
+    parent_remote.close()
+    obs_buf = np.frombuffer(shared_obs, dtype=np.uint8).reshape(obs_shape)
+    # the observation is copied into the shared array at once.
+    env = AtariEnv(dict(env_info, frame_stack_mode="view"))
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                obs, reward, done, info = env.step(data)
+                if done:
+                    obs = env.reset()
+                obs_buf[env_id] = obs
+                remote.send((reward, done, info))
+            elif cmd == "reset":
+                obs_buf[env_id] = env.reset()
+                remote.send(None)
+            elif cmd == "close":
+                break
+            else:
+                raise KeyError("invalid vector env command: {}".format(cmd))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        env.close()
+        remote.close()
+
+
 @Registers.env
 class VectorAtariEnv(Environment):
-    """Vectorize atari environment to speedup."""
+    """
+    Vectorize atari environment to speedup.
+
+    With `vector_mode: subprocess` in env_info, each sub-env runs within
+    a worker process, and all of them write their observations into one
+    shared (vector_env_size, dim, dim, 4) uint8 array.
+    """
 
     def init_env(self, env_info):
         """Create multi-env as a vector."""
         self.vector_env_size = env_info.get("vector_env_size")
         assert self.vector_env_size is not None, "vector env must assign 'env_num'."
+        self.vector_mode = env_info.get("vector_mode", "serial")
+        assert self.vector_mode in ("serial", "subprocess"), \
+            "invalid vector_mode: {}".format(self.vector_mode)
+
+        dim = env_info.get("dim", 84)
+        self.obs_shape = (dim, dim, 4)
 
         self.env_vector = list()
+        if self.vector_mode == "subprocess":
+            self._start_workers(env_info)
+            return
+
+        # the sub-envs stack frames without copy, the batch array is the only copy.
         for _ in range(self.vector_env_size):
-            self.env_vector.append(AtariEnv(env_info))
+            self.env_vector.append(AtariEnv(dict(env_info, frame_stack_mode="view")))
+
+    def _start_workers(self, env_info):
+        obs_shape = (self.vector_env_size, ) + self.obs_shape
+        shared_obs = RawArray(c_uint8, int(np.prod(obs_shape)))
+        self.obs_buf = np.frombuffer(shared_obs, dtype=np.uint8).reshape(obs_shape)
+
+        self.remotes, self.workers = list(), list()
+        for env_id in range(self.vector_env_size):
+            remote, work_remote = Pipe()
+            worker = Process(target=_vector_env_worker,
+                             args=(work_remote, remote, env_info, env_id, shared_obs, obs_shape))
+            worker.daemon = True
+            worker.start()
+            work_remote.close()
+            self.remotes.append(remote)
+            self.workers.append(worker)
 
     def reset(self):
         """Reset each env within vector."""
-        state = [env.reset() for env in self.env_vector]
+        if self.vector_mode == "subprocess":
+            for remote in self.remotes:
+                remote.send(("reset", None))
+            for remote in self.remotes:
+                remote.recv()
+            # copy out, the shared array will be rewritten by the next step
+            state = self.obs_buf.copy()
+        else:
+            state = np.stack([env.reset() for env in self.env_vector])
         self.init_state = state
 
         return state
 
     def step(self, action, agent_index=0):
         """
-        Step in order.
+        Step in order, or all together within the worker processes.
 
         :param action:
         :param agent_index:
         :return:
         """
-        batch_obs, batch_reward, batch_done, batch_info = list(), list(), list(), list()
+        if self.vector_mode == "subprocess":
+            return self._step_workers(action)
+
+        batch_obs = np.empty((self.vector_env_size, ) + self.obs_shape, dtype=np.uint8)
+        batch_reward, batch_done, batch_info = list(), list(), list()
         for env_id in range(self.vector_env_size):
             obs, reward, done, info = self.env_vector[env_id].step(action[env_id])
             if done:
                 obs = self.env_vector[env_id].reset()
 
-            batch_obs.append(obs)
+            batch_obs[env_id] = obs
             batch_reward.append(reward)
             batch_done.append(done)
             batch_info.append(info)
 
         return batch_obs, batch_reward, batch_done, batch_info
 
+    def _step_workers(self, action):
+        for env_id, remote in enumerate(self.remotes):
+            remote.send(("step", action[env_id]))
+
+        batch_reward, batch_done, batch_info = list(), list(), list()
+        for remote in self.remotes:
+            reward, done, info = remote.recv()
+            batch_reward.append(reward)
+            batch_done.append(done)
+            batch_info.append(info)
+
+        return self.obs_buf.copy(), batch_reward, batch_done, batch_info
+
     def get_env_info(self):
         """
         Return environment's basic information.
@@ -161,4 +263,11 @@ class VectorAtariEnv(Environment):
         return env_info
 
     def close(self):
+        if self.vector_mode == "subprocess":
+            for remote in self.remotes:
+                remote.send(("close", None))
+            for worker in self.workers:
+                worker.join()
+            return
+
         [env.close() for env in self.env_vector]
@@ -31,6 +31,8 @@ class AtariBaseEnv(Environment, gym.Wrapper):
         gym.Wrapper.__init__(self, env)
 
         self.state_buffer = np.zeros((2, ) + env.observation_space.shape, dtype=np.uint8)
+        # overwritten each step, the frame stacker copies it out at once.
+        self.max_frame = np.zeros(env.observation_space.shape, dtype=np.uint8)
         self.repeat_times = 4
         self.max_noop_times = 30
         self.noop_action = 0
@@ -63,9 +65,9 @@ class AtariBaseEnv(Environment, gym.Wrapper):
             if done:
                 break
 
-        max_frame = self.state_buffer.max(axis=0)
+        np.maximum(self.state_buffer[0], self.state_buffer[1], out=self.max_frame)
 
-        return max_frame, total_reward, done, info
+        return self.max_frame, total_reward, done, info
 
 
 class AtariRealDone(Environment, gym.Wrapper):
@@ -0,0 +1,117 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""Stack the latest frames of an image env within preallocated buffers."""
+import sys
+
+import numpy as np
+
+FRAME_STACK_MODES = ("copy", "inplace", "view", "newest")
+
+
+class FrameStack(object):
+    """
+    Keep the latest `stack_size` frames, stacked along the channel axis.
+
+    The stack, oldest to newest, lives in one preallocated array. When a whole
+    pixel stack fits in one machine word (e.g. 4 uint8 gray frames), the array
+    is rolled in place by a shift on its word view, and only the newest frame
+    is written. Otherwise, frames are kept in a ring of contiguous frames and
+    concatenated into the array. The stack returned by `push` and `reset`
+    depends on `mode`:
+        copy: a new array, safe to keep across steps.
+        inplace: the array owned by the stacker, updated in place each step.
+        view: a read-only view of that array, valid until the next push.
+        newest: (newest frame, stack index), the index holds the sequence
+            ids of the stacked frames, -1 for the blank frames after reset,
+            so the transport and replay could deduplicate.
+    """
+
+    def __init__(self, frame_shape, stack_size=4, mode="copy", dtype=np.uint8):
+        assert mode in FRAME_STACK_MODES, "invalid frame stack mode: {}".format(mode)
+        self.frame_shape = tuple(frame_shape)
+        self.stack_size = stack_size
+        self.mode = mode
+        self._channel = self.frame_shape[-1]
+
+        dtype = np.dtype(dtype)
+        self._stack = np.zeros(self.frame_shape[:-1] + (stack_size * self._channel, ), dtype=dtype)
+        self._ids = np.full(stack_size, -1, dtype=np.int64)
+        self._count = 0
+
+        word_size = stack_size * self._channel * dtype.itemsize
+        if dtype.kind == "u" and word_size in (1, 2, 4, 8):
+            self._words = self._stack.view("u{}".format(word_size))[..., 0]
+            self._shift = self._channel * dtype.itemsize * 8
+            self._frames = None
+        else:
+            self._words = None
+            self._frames = np.zeros((stack_size, ) + self.frame_shape, dtype=dtype)
+            self._slot = stack_size - 1
+
+    def clear(self):
+        """Fill the stack with blank frames."""
+        self._stack.fill(0)
+        self._ids.fill(-1)
+        if self._frames is not None:
+            self._frames.fill(0)
+
+    def reset(self, frame):
+        """Restart the stack with blank frames and `frame` as the newest."""
+        self.clear()
+        return self.push(frame)
+
+    def push(self, frame):
+        """Append the newest frame, drop the oldest one, return the stack."""
+        if self._words is not None:
+            # the oldest frame is in the lowest address bytes.
+            if sys.byteorder == "little":
+                np.right_shift(self._words, self._shift, out=self._words)
+            else:
+                np.left_shift(self._words, self._shift, out=self._words)
+            self._stack[..., -self._channel:] = frame
+        else:
+            self._slot = (self._slot + 1) % self.stack_size
+            self._frames[self._slot] = frame
+            order = np.arange(self._slot + 1, self._slot + 1 + self.stack_size) % self.stack_size
+            np.concatenate([self._frames[_slot] for _slot in order], -1, out=self._stack)
+
+        self._ids[:-1] = self._ids[1:]
+        self._ids[-1] = self._count
+        self._count += 1
+        return self.stack()
+
+    def newest(self):
+        return np.array(self._stack[..., -self._channel:])
+
+    def stack_index(self):
+        """Sequence ids of the stacked frames, oldest first."""
+        return self._ids.copy()
+
+    def stack(self):
+        """Return the current stack in the format of `mode`."""
+        if self.mode == "copy":
+            return self._stack.copy()
+        if self.mode == "inplace":
+            return self._stack
+        if self.mode == "view":
+            view = self._stack.view()
+            view.flags.writeable = False
+            return view
+        return self.newest(), self.stack_index()
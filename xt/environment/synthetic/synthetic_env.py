@@ -0,0 +1,89 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Synthetic environment for the throughput benchmark.
+
+The observations are preallocated random arrays, the step cost could be
+set to mimic a simulator, so the pipeline throughput is measured without
+gym or any real simulator.
+"""
+import time
+
+import numpy as np
+
+from xt.environment.environment import Environment
+from zeus.common.util.register import Registers
+
+
+@Registers.env
+class SyntheticEnv(Environment):
+    """Fixed shape observations, with discrete actions and fixed episodes."""
+
+    def init_env(self, env_info):
+        """
+        Create the synthetic environment.
+
+        :param env_info: config with the keys,
+            obs_shape: observation shape, default [4];
+            obs_dtype: observation dtype, default float32;
+            action_dim: discrete action number, default 2;
+            episode_len: steps of each episode, default 200;
+            step_ms: busy time of each step to mimic a simulator, default 0.
+        """
+        self.obs_shape = tuple(env_info.get("obs_shape", [4]))
+        self.obs_dtype = np.dtype(env_info.get("obs_dtype", "float32"))
+        self.action_dim = env_info.get("action_dim", 2)
+        self.episode_len = env_info.get("episode_len", 200)
+        self.step_cost = env_info.get("step_ms", 0) / 1000.
+        self.action_type = "Categorical"
+
+        # a small pool of observations, cycled without allocation per step
+        rand = np.random.RandomState(env_info.get("seed", 0))
+        if self.obs_dtype == np.uint8:
+            self._obs_pool = rand.randint(0, 255, (8,) + self.obs_shape, dtype=np.uint8)
+        else:
+            self._obs_pool = rand.rand(*((8,) + self.obs_shape)).astype(self.obs_dtype)
+        self._elapsed_step = 0
+        return None
+
+    def reset(self):
+        """Reset the episode, return the first observation."""
+        self._elapsed_step = 0
+        self.init_state = self._obs_pool[0]
+        return self.init_state
+
+    def step(self, action, agent_index=0):
+        """
+        Run one step, busy waiting for `step_ms` if set.
+
+        :return: state, reward, done, info
+        """
+        if self.step_cost:
+            deadline = time.time() + self.step_cost
+            while time.time() < deadline:
+                pass
+
+        self._elapsed_step += 1
+        state = self._obs_pool[self._elapsed_step % len(self._obs_pool)]
+        done = self._elapsed_step >= self.episode_len
+        return state, 1.0, done, {}
+
+    def close(self):
+        """Nothing to close."""
@@ -33,6 +33,7 @@ from absl import logging
 from xt.agent import agent_builder
 from xt.algorithm import alg_builder
 from xt.environment import env_builder
+from xt.framework.weights_codec import WeightsDecoder, is_encoded_weights
 from zeus.common.ipc.message import message
 from zeus.common.util.profile_stats import AgentGroupStats
 
@@ -141,6 +142,7 @@ class AgentGroup(object):
         # That agent belong with an AgentGroup will share the same environment.
         self.env_id = env_para.get("env_id", 0)
         self.restore_count = 0
+        self._weights_decoder = WeightsDecoder()
 
         self.fill_env_para(env_para, agent_para)
         self.env = env_builder(**env_para)
@@ -271,9 +273,12 @@ class AgentGroup(object):
         # fixme: remove model name file, and make sense to multi-agent.
         if is_id:
             weights = self.buf_stub.get(weights)
-            model_weights = {"data": weights}
-        else:
-            model_weights = {"data": weights}
+        if is_encoded_weights(weights):
+            # apply the delta in place on the weights held
+            weights = self._weights_decoder.decode(weights)
+            if weights is None:
+                return
+        model_weights = {"data": weights}
         # logging.info("model_weights: {}".format(model_weights))
         # logging.info("explorer-{} restore weights: {}".format(self.env_id, type(model_weights)))
         for alg in self.algs:
@@ -307,6 +312,11 @@ class AgentGroup(object):
                 alg.alg_name, model_name))
             alg.restore(model_name)
 
+    @property
+    def weights_version(self):
+        """Version of the weights held, None without versioned weights."""
+        return self._weights_decoder.version
+
     def clear_trajectories(self):
         self.trajectories = list()
 
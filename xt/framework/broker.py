@@ -18,6 +18,7 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 """Broker setup the message tunnel between learner and explorer."""
+import asyncio
 import os
 import tracemalloc
 import threading
@@ -28,7 +29,6 @@ from multiprocessing import Queue, Process, Manager
 import psutil
 import lz4.frame
 import setproctitle
-from pyarrow import deserialize, serialize
 from absl import logging
 import pprint
 from collections import defaultdict
@@ -37,15 +37,28 @@ from xt.framework.evaluator import Evaluator
 from xt.framework.broker_stats import BrokerStats
 from zeus.common.ipc.uni_comm import UniComm
 from zeus.common.ipc.share_buffer import ShareBuf
+from zeus.common.ipc.shm_store import StoreFullError
+from zeus.common.ipc.serialize import serialize, deserialize, serialize_to_buffer
 from zeus.common.ipc.message import message, get_msg_info, set_msg_data, get_msg_data
 from zeus.common.util.profile_stats import TimerRecorder, show_memory_stats
 from zeus.common.util.printer import debug_within_interval
 from zeus.common.util.default_xt import DebugConf
-from zeus.common.util.get_xt_config import init_main_broker_debug_kwargs, get_pbt_set
+from zeus.common.util.get_xt_config import init_main_broker_debug_kwargs
 
 
 class Controller(object):
-    """Controller Manage Broker within Learner."""
+    """
+    Controller Manage Broker within Learner.
+
+    Messages are routed within one asyncio event loop, by the dispatch
+    tables keyed on cmd. The local queues are blocking, each is read by
+    a thread which hands the messages into the loop.
+    """
+
+    # pending local messages, the local senders wait over it.
+    max_pending_msg = 64
+    # seconds to wait the object store space of a local comm, before give up.
+    put_buf_timeout = 10.0
 
     def __init__(self, node_config_list):
         self.node_config_list = node_config_list
@@ -66,6 +79,12 @@ class Controller(object):
         self.recv_local_q = dict()  # UniComm("LocalMsg")
         self.send_local_q = dict()
 
+        # {cmd: coroutine function}, the message from broker and local
+        self._broker_routes = dict()
+        self._local_routes = {"close": self._close_brokers}
+        self._recv_broker_sock = None
+        self._send_broker_sock = list()
+
         self.data_manager = Manager()
         self._data_store = dict()
 
@@ -77,14 +96,10 @@ class Controller(object):
             tracemalloc.start()
 
     def start_data_transfer(self):
-        """Start transfer data and other thread."""
-        data_transfer_thread = threading.Thread(target=self.recv_broker_task)
-        data_transfer_thread.setDaemon(True)
-        data_transfer_thread.start()
-
-        data_transfer_thread = threading.Thread(target=self.recv_local)
-        data_transfer_thread.setDaemon(True)
-        data_transfer_thread.start()
+        """Start the event loop of message routing, within a daemon thread."""
+        route_thread = threading.Thread(target=self._run_route_loop)
+        route_thread.setDaemon(True)
+        route_thread.start()
 
         # alloc_thread = threading.Thread(target=self.alloc_actor)
         # alloc_thread.setDaemon(True)
@@ -94,23 +109,54 @@ class Controller(object):
     def tasks(self):
         return self._main_task
 
-    def recv_broker_task(self):
-        """Receive remote train data in sync mode."""
+    def _run_route_loop(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(self._route_main())
+
+    async def _route_main(self):
+        """Route the messages between brokers and local learners."""
+        self._recv_broker_sock = self.recv_broker.comm.to_async()
+        self._send_broker_sock = [_s.comm.to_async() for _s in self.send_broker]
+
+        local_msg_q = asyncio.Queue(maxsize=self.max_pending_msg)
+        loop = asyncio.get_event_loop()
+        for cmd, recv_q in self.recv_local_q.items():
+            pump_thread = threading.Thread(target=self._pump_local_msg,
+                                           args=(loop, recv_q, local_msg_q, "predict" in cmd))
+            pump_thread.setDaemon(True)
+            pump_thread.start()
+
+        await asyncio.gather(self._route_broker_msg(), self._route_local_msg(local_msg_q))
+
+    @staticmethod
+    def _pump_local_msg(loop, recv_q, local_msg_q, raw_queue):
+        """Block on the local queue, and put the messages into the event loop."""
         while True:
-            ctr_info, recv_data = self.recv_broker.recv_bytes()
+            recv_data = recv_q.get() if raw_queue else recv_q.recv(block=True)
+            # wait while the loop has too many pending messages
+            asyncio.run_coroutine_threadsafe(local_msg_q.put(recv_data), loop).result()
+            if get_msg_info(recv_data, "cmd") in ["close"]:
+                break
+
+    async def _route_broker_msg(self):
+        """Receive remote train data, and deliver to local learner."""
+        while True:
+            frames = await self._recv_broker_sock.recv_multipart(copy=False)
             _t0 = time.time()
-            ctr_info = deserialize(ctr_info)
+            ctr_info = deserialize(frames[0].buffer)
+            recv_data = [_frame.buffer for _frame in frames[1:]]
             compress_flag = ctr_info.get('compress_flag', False)
             if compress_flag:
-                recv_data = lz4.frame.decompress(recv_data)
+                recv_data = lz4.frame.decompress(recv_data[0])
             recv_data = deserialize(recv_data)
             recv_data = {'ctr_info': ctr_info, 'data': recv_data}
             self.metric.append(recv=time.time() - _t0)
 
             cmd = get_msg_info(recv_data, "cmd")
-            send_cmd = self.send_local_q.get(cmd)
-            if send_cmd:
-                send_cmd.send(recv_data)
+            route = self._broker_routes.get(cmd)
+            if route:
+                await route(recv_data)
             else:
                 logging.warning("invalid cmd: {}, with date: {}".format(
                     cmd, recv_data))
@@ -118,65 +164,57 @@ class Controller(object):
             # report log
             self.metric.report_if_need(field_sets=("send", "recv"))
 
-    def _yield_local_msg(self):
-        """Yield local msg received."""
+    async def _route_local_msg(self, local_msg_q):
+        """Route local cmd, to the local learner registered or the brokers."""
+        debug_kwargs = init_main_broker_debug_kwargs()
         while True:
-            # polling with whole learner with no wait.
-            for cmd, recv_q in self.recv_local_q.items():
-                if 'predict' in cmd:
-                    try:
-                        recv_data = recv_q.get(block=False)
-                    except:
-                        recv_data = None
-                else:
-                    recv_data = recv_q.recv(block=False)
-                if recv_data:
-                    yield recv_data
-                else:
-                    time.sleep(0.002)
-
-    def recv_local(self):
-        """Receive local cmd."""
-        # split the case between single receive queue and pbt
-        if len(self.recv_local_q) == 1:
-            single_stub, = self.recv_local_q.values()
-        else:
-            single_stub = None
+            recv_data = await local_msg_q.get()
+            cmd = get_msg_info(recv_data, "cmd")
 
-        kwargs = init_main_broker_debug_kwargs()
-        yield_func = self._yield_local_msg()
+            route = self._local_routes.get(cmd)
+            if route:
+                await route(recv_data)
+                if cmd in ["close"]:
+                    break
+                continue
 
-        while True:
-            if single_stub:
-                recv_data = single_stub.recv(block=True)
-            else:
-                recv_data = next(yield_func)
+            _t1 = time.time()
+            await self._to_broker(recv_data)
+            self.metric.append(send=time.time() - _t1)
+            debug_within_interval(**debug_kwargs)
 
-            cmd = get_msg_info(recv_data, "cmd")
-            if cmd in ["close"]:
-                self.close(recv_data)
-                break
+    async def _to_local(self, recv_data):
+        """
+        Send to the local comm without blocking the event loop.
 
-            if cmd in self.send_local_q.keys():
-                # print(self.send_local_q.keys())
-                self.send_local_q[cmd].send(recv_data)
-                # logging.debug("recv: {} with cmd-{}".format(
-                #     recv_data["data"], cmd))
-            else:
-                _t1 = time.time()
-                broker_id = get_msg_info(recv_data, "broker_id")
-                _cmd = get_msg_info(recv_data, "cmd")
-                # logging.debug("ctr recv:{} with cmd:'{}' to broker_id: <{}>".format(
-                #     type(recv_data["data"]), _cmd, broker_id))
-                # self.metric.append(debug=time.time() - _t1)
-
-                if broker_id == -1:
-                    for broker_item, node_info in zip(self.send_broker, self.node_config_list):
-                        broker_item.send(recv_data['ctr_info'], recv_data['data'])
-                else:
-                    self.send_broker[broker_id].send(recv_data['ctr_info'], recv_data['data'])
-                self.metric.append(send=time.time() - _t1)
-                debug_within_interval(**kwargs)
+        The object store behind a ShareByPlasma comm, e.g. the predict one,
+        may be full, retry after a short sleep as the broker does.
+        """
+        cmd = get_msg_info(recv_data, "cmd")
+        deadline = time.time() + self.put_buf_timeout
+        delay = 0.001
+        while True:
+            try:
+                return self.send_local_q[cmd].send(recv_data, block=False)
+            except StoreFullError:
+                if time.time() > deadline:
+                    raise
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    async def _to_broker(self, recv_data):
+        """Send to the broker with broker_id, or whole brokers with -1."""
+        broker_id = get_msg_info(recv_data, "broker_id")
+        msg = [serialize_to_buffer(recv_data['ctr_info'])]
+        msg.extend(serialize(recv_data['data']))
+
+        if broker_id == -1:
+            send_socks = self._send_broker_sock
+        else:
+            send_socks = [self._send_broker_sock[broker_id]]
+        for _sock in send_socks:
+            # wait within the high water mark of zmq, as the back-pressure
+            await _sock.send_multipart(msg, copy=False)
 
     def add_task(self, learner_obj):
         """Add learner task into Broker."""
@@ -197,6 +235,8 @@ class Controller(object):
 
         if direction == "send":
             self.send_local_q.update({cmd: comm_q})
+            self._broker_routes.update({cmd: self._to_local})
+            self._local_routes.update({cmd: self._to_local})
             return self.send_local_q[cmd]
         elif direction == "recv":
             self.recv_local_q.update({cmd: comm_q})
@@ -226,9 +266,10 @@ class Controller(object):
         for q in self.send_broker:
             q.send(alloc_cmd['ctr_info'], alloc_cmd['data'])
 
-    def close(self, close_cmd):
-        for broker_item in self.send_broker:
-            broker_item.send(close_cmd['ctr_info'], close_cmd['data'])
+    async def _close_brokers(self, close_cmd):
+        for _sock in self._send_broker_sock:
+            await _sock.send_multipart([serialize_to_buffer(close_cmd['ctr_info'])]
+                                       + serialize(close_cmd['data']), copy=False)
 
         # close ctx may mismatch the socket, use the os.exit last.
         # self.recv_broker.close()
@@ -274,7 +315,17 @@ class Controller(object):
 
 
 class Broker(object):
-    """Broker manage the Broker within Explorer of each node."""
+    """
+    Broker manage the Broker within Explorer of each node.
+
+    The messages from controller are dispatched by cmd, and the rings of
+    explorers are watched as readers, within one asyncio event loop.
+    """
+
+    # pending explorer messages to controller, the rings pause over it.
+    max_pending_msg = 64
+    # seconds to wait the share buffer space, before give up.
+    put_buf_timeout = 10.0
 
     def __init__(self, ip_addr, broker_id, push_port, pull_port):
         self.broker_id = broker_id
@@ -286,11 +337,10 @@ class Broker(object):
             "CommByZmq", type="PULL", addr=ip_addr, port=pull_port
         )
 
-        self.recv_explorer_q_ready = False
-        # record the information between explorer and learner
-        #     {"learner_id": UniComm("ShareByPlasma")}
-        # add {"default_eval": UniComm("ShareByPlasma")}
-        self.explorer_share_qs = {"EVAL0": None}
+        # record the ring from each explorer and evaluator
+        #     {"explorer_id": UniComm("ShareByRing")}
+        # add {"test_id": UniComm("ShareByRing")}
+        self.explorer_share_qs = dict()
 
         # {"recv_id": receive_count}  --> {("recv_id", "explorer_id"): count}
         self.explorer_stats = defaultdict(int)
@@ -305,176 +355,162 @@ class Broker(object):
         # ~4M, impala atari model
         self._buf = ShareBuf(live=0, size=400000000, max_keep=94, start=True)
 
-    def start_data_transfer(self):
-        """Start transfer data and other thread."""
-        data_transfer_thread = threading.Thread(target=self.recv_controller_task)
-        data_transfer_thread.start()
-
-        data_transfer_thread = threading.Thread(target=self.recv_explorer)
-        data_transfer_thread.start()
-
-    def _setup_share_qs_firstly(self, config_info):
-        """Setup only once time."""
-        if self.recv_explorer_q_ready:
-            return
-
-        _use_pbt, pbt_size, env_num, _ = get_pbt_set(config_info)
-        plasma_size = config_info.get("plasma_size", 100000000)
-
-        for i in range(pbt_size):
-            plasma_path = "/tmp/plasma{}T{}".format(os.getpid(), i)
-            self.explorer_share_qs["T{}".format(i)] = UniComm("ShareByPlasma",
-                                                              size=plasma_size,
-                                                              path=plasma_path)
-
-            # print("broker pid:", os.getpid())
-            # self.explorer_share_qs["T{}".format(i)].comm.connect()
-
-        # if pbt, eval process will share single server
-        # else, share with T0
-        if not _use_pbt:
-            self.explorer_share_qs["EVAL0"] = self.explorer_share_qs["T0"]
-        else:  # use pbt, server will been set within create_evaluator
-            self.explorer_share_qs["EVAL0"] = None
-
-        self.recv_explorer_q_ready = True
+        # {cmd: coroutine function}, distribute to explorers as default
+        self._routes = {
+            "close": self._close_route,
+            "create_explorer": self._create_explorer_route,
+            "create_evaluator": self._create_evaluator_route,
+            "increase": self._alloc_route,
+            "decrease": self._alloc_route,
+            "eval": self._eval_route,
+            "explore": self._explore_route,
+        }
+        self._loop = None
+        self._send_controller_sock = None
+        self._to_controller_q = None
+        self._paused_rings = dict()
 
-    def recv_controller_task(self):
-        """Recv remote train data in sync mode."""
+    def start_data_transfer(self):
+        """Start the event loop of message routing."""
+        route_thread = threading.Thread(target=self._run_route_loop)
+        route_thread.start()
+
+    def _run_route_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._route_main())
+
+    async def _route_main(self):
+        """Route the messages between controller and explorers."""
+        recv_controller_sock = self.recv_controller_q.comm.to_async()
+        self._send_controller_sock = self.send_controller_q.comm.to_async()
+        self._to_controller_q = asyncio.Queue(maxsize=self.max_pending_msg)
+
+        await asyncio.gather(self._route_controller_msg(recv_controller_sock),
+                             self._send_to_controller())
+
+    async def _route_controller_msg(self, recv_controller_sock):
+        """Receive the message from controller, dispatch it with cmd."""
         while True:
-            # recv, data will deserialize with pyarrow default
-            # recv_data = self.recv_controller_q.recv()
-            ctr_info, data = self.recv_controller_q.recv_bytes()
-            recv_data = {'ctr_info': deserialize(ctr_info), 'data': deserialize(data)}
+            frames = await recv_controller_sock.recv_multipart(copy=False)
+            # data keeps the raw frames for the share buffer
+            data = [_frame.buffer for _frame in frames[1:]]
+            recv_data = {'ctr_info': deserialize(frames[0].buffer), 'data': deserialize(data)}
 
             cmd = get_msg_info(recv_data, "cmd")
-            if cmd in ["close"]:
-                self.close(recv_data)
+            route = self._routes.get(cmd, self._to_explorers)
+            await route(recv_data, data)
 
-            if cmd in ["create_explorer"]:
-                config_set = recv_data["data"]
-                # setup plasma only one times!
-                self._setup_share_qs_firstly(config_set)
+    async def _close_route(self, recv_data, data):
+        self.close(recv_data)
 
-                config_set.update({"share_path": self._buf.get_path()})
-                self.create_explorer(config_set)
+    async def _create_explorer_route(self, recv_data, data):
+        config_set = recv_data["data"]
+        config_set.update({"share_path": self._buf.get_path()})
+        self.create_explorer(config_set)
 
-                # update the buffer live attribute, explorer num as default.
-                # self._buf.plus_one_live()
-                continue
-            if cmd in ["create_evaluator"]:
-                # evaluator share single plasma.
-                config_set = recv_data["data"]
-
-                if not self.explorer_share_qs["EVAL0"]:
-                    use_pbt, _, _, _ = get_pbt_set(config_set)
-                    if use_pbt:
-                        plasma_size = config_set.get("plasma_size", 100000000)
-                        plasma_path = "/tmp/plasma{}EVAL0".format(os.getpid())
-                        self.explorer_share_qs["EVAL0"] = UniComm("ShareByPlasma",
-                                                                  size=plasma_size,
-                                                                  path=plasma_path)
-
-                config_set.update({"share_path": self._buf.get_path()})
-                logging.debug("create evaluator with config:{}".format(config_set))
-
-                self.create_evaluator(config_set)
-                # self._buf.plus_one_live()
-                continue
+    async def _create_evaluator_route(self, recv_data, data):
+        config_set = recv_data["data"]
+        config_set.update({"share_path": self._buf.get_path()})
+        logging.debug("create evaluator with config:{}".format(config_set))
 
-            if cmd in ["increase", "decrease"]:
-                self.alloc(cmd)
-                continue
+        self.create_evaluator(config_set)
 
-            if cmd in ("eval",):  # fixme: merge into explore
-                test_id = get_msg_info(recv_data, "test_id")
-                self.send_explorer_q[test_id].put(recv_data)
-                continue
+    async def _alloc_route(self, recv_data, data):
+        self.alloc(get_msg_info(recv_data, "cmd"))
 
-            # last job, distribute weights/model_name from controller
-            explorer_id = get_msg_info(recv_data, "explorer_id")
-            if not isinstance(explorer_id, list):
-                explorer_id = [explorer_id]
+    async def _eval_route(self, recv_data, data):
+        # fixme: merge into explore
+        test_id = get_msg_info(recv_data, "test_id")
+        self.send_explorer_q[test_id].put(recv_data)
 
-            _t0 = time.time()
+    async def _explore_route(self, recv_data, data):
+        # here, only handle explore weights
+        buf_id = await self._put_share_buf(data)
+        # replace weight with id
+        recv_data.update({"data": buf_id})
+        await self._to_explorers(recv_data, data)
 
-            if cmd in ("explore", ):  # todo: could mv to first priority.
-                # here, only handle explore weights
-                buf_id = self._buf.put(data)
-                # replace weight with id
-                recv_data.update({"data": buf_id})
-            # predict_reply
-            # e.g, {'ctr_info': {'broker_id': 0, 'explorer_id': 4, 'agent_id': -1,
-            # 'cmd': 'predict_reply'}, 'data': 0}
-
-            for _eid in explorer_id:
-                if _eid > -1:
-                    self.send_explorer_q[_eid].put(recv_data)
-                elif _eid > -2:  # -1 # whole explorer, contains evaluator!
-                    for qid, send_q in self.send_explorer_q.items():
-                        if isinstance(qid, str) and "test" in qid:
-                            # logging.info("continue test: ", qid, send_q)
-                            continue
-
-                        send_q.put(recv_data)
-                else:
-                    raise KeyError("invalid explore id: {}".format(_eid))
-
-            self._metric.append(send=time.time() - _t0)
-            self._metric.report_if_need()
-
-    @staticmethod
-    def _handle_data(ctr_info, data, explorer_stub, broker_stub):
-        object_id = ctr_info['object_id']
-        ctr_info_data = ctr_info['ctr_info_data']
-        broker_stub.send_bytes(ctr_info_data, data)
-        explorer_stub.delete(object_id)
-
-    def _step_explorer_msg(self, use_single_stub):
-        """Yield local msg received."""
-
-        if use_single_stub:
-            # whole explorer share single plasma
-            recv_id = "T0"
-            single_stub = self.explorer_share_qs[recv_id]
-        else:
-            single_stub, recv_id = None, None
+    async def _put_share_buf(self, data):
+        """
+        Put into the share buffer without blocking the event loop.
 
+        While the store is full, retry after a short sleep, the controller
+        messages are not read meanwhile, and the explorer rings keep going.
+        """
+        deadline = time.time() + self.put_buf_timeout
+        delay = 0.001
         while True:
-            if use_single_stub:
-                ctr_info, data = single_stub.recv_bytes(block=True)
-                self._handle_data(ctr_info, data, single_stub, self.send_controller_q)
-                yield recv_id, ctr_info
-            else:
-                # polling with whole learner with no wait.
-                for recv_id, recv_q in self.explorer_share_qs.items():
-                    if not recv_q:  # handle eval dummy q
+            try:
+                return self._buf.put(data, timeout=0)
+            except StoreFullError:
+                if time.time() > deadline:
+                    raise
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.05)
+
+    async def _to_explorers(self, recv_data, data):
+        """Distribute weights/model_name and predict_reply from controller."""
+        # predict_reply
+        # e.g, {'ctr_info': {'broker_id': 0, 'explorer_id': 4, 'agent_id': -1,
+        # 'cmd': 'predict_reply'}, 'data': 0}
+        explorer_id = get_msg_info(recv_data, "explorer_id")
+        if not isinstance(explorer_id, list):
+            explorer_id = [explorer_id]
+
+        _t0 = time.time()
+        for _eid in explorer_id:
+            if _eid > -1:
+                self.send_explorer_q[_eid].put(recv_data)
+            elif _eid > -2:  # -1 # whole explorer, contains evaluator!
+                for qid, send_q in self.send_explorer_q.items():
+                    if isinstance(qid, str) and "test" in qid:
+                        # logging.info("continue test: ", qid, send_q)
                         continue
 
-                    ctr_info, data = recv_q.recv_bytes(block=False)
-                    if not ctr_info:  # this receive q without ready!
-                        time.sleep(0.002)
-                        continue
+                    send_q.put(recv_data)
+            else:
+                raise KeyError("invalid explore id: {}".format(_eid))
+
+        self._metric.append(send=time.time() - _t0)
+        self._metric.report_if_need()
+
+    def _watch_ring(self, recv_id, ring):
+        """Read the ring while its fd is ready, within the event loop."""
+        self._loop.add_reader(ring.fileno(), self._on_ring_ready, recv_id, ring)
 
-                    self._handle_data(ctr_info, data, recv_q, self.send_controller_q)
-                    yield recv_id, ctr_info
+    def _on_ring_ready(self, recv_id, ring):
+        """Read the ring empty, or pause it while the controller falls behind."""
+        while not self._to_controller_q.full():
+            ctr_info, data = ring.recv_bytes(block=False)
+            if not ctr_info:
+                return
+            self._to_controller_q.put_nowait((ring, ctr_info, data))
 
-    def recv_explorer(self):
-        """Recv explorer cmd."""
-        while not self.recv_explorer_q_ready:
-            # wait explorer share buffer ready
-            time.sleep(0.05)
-        # whole explorer share single plasma
-        use_single_flag = True if len(self.explorer_share_qs) == 2 else False
-        yield_func = self._step_explorer_msg(use_single_flag)
+        # the fd has been drained, re-read the ring while resume it.
+        self._loop.remove_reader(ring.fileno())
+        self._paused_rings.update({recv_id: ring})
 
+    async def _send_to_controller(self):
+        """Send the explorer messages to controller."""
         while True:
-            recv_id, _info = next(yield_func)
-            _id = stats_id(_info)
+            ring, ctr_info, data = await self._to_controller_q.get()
+            msg = [ctr_info['ctr_info_data']]
+            msg.extend(data)
+            await self._send_controller_sock.send_multipart(msg, copy=False)
+            ring.delete(ctr_info['object_id'])
+
+            _id = stats_id(ctr_info)
             self.explorer_stats[_id] += 1
             debug_within_interval(logs=dict(self.explorer_stats),
                                   interval=DebugConf.interval_s, human_able=True)
 
+            if self._paused_rings and self._to_controller_q.qsize() < self.max_pending_msg // 2:
+                paused_rings, self._paused_rings = self._paused_rings, dict()
+                for recv_id, paused_ring in paused_rings.items():
+                    self._watch_ring(recv_id, paused_ring)
+                    self._on_ring_ready(recv_id, paused_ring)
+
     def create_explorer(self, config_info):
         """Create explorer."""
         env_para = config_info.get("env_para")
@@ -483,14 +519,13 @@ class Broker(object):
         start_core = config_info.get("start_core", 1)
         env_id = env_para.get("env_id")  # used for explorer id.
 
-        ref_learner_id = config_info.get("learner_postfix")
-
         send_explorer = Queue()
+        send_broker = UniComm("ShareByRing", size=config_info.get("ring_size", 32000000))
         explorer = Explorer(
             config_info,
             self.broker_id,
             recv_broker=send_explorer,
-            send_broker=self.explorer_share_qs[ref_learner_id],
+            send_broker=send_broker,
         )
 
         p = Process(target=explorer.start)
@@ -502,18 +537,21 @@ class Broker(object):
             _p.cpu_affinity([start_core + env_id])
 
         self.send_explorer_q.update({env_id: send_explorer})
+        self.explorer_share_qs.update({env_id: send_broker})
+        self._watch_ring(env_id, send_broker)
         self.explore_process.update({env_id: p})
 
     def create_evaluator(self, config_info):
         """Create evaluator."""
         test_id = config_info.get("test_id")
         send_evaluator = Queue()
+        send_broker = UniComm("ShareByRing", size=config_info.get("ring_size", 32000000))
 
         evaluator = Evaluator(
             config_info,
             self.broker_id,
             recv_broker=send_evaluator,
-            send_broker=self.explorer_share_qs["EVAL0"],
+            send_broker=send_broker,
         )
         p = Process(target=evaluator.start)
         p.start()
@@ -531,6 +569,8 @@ class Broker(object):
             core_set += 1
 
         self.send_explorer_q.update({test_id: send_evaluator})
+        self.explorer_share_qs.update({test_id: send_broker})
+        self._watch_ring(test_id, send_broker)
         self.explore_process.update({test_id: p})
 
     def alloc(self, actor_status):
@@ -566,7 +606,10 @@ class Broker(object):
         # self.send_controller_q.close()
         # self.recv_controller_q.close()
 
-        os.system("pkill plasma -g " + str(os.getpgid(0)))
+        # the creator unlinks the shared memory of the weights buffer
+        for _, share_q in self.explorer_share_qs.items():
+            share_q.close()
+        self._buf.close()
         os._exit(0)
 
     def start(self):
@@ -0,0 +1,147 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Asynchronous checkpoint writer for the learner.
+
+The learner hands a host copy of its weights to `submit`, and goes on
+training. A single background thread serializes the checkpoints in the
+order of submitting, writes each into a temp file and renames it over the
+target, so a reader never sees a partial checkpoint. The saved files are
+tracked within an in-memory index per directory, which prunes the oldest
+beyond `max_to_keep`, without globbing the directory on every save.
+"""
+import glob
+import os
+import threading
+from collections import deque
+from queue import Queue
+from time import time
+
+import numpy as np
+from absl import logging
+
+from zeus.common.util.profile_stats import TimerRecorder
+
+TMP_SUFFIX = ".tmp"
+
+
+class CheckpointWriter(object):
+    """Write the checkpoints within a background thread, in submit order."""
+
+    def __init__(self, max_to_keep=100, max_pending=2, prefix="actor"):
+        """
+        Start the writer thread.
+
+        :param max_to_keep: checkpoint count to keep in each directory,
+            -1 means keep all.
+        :param max_pending: the snapshots could been queued, `submit`
+            blocks while exceeded, to bound the host memory.
+        :param prefix: file prefix of the checkpoints managed by the index.
+        """
+        self.max_to_keep = max_to_keep
+        self.prefix = prefix
+        self._queue = Queue(maxsize=max(1, max_pending))
+        self._index = dict()
+        self._error = None
+        self._closed = False
+        self.metric = TimerRecorder("checkpoint", maxlen=50,
+                                    fields=("learner_save", "write"))
+
+        self._thread = threading.Thread(target=self._run, name="ckpt_writer")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, file_name, weights):
+        """
+        Queue the weights to save into `file_name`.
+
+        :param file_name: target .npz file.
+        :param weights: dict of the host arrays, must not been modified
+            by the caller after submitting.
+        """
+        if self._closed:
+            raise RuntimeError("submit to a closed checkpoint writer")
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        self._queue.put((file_name, weights))
+
+    def flush(self):
+        """Block until all the submitted checkpoints have been written."""
+        self._queue.join()
+
+    def close(self):
+        """Flush the pending checkpoints, and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self.metric.report_if_need()
+
+    def saved_files(self, model_path):
+        """Return the checkpoints kept in `model_path`, oldest first."""
+        return list(self._index_of(model_path))
+
+    def _index_of(self, model_path):
+        model_path = os.path.abspath(model_path)
+        if model_path not in self._index:
+            # seed once with the checkpoints of a previous run
+            exist = glob.glob(os.path.join(model_path, "{}*".format(self.prefix)))
+            exist = [_f for _f in exist if not _f.endswith(TMP_SUFFIX)]
+            self._index[model_path] = deque(sorted(exist))
+        return self._index[model_path]
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                _start = time()
+                self._write(*item)
+                self.metric.append(write=time() - _start)
+                self.metric.report_if_need()
+            except Exception as err:  # keep writing the following checkpoints
+                logging.error("write checkpoint failed: {}".format(err))
+                self._error = err
+            finally:
+                self._queue.task_done()
+
+    def _write(self, file_name, weights):
+        tmp_name = file_name + TMP_SUFFIX
+        with open(tmp_name, "wb") as tmp_file:
+            np.savez(tmp_file, **weights)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_name, file_name)
+
+        index = self._index_of(os.path.dirname(file_name))
+        file_name = os.path.abspath(file_name)
+        if file_name not in index:
+            index.append(file_name)
+        if self.max_to_keep < 0:
+            return
+        while len(index) > self.max_to_keep:
+            to_rm = index.popleft()
+            try:
+                os.remove(to_rm)
+            except OSError:
+                pass
@@ -122,6 +122,9 @@ class Explorer(object):
             new_cmd = info_cmd + self.learner_postfix
             set_msg_info(data, broker_id=self.broker_id,
                          explorer_id=self.explorer_id, cmd=new_cmd)
+            # ack the weights version held, for the delta distribution
+            if self.rl_agent:
+                set_msg_info(data, weights_version=self.rl_agent.weights_version)
 
             self.send_broker.send(data)
 
@@ -32,6 +32,9 @@ import setproctitle
 from xt.environment import env_builder
 from xt.framework.trainer import build_alg_with_trainer
 from xt.framework.predictor import Predictor
+from xt.framework.weights_codec import WeightsEncoder
+from xt.framework.checkpoint_writer import CheckpointWriter
+from xt.framework.default_config import DEFAULT_NODE_CONFIG
 from xt.algorithm.pbt import PbtAid
 from zeus.visual.tensorboarder import SummaryBoard
 from zeus.common.util.evaluate_xt import make_workspace_if_not_exist, parse_benchmark_args
@@ -165,6 +168,12 @@ class Learner(object):
         self.train_worker.explorer_ids = self.explorer_ids
         self.train_worker.pbt_aid = self._pbt_aid
 
+        # each broker creates all the explorers of this learner
+        config_info = getattr(self, "config_info", dict())
+        broker_num = len(config_info.get("node_config", DEFAULT_NODE_CONFIG))
+        self.train_worker.register_explorers(
+            range(broker_num), self.explorer_ids or range(config_info.get("env_num", 0)))
+
     def submit_algorithm(self, alg_instance, trainer_obj, shared_buff):
         """Submit an algorithm, to update algorithm instance description."""
         self.alg = alg_instance
@@ -236,6 +245,11 @@ class TrainWorker(object):
         self._explorer_ids = None
         self._pbt_aid = None
         self._train_data_counter = defaultdict(int)
+        self._weights_encoder = WeightsEncoder.from_config(self.alg.alg_config)
+        self._ckpt_writer = None
+        if self.alg.alg_config.get("async_checkpoint", True):
+            self._ckpt_writer = CheckpointWriter(
+                max_to_keep=getattr(getattr(self.alg, "actor", None), "max_to_keep", 100))
 
     @property
     def explorer_ids(self):
@@ -253,6 +267,10 @@ class TrainWorker(object):
     def pbt_aid(self, val):
         self._pbt_aid = val
 
+    def register_explorers(self, broker_ids, explorer_ids):
+        """Register the explorers to receive the weights."""
+        self._weights_encoder.register(broker_ids, explorer_ids)
+
     def _dist_policy(self, weight=None, save_index=-1, dist_cmd="explore"):
         """Distribute model tool."""
         explorer_set = self.explorer_ids
@@ -262,8 +280,9 @@ class TrainWorker(object):
         if isinstance(ctr_info, dict):
             ctr_info = [ctr_info]
 
-        for _ctr in ctr_info:
-            to_send_data = message(weight, cmd=dist_cmd, **_ctr)
+        # full weights, or the delta against the version acked by explorers
+        for _weight, _ctr in self._weights_encoder.encode(weight, ctr_info):
+            to_send_data = message(_weight, cmd=dist_cmd, **_ctr)
             self.model_q.send(to_send_data)
 
     def _handle_eval_process(self, loss):
@@ -337,7 +356,7 @@ class TrainWorker(object):
                         continue
 
             if self._meet_stop():
-                self.stats_deliver.send(self.logger.get_new_info(), block=True)
+                self.stats_deliver.send(self._collect_stats(), block=True)
                 break
 
             if not self.alg.train_ready(self.elapsed_episode, dist_dummy_model=self._dist_policy):
@@ -352,8 +371,7 @@ class TrainWorker(object):
 
             with self.lock:
                 if self.alg.if_save(self.train_count):
-                    _name = self.alg.save(self.model_path, self.train_count)
-                    # logging.debug("to save model: {}".format(_name))
+                    self._save_checkpoint()
 
             self._handle_eval_process(loss)
 
@@ -375,10 +393,35 @@ class TrainWorker(object):
 
 
             if self.train_count % self._log_interval == 0:
-                self.stats_deliver.send(self.logger.get_new_info(), block=True)
+                self.stats_deliver.send(self._collect_stats(), block=True)
 
             self.train_count += 1
 
+        if self._ckpt_writer:
+            self._ckpt_writer.close()
+
+    def _collect_stats(self):
+        """Assemble the learner stats, with the trajectory and weights flow."""
+        stats = self.logger.get_new_info()
+        stats.update({"train_msg_count": sum(self._train_data_counter.values())})
+        stats.update(self._metric.get_metric(("fix_weight", "send")))
+        return stats
+
+    def _save_checkpoint(self):
+        """Save the model, write it within background if supported."""
+        _save_st = time()
+        snapshot = None
+        if self._ckpt_writer:
+            snapshot = self.alg.save_snapshot(self.model_path, self.train_count)
+
+        if snapshot is None:
+            _name = self.alg.save(self.model_path, self.train_count)
+            # logging.debug("to save model: {}".format(_name))
+        else:
+            self._ckpt_writer.submit(*snapshot)
+            # the learner only wait the snapshot, the write record by writer
+            self._ckpt_writer.metric.append(learner_save=time() - _save_st)
+
     def record_reward(self, train_data):
         """Record reward in train."""
         broker_id = get_msg_info(train_data, 'broker_id')
@@ -388,6 +431,7 @@ class TrainWorker(object):
         # key = learner_stats_id(train_data["ctr_info"])
         # record the train_data received
         self._train_data_counter[key] += 1
+        self._weights_encoder.ack(broker_id, explorer_id, get_msg_info(train_data, 'weights_version'))
 
         self.alg.dist_model_policy.add_processed_ctr_info(key)
         data_dict = get_msg_data(train_data)
@@ -19,7 +19,7 @@
 # THE SOFTWARE.
 """Create Predictor."""
 import os
-from time import time
+from time import time, sleep
 from copy import deepcopy
 from xt.algorithm import alg_builder
 import setproctitle
@@ -29,7 +29,13 @@ from zeus.common.util.profile_stats import PredictStats, TimerRecorder
 
 
 class Predictor(object):
-    """Predict Worker for async algorithm."""
+    """
+    Predict Worker for async algorithm.
+
+    The pending predict requests are gathered into one batch, up to
+    `predict_batch_size` requests or `predict_max_wait_ms` after the first
+    one, and run through a single `alg.predict_batch` call.
+    """
 
     def __init__(self, predictor_id, config_info, request_q, reply_q, predictor_name):
         self.config_info = deepcopy(config_info)
@@ -42,6 +48,10 @@ class Predictor(object):
         self._stats = PredictStats()
         self.predictor_name = predictor_name
 
+        alg_config = self.config_info.get('alg_para', {}).get('alg_config', {})
+        self.max_batch_size = alg_config.get('predict_batch_size', 32)
+        self.max_wait_time = alg_config.get('predict_max_wait_ms', 0.0) / 1000.
+
     def process(self):
         """Predict action."""
         while True:
@@ -51,34 +61,60 @@ class Predictor(object):
             self._stats.obs_wait_time += time() - start_t0
 
             cmd = ctr_info.get('sub_cmd', 'predict')
-            # if 'predict' in cmd:
-            #     cmd = 'predict'
-            # else:
-            #     print("sync model")
-
             if cmd in self.process_fn.keys():
                 proc_fn = self.process_fn[cmd]
                 proc_fn(recv_data)
             else:
                 raise KeyError("invalid cmd: {}".format(ctr_info['cmd']))
 
+    def gather_and_predict(self, first_data):
+        """Collect the pending predict requests behind `first_data`, and predict them together."""
+        batch = [(first_data, time())]
+        deadline = batch[0][1] + self.max_wait_time
+        other_data = None
+        while len(batch) < self.max_batch_size:
+            recv = self.request_q.recv(block=False)
+            if recv is None:
+                if time() >= deadline:
+                    break
+                sleep(0.0002)
+                continue
+
+            ctr_info, data = recv
+            recv_data = {'ctr_info': ctr_info, 'data': data}
+            if ctr_info.get('sub_cmd', 'predict') != 'predict':
+                # keep the order, e.g, sync weights after this batch
+                other_data = recv_data
+                break
+            batch.append((recv_data, time()))
+
+        self.predict(batch)
+
+        if other_data is not None:
+            cmd = other_data['ctr_info'].get('sub_cmd')
+            if cmd not in self.process_fn.keys():
+                raise KeyError("invalid cmd: {}".format(other_data['ctr_info']['cmd']))
+            self.process_fn[cmd](other_data)
+
     def sync_weights(self, recv_data):
         model_weights = recv_data['data']
         self.alg.set_weights(model_weights)
 
-    def predict(self, recv_data):
+    def predict(self, batch):
+        """Run one inference for the batch, and reply to each explorer."""
         start_t1 = time()
-        state = get_msg_data(recv_data)
-        broker_id = get_msg_info(recv_data, 'broker_id')
-        explorer_id = get_msg_info(recv_data, 'explorer_id')
-        action = self.alg.predict(state)
-        self._stats.inference_time += time() - start_t1
-
-        reply_data = message(action, cmd="predict_reply", broker_id=broker_id,
-                             explorer_id=explorer_id)
-        self.reply_q.put(reply_data)
+        queue_time = sum(start_t1 - recv_t for _, recv_t in batch)
+        states = [get_msg_data(recv_data) for recv_data, _ in batch]
+        actions = self.alg.predict_batch(states)
+        self._stats.add_batch(len(batch), queue_time, time() - start_t1)
+
+        for (recv_data, _), action in zip(batch, actions):
+            broker_id = get_msg_info(recv_data, 'broker_id')
+            explorer_id = get_msg_info(recv_data, 'explorer_id')
+            reply_data = message(action, cmd="predict_reply", broker_id=broker_id,
+                                 explorer_id=explorer_id)
+            self.reply_q.put(reply_data)
 
-        self._stats.iters += 1
         if self._stats.iters > self._report_period:
             _report = self._stats.get()
             reply_data = message(_report, cmd="stats_msg{}".format(self.predictor_name))
@@ -92,7 +128,7 @@ class Predictor(object):
         self.alg = alg_builder(**alg_para)
 
         self.process_fn = {'sync_weights': self.sync_weights,
-                           'predict': self.predict}
+                           'predict': self.gather_and_predict}
 
         #start msg process
         self.process()
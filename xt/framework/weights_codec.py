@@ -0,0 +1,247 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Versioned weights distribution, with the delta and quantization.
+
+The learner keeps a canonical chain of the weights held by explorers:
+
+    R(v) = R(v-1) + dequantize(quantize(W(v) - R(v-1)))
+
+A delta message carries the quantized increments from the oldest
+version acked by its targets, and each explorer applies the increments
+newer than its own version, in place. The quantization error is fed
+back into the next increment, so R never drifts from the learner
+weights. A full snapshot sends R(v) itself, while the acked version is
+unknown or too old. The explorers registered are expected to receive
+the broadcast, so it stays a full snapshot until all of them have acked.
+"""
+from collections import OrderedDict
+
+import numpy as np
+from absl import logging
+
+QUANTIZE_DTYPE = {None: np.float32, "fp16": np.float16, "int8": np.int8}
+# store an increment sparse, with the changed fraction below it
+SPARSE_RATIO = 0.3
+
+
+def is_encoded_weights(data):
+    """Check whether the data is encoded by WeightsEncoder."""
+    return isinstance(data, dict) and "weights_encoding" in data
+
+
+def _quantize(values, quantize):
+    """Quantize float values, return the values and the scale."""
+    if quantize == "int8":
+        max_abs = float(np.max(np.abs(values))) if values.size else 0.0
+        scale = np.float32(max_abs / 127.0 if max_abs > 0 else 1.0)
+        return np.round(values / scale).astype(np.int8), scale
+    return values.astype(QUANTIZE_DTYPE[quantize]), np.float32(1.0)
+
+
+def _dequantize(values, scale):
+    if values.dtype == np.int8:
+        return values.astype(np.float32) * scale
+    return values.astype(np.float32)
+
+
+def _encode_increment(diff, quantize):
+    """Encode one tensor increment, None without change."""
+    flat = diff.reshape(-1)
+    changed = np.flatnonzero(flat)
+    if changed.size == 0:
+        return None
+    if changed.size < SPARSE_RATIO * flat.size:
+        values, scale = _quantize(flat[changed], quantize)
+        return "sparse", changed.astype(np.int32), values, scale
+    values, scale = _quantize(diff, quantize)
+    return "dense", values, scale
+
+
+def _apply_increment(weights, increment):
+    """Apply the increments in place, same arithmetic on the both sides."""
+    for name, encoded in increment.items():
+        target = weights[name]
+        if encoded[0] == "sparse":
+            _, index, values, scale = encoded
+            flat = target.reshape(-1)
+            flat[index] += _dequantize(values, scale)
+        else:
+            _, values, scale = encoded
+            np.add(target, _dequantize(values, scale), out=target)
+
+
+def _increment_nbytes(increment):
+    return sum(_item.nbytes for _encoded in increment.values()
+               for _item in _encoded[1:] if isinstance(_item, np.ndarray))
+
+
+class WeightsEncoder(object):
+    """Encode the weights to distribute, within the learner."""
+
+    def __init__(self, mode="full", quantize=None, max_delta_steps=4, full_interval=50):
+        """
+        Initialize.
+
+        :param mode: "full" sends the raw weights as before; "delta" versions them.
+        :param quantize: None, "fp16" or "int8", for the delta increments.
+        :param max_delta_steps: max increments within one delta message.
+        :param full_interval: send a full snapshot every interval versions, 0 to disable.
+        """
+        if mode not in ("full", "delta"):
+            raise ValueError("invalid weights distribute mode: {}".format(mode))
+        if quantize not in QUANTIZE_DTYPE:
+            raise ValueError("invalid weights quantize: {}".format(quantize))
+
+        self.mode = mode
+        self.quantize = quantize
+        self.max_delta_steps = max_delta_steps
+        self.full_interval = full_interval
+
+        self.version = 0
+        self._canonical = None
+        # {version: increment from version-1}
+        self._increments = OrderedDict()
+        self._increments_nbytes = dict()
+        # {(broker_id, explorer_id): version}
+        self._acked = dict()
+        # {(broker_id, explorer_id)} expected to receive the broadcast
+        self._registered = set()
+
+    @classmethod
+    def from_config(cls, alg_config):
+        """Create with the weights_dist_* items of alg_config."""
+        return cls(mode=alg_config.get("weights_dist_mode", "full"),
+                   quantize=alg_config.get("weights_quantize"),
+                   max_delta_steps=alg_config.get("weights_max_delta_steps", 4),
+                   full_interval=alg_config.get("weights_full_interval", 50))
+
+    def register(self, broker_ids, explorer_ids):
+        """Register the explorers, each explorer_id lives on every broker."""
+        self._registered.update((_broker, _explorer) for _broker in broker_ids
+                                for _explorer in explorer_ids)
+
+    def ack(self, broker_id, explorer_id, version):
+        """Record the weights version held by explorer."""
+        if version is not None:
+            self._acked[(broker_id, explorer_id)] = version
+
+    def _acked_base(self, ctr_info):
+        """Get the oldest version held by the targets, None if any of them unknown."""
+        broker_id = ctr_info.get("broker_id", -1)
+        explorer_id = ctr_info.get("explorer_id", -1)
+        if explorer_id != -1 and not isinstance(explorer_id, list):
+            explorer_id = [explorer_id]
+        targets = [_key for _key in self._registered.union(self._acked)
+                   if broker_id in (-1, _key[0]) and (explorer_id == -1 or _key[1] in explorer_id)]
+        if explorer_id != -1 and len(set(_key[1] for _key in targets)) < len(explorer_id):
+            return None
+        if not targets or any(_key not in self._acked for _key in targets):
+            return None
+        return min(self._acked[_key] for _key in targets)
+
+    def _update_canonical(self, weights):
+        self.version += 1
+        if self._canonical is None or self._canonical.keys() != weights.keys():
+            self._canonical = {_k: np.array(_v, dtype=np.float32) for _k, _v in weights.items()}
+            self._increments.clear()
+            self._increments_nbytes.clear()
+            return
+
+        increment = dict()
+        for name, value in weights.items():
+            encoded = _encode_increment(np.asarray(value, dtype=np.float32) - self._canonical[name],
+                                        self.quantize)
+            if encoded is not None:
+                increment[name] = encoded
+        _apply_increment(self._canonical, increment)
+
+        self._increments[self.version] = increment
+        self._increments_nbytes[self.version] = _increment_nbytes(increment)
+        while len(self._increments) > self.max_delta_steps:
+            _version, _ = self._increments.popitem(last=False)
+            del self._increments_nbytes[_version]
+
+    def encode(self, weights, ctr_info_list):
+        """
+        Encode the weights for each target.
+
+        :param weights: weights dict from alg.get_weights(), others pass through.
+        :param ctr_info_list: the targets from dist_model_policy.
+        :return: list of (data, ctr_info) to send.
+        """
+        if self.mode == "full" or not isinstance(weights, dict):
+            return [(weights, _ctr) for _ctr in ctr_info_list]
+
+        self._update_canonical(weights)
+        # copy, the canonical weights update in place with the next version
+        full_data = {"weights_encoding": "full", "version": self.version,
+                     "tensors": {_k: _v.copy() for _k, _v in self._canonical.items()}}
+        if self.full_interval and self.version % self.full_interval == 0:
+            return [(full_data, _ctr) for _ctr in ctr_info_list]
+
+        full_nbytes = sum(_v.nbytes for _v in self._canonical.values())
+        to_send = list()
+        for _ctr in ctr_info_list:
+            base = self._acked_base(_ctr)
+            versions = range(base + 1, self.version + 1) if base is not None else list()
+            # unknown or too old version, or the delta is not smaller
+            if not versions or versions[0] not in self._increments or \
+                    sum(self._increments_nbytes[_v] for _v in versions) >= full_nbytes:
+                to_send.append((full_data, _ctr))
+                continue
+
+            increments = [self._increments[_v] for _v in versions]
+            delta_data = {"weights_encoding": "delta", "version": self.version,
+                          "base": base, "increments": increments}
+            to_send.append((delta_data, _ctr))
+        return to_send
+
+
+class WeightsDecoder(object):
+    """Decode the weights distributed, within the explorer."""
+
+    def __init__(self):
+        self.version = None
+        self._weights = None
+
+    def decode(self, data):
+        """
+        Restore the weights held by explorer, with the full snapshot or delta.
+
+        :return: weights dict, None while the delta could not apply.
+        """
+        if data["weights_encoding"] == "full":
+            self._weights = {_k: np.array(_v, dtype=np.float32) for _k, _v in data["tensors"].items()}
+            self.version = data["version"]
+            return self._weights
+
+        if self.version is None or self.version < data["base"]:
+            logging.debug("skip weights delta from {}, with version {}".format(
+                data["base"], self.version))
+            return None
+        if self.version >= data["version"]:
+            return None
+
+        # only the increments newer than the version held
+        for increment in data["increments"][self.version - data["base"]:]:
+            _apply_increment(self._weights, increment)
+        self.version = data["version"]
+        return self._weights
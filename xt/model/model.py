@@ -56,6 +56,9 @@ class XTModel(object):
             self.model_format = model_info.get('model_format')
             self.max_to_keep = model_info.get("max_to_keep", 100)
             self.model = self.create_model(model_info)
+            # one contiguous buffer for the weights get, set and broadcast.
+            if model_info.get("flat_weights", False) and self.actor_var is not None:
+                self.actor_var.enable_flat()
             if 'init_weights' in model_info:
                 model_name = model_info['init_weights']
                 try:
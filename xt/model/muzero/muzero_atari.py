@@ -109,6 +109,20 @@ class MuzeroAtari(MuzeroModel):
             print("value", value, "reward", reward)
         return NetworkOutput(value, reward[0], policy[0], hidden[0])
 
+    def recurrent_inference_batch(self, hidden_state, action):
+        with self.graph.as_default():
+            K.set_session(self.sess)
+            action = np.eye(36)[action]
+            action = action.reshape((-1, 6, 6, 1))
+            conditioned_hidden = np.concatenate((hidden_state, action), axis=-1)
+            feed_dict = {self.conditioned_hidden: conditioned_hidden}
+            hidden, reward = self.sess.run([self.out_h, self.out_r], feed_dict)
+
+            feed_dict = {self.hidden: hidden}
+            policy, value = self.sess.run([self.out_p, self.out_v], feed_dict)
+            value = np.asarray([self._value_transform(_value) for _value in value])
+        return NetworkOutput(value, reward.reshape(-1), policy, hidden)
+
     def build_graph(self):
         self.image = tf.placeholder(tf.float32, name="obs",
                                     shape=(None, ) + tuple(self.state_dim))
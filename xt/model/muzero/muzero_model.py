@@ -95,6 +95,31 @@ class MuzeroModel(XTModel):
 
         return NetworkOutput(value, reward, policy[0], hidden[0])
 
+    def initial_inference_batch(self, input_data):
+        """Run representation and prediction on a batch, keep the batch axis on every output."""
+        with self.graph.as_default():
+            K.set_session(self.sess)
+
+            feed_dict = {self.obs: input_data}
+            policy, value, hidden = self.sess.run(self.init_infer, feed_dict)
+            value = self.value_transform_batch(value, self.value_support_size, self.value_min, self.value_max)
+
+        return NetworkOutput(value, np.zeros_like(value), policy, hidden)
+
+    def recurrent_inference_batch(self, hidden_state, action):
+        """Run dynamics and prediction for a batch of (hidden_state, action) pairs in one session call."""
+        with self.graph.as_default():
+            K.set_session(self.sess)
+            action = np.eye(self.action_dim)[action]
+            conditioned_hidden = np.hstack((hidden_state, action))
+            feed_dict = {self.conditioned_hidden: conditioned_hidden}
+            hidden, reward, policy, value = self.sess.run(self.rec_infer, feed_dict)
+
+            value = self.value_transform_batch(value, self.value_support_size, self.value_min, self.value_max)
+            reward = self.value_transform_batch(reward, self.reward_support_size, self.reward_min, self.reward_max)
+
+        return NetworkOutput(value, reward, policy, hidden)
+
     def build_graph(self):
         self.build_train_graph()
         self.build_infer_graph()
@@ -225,6 +250,12 @@ class MuzeroModel(XTModel):
         value = np.clip(value, min, max)
         return np.asscalar(value)
 
+    def value_transform_batch(self, value_support, support_size, min, max):
+        """Vectorized value_transform over the leading batch axis."""
+        value = np.dot(value_support, np.arange(support_size))
+        value = value_decompression(value) + min
+        return np.clip(value, min, max)
+
     def value_inference(self, input_data):
         with self.graph.as_default():
             K.set_session(self.sess)
@@ -26,6 +26,9 @@ from absl import logging
 
 from xt.model.tf_compat import tf
 
+# key of the contiguous float32 buffer, within the flat weights dict.
+FLAT_WEIGHTS_KEY = "__flat_weights__"
+
 
 def restore_tf_variable(tf_sess, target_paras, model_name):
     """Restore explorer variable with tf.train.checkpoint."""
@@ -96,13 +99,70 @@ class TFVariables:
 
         logging.debug("layers_with_order: \n{}".format(self.node_hub_with_order.keys()))
 
+        # static offset table of the float32 variables within the flat buffer.
+        self._flat_layout, self._flat_size = list(), 0
+        self._other_nodes = OrderedDict()
+        for node_name, variable in self.node_hub_with_order.items():
+            if variable.dtype.base_dtype != tf.float32:
+                self._other_nodes[node_name] = variable
+                continue
+            shape = variable.get_shape().as_list()
+            size = int(np.prod(shape))
+            self._flat_layout.append((node_name, self._flat_size, self._flat_size + size, shape))
+            self._flat_size += size
+
+        self._flat_op, self._flat_ph, self._flat_assign = None, None, None
+
+    def enable_flat(self):
+        """
+        Get & Set the float32 variables as one contiguous buffer.
+
+        The weights dict will hold the buffer within `FLAT_WEIGHTS_KEY`,
+        and the other variables by node name.
+        Must be called within the graph of the variables.
+        """
+        if self._flat_op is not None or not self._flat_layout:
+            return
+
+        variables = [self.node_hub_with_order[_layout[0]] for _layout in self._flat_layout]
+        self._flat_op = tf.concat([tf.reshape(_var, [-1]) for _var in variables], axis=0)
+        self._flat_ph = tf.placeholder(tf.float32, [self._flat_size], name="ph_flat_weights")
+        self._flat_assign = tf.group(*[
+            _var.assign(tf.reshape(self._flat_ph[start:end], shape))
+            for _var, (_, start, end, shape) in zip(variables, self._flat_layout)
+        ])
+
+    def unpack_flat(self, flat_weights):
+        """Split the flat buffer into the weights dict, with views."""
+        if flat_weights.size != self._flat_size:
+            raise ValueError("flat weights with size {}, but {} expected".format(
+                flat_weights.size, self._flat_size))
+        return OrderedDict(
+            (node_name, flat_weights[start:end].reshape(shape))
+            for node_name, start, end, shape in self._flat_layout
+        )
+
     def get_weights(self):
         """Get weights with dict type."""
-        _weights = self.session.run(self.node_hub_with_order)
-        return _weights
+        if self._flat_op is None:
+            return self.session.run(self.node_hub_with_order)
+
+        to_fetch = OrderedDict({FLAT_WEIGHTS_KEY: self._flat_op})
+        to_fetch.update(self._other_nodes)
+        return self.session.run(to_fetch)
 
     def set_weights(self, to_weights):
         """Set weights with dict type."""
+        if FLAT_WEIGHTS_KEY in to_weights:
+            to_weights = OrderedDict(to_weights)
+            flat_weights = to_weights.pop(FLAT_WEIGHTS_KEY)
+            if self._flat_assign is not None:
+                self.session.run(self._flat_assign, feed_dict={self._flat_ph: flat_weights})
+            else:
+                to_weights.update(self.unpack_flat(flat_weights))
+            if not to_weights:
+                return
+
         nodes_to_assign = [
             self._to_assign_node_dict[node_name] for node_name in to_weights.keys()
             if node_name in self._to_assign_node_dict
@@ -35,6 +35,7 @@ from xt.evaluate import setup_evaluate_adapter
 from xt.framework.broker_launcher import launch_broker
 from xt.framework.learner import setup_learner, patch_alg_within_config
 from xt.framework.explorer import setup_explorer
+from zeus.common.ipc.weight_pool import ShmWeightPool
 from zeus.common.util.logger import StatsRecorder, VERBOSITY_MAP
 from zeus.common.util.get_xt_config import parse_xt_multi_case_paras, \
     check_if_patch_local_node, get_pbt_set
@@ -58,7 +59,7 @@ def _makeup_learner(config_info, data_url, verbosity):
 
     if _use_pbt:
         metric_store = controller.register("pbt_metric", "store")
-        weights_store = controller.register("pbt_weights", "store")
+        weights_store = ShmWeightPool(controller.register("pbt_weights", "store"))
     else:
         metric_store, weights_store = None, None
 
@@ -168,6 +169,8 @@ def train(config_info, train_task, s3_path, verbosity="info"):
     # handle close signal, with cleaning works.
     for _task in controller.tasks:
         _task.train_worker.logger.save_to_json()
+        if _task.train_worker.pbt_aid:
+            _task.train_worker.pbt_aid.close()
     controller.stop()
 
     # fixme: make close harmonious between controller & broker
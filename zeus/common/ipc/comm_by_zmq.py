@@ -18,10 +18,11 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
 """Communication by zmq."""
-import pyarrow
 import zmq
+import zmq.asyncio
 from absl import logging
 from zeus.common.util.register import Registers
+from zeus.common.ipc.serialize import serialize, deserialize, serialize_to_buffer
 
 ZMQ_MIN_PORT = 20000
 ZMQ_MAX_PORT = 40000
@@ -67,35 +68,37 @@ class CommByZmq(object):
         self.socket = socket
 
     def send(self, ctr_info, data, name=None, block=True):
-        """Send message."""
-        # msg = pickle.dumps(data)
-        msg = []
-        msg.append(pyarrow.serialize(ctr_info).to_buffer())
-        msg.append(pyarrow.serialize(data).to_buffer())
-        self.socket.send_multipart(msg)
+        """Send message, the array buffers go out as extra frames without copy."""
+        msg = [serialize_to_buffer(ctr_info)]
+        msg.extend(serialize(data))
+        self.socket.send_multipart(msg, copy=False)
 
     def recv(self, name=None, block=True):
         """Receive message."""
-        msg = self.socket.recv_multipart()
-        ctr_info = pyarrow.deserialize(msg[0])
-        data = pyarrow.deserialize(msg[1])
-        # data = pickle.loads(msg)
-        return ctr_info, data
+        ctr_info, data = self.recv_bytes(block)
+        return deserialize(ctr_info), deserialize(data)
 
     def send_bytes(self, ctr_info, data):
-        """Send bytes."""
-        msg = list()
-        msg.append(ctr_info)
-        msg.append(data)
+        """Send bytes, data could be a serialized buffer or a list of frames."""
+        msg = [ctr_info]
+        if isinstance(data, (list, tuple)):
+            msg.extend(data)
+        else:
+            msg.append(data)
         self.socket.send_multipart(msg, copy=False)
 
     def recv_bytes(self, block):
-        """Receive bytes."""
-        recv_data = self.socket.recv_multipart()
-        ctr_info, data = recv_data[0], recv_data[1]
+        """Receive bytes, return the ctr_info buffer and the data frames."""
+        recv_data = self.socket.recv_multipart(copy=False)
+        ctr_info = recv_data[0].buffer
+        data = [_frame.buffer for _frame in recv_data[1:]]
 
         return ctr_info, data
 
+    def to_async(self):
+        """Shadow the socket with zmq.asyncio, to await it within an event loop."""
+        return zmq.asyncio.Socket.shadow(self.socket.underlying)
+
     def __str__(self):
         """Rewrite the ste func, to return the class info."""
         return str({
@@ -0,0 +1,176 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Serialize the messages among explorer, broker and learner.
+
+A message is serialized into frames: a header frame, which starts with
+the tag of its serializer, followed by the raw buffers of the contained
+arrays. Frames could be sent as zmq multipart without copy, or packed
+into a single (shared memory) buffer with `pack_into`.
+Deserialize accepts both forms, and arrays are built on top of the
+received buffers without copy.
+"""
+import os
+import struct
+
+try:
+    import pickle
+    from pickle import PickleBuffer
+except ImportError:  # python < 3.8, need the pickle5 backport
+    import pickle5 as pickle
+    from pickle5 import PickleBuffer
+
+PACK_MAGIC = b"XTPK"
+PACK_ALIGN = 64
+_PACK_HEAD = struct.Struct("<4sI")
+_PACK_LEN = struct.Struct("<Q")
+
+
+class PickleSerializer(object):
+    """Pickle protocol 5, contiguous arrays are held out-of-band."""
+
+    tag = b"PKL5"
+
+    @staticmethod
+    def dumps(data):
+        """Return the header and the raw buffers of `data`."""
+        buffers = list()
+        header = pickle.dumps(data, protocol=5, buffer_callback=buffers.append)
+        return header, [buf.raw() for buf in buffers]
+
+    @staticmethod
+    def loads(header, buffers):
+        """Restore data from header and raw buffers."""
+        return pickle.loads(header, buffers=buffers)
+
+
+class ArrowSerializer(object):
+    """The legacy pyarrow serialization, for the pyarrow versions still providing it."""
+
+    tag = b"ARW0"
+
+    @staticmethod
+    def dumps(data):
+        import pyarrow
+        return pyarrow.serialize(data).to_buffer(), list()
+
+    @staticmethod
+    def loads(header, buffers):
+        import pyarrow
+        return pyarrow.deserialize(header)
+
+
+SERIALIZERS = {
+    "pickle": PickleSerializer,
+    "pyarrow": ArrowSerializer,
+}
+_TAG_TO_SERIALIZER = {_cls.tag: _cls for _cls in SERIALIZERS.values()}
+
+# all the processes of one job must share the serializer.
+DEFAULT_SERIALIZER = os.environ.get("XT_SERIALIZER", "pickle")
+
+
+def serialize(data, serializer=None):
+    """Serialize data into a list of frames, without copy the array buffers."""
+    serializer = SERIALIZERS[serializer or DEFAULT_SERIALIZER]
+    header, buffers = serializer.dumps(data)
+    return [serializer.tag + bytes(header)] + buffers
+
+
+def deserialize(frames):
+    """
+    Deserialize data from frames, or from one buffer packed with `pack`.
+
+    The arrays restored share memory with the input buffers.
+    """
+    if not isinstance(frames, (list, tuple)):
+        frames = [frames]
+    frames = [memoryview(_frame) for _frame in frames]
+    if len(frames) == 1 and frames[0][:4] == PACK_MAGIC:
+        frames = unpack(frames[0])
+
+    header = frames[0]
+    serializer = _TAG_TO_SERIALIZER.get(bytes(header[:4]))
+    if serializer is None:
+        raise KeyError("unknown serializer tag: {}".format(bytes(header[:4])))
+    return serializer.loads(header[4:], frames[1:])
+
+
+def _align(size):
+    return (size + PACK_ALIGN - 1) // PACK_ALIGN * PACK_ALIGN
+
+
+def _frame_nbytes(frame):
+    return memoryview(frame).nbytes
+
+
+def packed_size(frames):
+    """Get the size of frames packed into one buffer."""
+    size = _align(_PACK_HEAD.size + _PACK_LEN.size * len(frames))
+    return size + sum(_align(_frame_nbytes(_frame)) for _frame in frames)
+
+
+def pack_into(frames, buffer, offset=0):
+    """
+    Pack frames into a writable buffer, e.g, shared memory.
+
+    Each frame is aligned to 64 bytes, so that arrays unpacked keep aligned.
+    :return: the packed size.
+    """
+    dst = memoryview(buffer).cast("B")[offset:]
+    lens = [_frame_nbytes(_frame) for _frame in frames]
+    _PACK_HEAD.pack_into(dst, 0, PACK_MAGIC, len(frames))
+    for i, _len in enumerate(lens):
+        _PACK_LEN.pack_into(dst, _PACK_HEAD.size + i * _PACK_LEN.size, _len)
+
+    pos = _align(_PACK_HEAD.size + _PACK_LEN.size * len(frames))
+    for _frame, _len in zip(frames, lens):
+        dst[pos: pos + _len] = memoryview(_frame).cast("B")
+        pos += _align(_len)
+    return pos
+
+
+def pack(frames):
+    """Pack frames into a new bytearray."""
+    buffer = bytearray(packed_size(frames))
+    pack_into(frames, buffer)
+    return buffer
+
+
+def unpack(buffer):
+    """Split a packed buffer into frames, as memoryview without copy."""
+    src = memoryview(buffer).cast("B")
+    magic, frame_num = _PACK_HEAD.unpack_from(src, 0)
+    if magic != PACK_MAGIC:
+        raise ValueError("invalid packed buffer with magic: {}".format(magic))
+
+    lens = [_PACK_LEN.unpack_from(src, _PACK_HEAD.size + i * _PACK_LEN.size)[0]
+            for i in range(frame_num)]
+    pos = _align(_PACK_HEAD.size + _PACK_LEN.size * frame_num)
+    frames = list()
+    for _len in lens:
+        frames.append(src[pos: pos + _len])
+        pos += _align(_len)
+    return frames
+
+
+def serialize_to_buffer(data, serializer=None):
+    """Serialize data into one contiguous buffer."""
+    return pack(serialize(data, serializer))
@@ -20,218 +20,153 @@
 """Share buffer."""
 import os
 import time
+from collections import deque
 from absl import logging
-from multiprocessing import Queue
-from subprocess import PIPE, Popen
 import numpy as np
-from pyarrow import deserialize, plasma, serialize
+from zeus.common.ipc.serialize import deserialize, serialize_to_buffer
+from zeus.common.ipc.shm_store import ShmObjectStore
 
 
 class ShareBuf(object):
-    """Share Buffer among broker salve."""
+    """
+    Share Buffer among broker salve.
+
+    The broker keeps the owner reference of the latest `max_keep` objects,
+    and each reader pins the object while using it, within the refcount of
+    the shared memory object store. So, an object is recycled after it
+    has been evicted and released by all the readers.
+    """
 
     def __init__(self, live, size=200000000, max_keep=20,
-                 path="/tmp/plasma_share{}".format(os.getpid()), start=False):
-        """Init buffer share with plasma."""
+                 path="/tmp/plasma_share{}".format(os.getpid()), start=False,
+                 max_objects=None):
+        """Init buffer share with the shared memory object store."""
         super(ShareBuf, self).__init__()
         self.size_shared_mem = size
         self.path = path
         self.max_keep = max_keep
+        self.max_objects = max_objects or max(2 * max_keep, 64)
 
         self.client = dict()
+        # object ids own by this buffer, the oldest first.
+        self.keep_ids = deque()
+        # ref explorer number under this broker, kept for compatibility.
+        self.live_threshold = live
         if start:
             self.start()
-        else:
-            time.sleep(0.1)
-
-        # add 1 vary with once get
-        self.live_info = dict()
-        # ref explorer number under this broker
-        self.live_threshold = live
-        # vanish after register with half live times
-        self.to_vanish = Queue()
-        self._update_vanish_attr(live)
 
     def plus_one_live(self):
         """Add one live value."""
         self.live_threshold += 1
-        self._update_vanish_attr(self.live_threshold)
 
     def update_live(self, live):
         """Update the live attribute. Without check history Yet."""
         self.live_threshold = live
-        self._update_vanish_attr(live)
-
-    def _update_vanish_attr(self, live):
-        self._vanish_threshold = min(max(7, live // 2), 13)
 
     def get_path(self):
-        """Get plasma path."""
+        """Get store path."""
         return self.path
 
-    def _pre_to_vanish_obj(self):
-        """Check live management information, Return non_lived object ids."""
-        to_vanish_ids = list()
-        for _id, _val in self.live_info.items():
-            if _val > 0:
-                continue
-
-            to_vanish_ids.append(_id)
-
-        for _id in to_vanish_ids:
-            del self.live_info[_id]
+    def reduce_once(self, object_id):
+        """Reduce one times of this object, the readers release it by refcount now."""
 
-        return to_vanish_ids
+    def put(self, data_buffer, special_live=None, timeout=10.0):
+        """
+        Put data buffer, or a list of serialized frames for share.
 
-    def _get_over_keep_ids(self):
-        """Get over keep object ids."""
-        over_ids = list()
+        Raise StoreFullError if the store keeps full over `timeout` seconds.
+        """
         client = self.connect()
-        id_list = client.list()
-        sorted_id = sorted(id_list.items(), key=lambda v: v[1]["create_time"],
-                           reverse=True)
-
-        over_ids.extend(_val[0] for _val in sorted_id[self.max_keep:])
-        # logging.debug("over_ids: {}".format(over_ids))
-        return over_ids
-
-    def _get_vanish_obj(self):
-        """Get ready vanish object_ids."""
-        to_ids = self._pre_to_vanish_obj()
-        for _id in to_ids:
-            self.to_vanish.put(_id)
-
-        ready_vanish_ids = set()
-        while self.to_vanish.qsize() > self._vanish_threshold:
-            obj_id = self.to_vanish.get()
-            ready_vanish_ids.add(plasma.ObjectID(bytes(obj_id)))
-
-        # check store_capacity.
-        over_ids = self._get_over_keep_ids()
-        ready_vanish_ids.update(over_ids)
-
-        # we re-delete the key in live_info
-        for _oid in over_ids:
-            if _oid.binary() in self.live_info:
-                del self.live_info[_oid.binary()]
-
-        return list(ready_vanish_ids)
-
-    def _init_obj(self, object_id, special_live=None):
-        """Put New object."""
-        self.live_info.update({object_id: special_live or self.live_threshold})
-
-    def reduce_once(self, object_id):
-        """Reduce one times of this object."""
-        if object_id not in self.live_info:
-            logging.debug("obj_id: {} is deleted yet".format(object_id))
+        if isinstance(data_buffer, (list, tuple)):
+            object_id = client.put_frames(data_buffer, timeout)
         else:
-            self.live_info[object_id] -= 1
+            object_id = client.put_raw_buffer(data_buffer, timeout)
+        self.keep_ids.append(object_id)
 
-    def put(self, data_buffer, special_live=None):
-        """Put data buffer for share."""
-        client = self.connect()
-        object_id = client.put_raw_buffer(data_buffer)
-        # logging.debug("put buffer with id: {}".format(object_id))
-        self._init_obj(object_id.binary(), special_live)
-
-        # del data within the vanish Queue
-        ready_vanish_ids = self._get_vanish_obj()
-        if ready_vanish_ids:
-            # logging.debug("delete: {}, vanish queue.size: {}, odd: {}".format(
-            #     ready_vanish_ids, self.to_vanish.qsize(), len(self.live_info)))
-            client.delete(ready_vanish_ids)
-        # else:
-        #     logging.debug("odd:{}".format(len(self.live_info)))
-        # print("list plasma: ", client.list())
-        return object_id.binary()
+        # drop the owner reference over max_keep,
+        # the object in use will be recycled after the readers release it.
+        while len(self.keep_ids) > self.max_keep:
+            client.delete([self.keep_ids.popleft()])
+        return object_id
 
     def _get_buf(self, obj_id, retry=5):
-        object_id = plasma.ObjectID(bytes(obj_id))
-        # logging.debug("get buffer: {}".format(object_id))
         buf = None
-        # may instability.
         for _t in range(retry):
             try:
                 client = self.connect()
-                buf = client.get_buffers([object_id], timeout_ms=10)[0]
-            except BaseException as error:
+                buf = client.get(obj_id)
+            except FileNotFoundError as error:
+                # the store may not be ready yet
                 logging.info("try-{} to get buffer except: {}".format(_t, error))
-                pid = os.getpid()
-                del self.client[pid]
+                time.sleep(0.1)
                 continue
             else:
                 break
 
-        data = deserialize(buf) if buf else {"data": None}
-        # data = deserialize(client.get_buffers([object_id])[0])
+        data = deserialize(buf) if buf is not None else {"data": None}
         return data
 
     def get(self, object_id_byte):
-        """Get a object data from plasma server with id."""
+        """Get a object data from the store with id."""
         return self._get_buf(object_id_byte)
 
     def get_with_live_consume(self, object_id_byte):
-        """Get a object data from plasma server with id, and reduce live count."""
+        """Get a object data from the store with id, and reduce live count."""
         data = self._get_buf(object_id_byte)
 
         self.reduce_once(object_id_byte)
         return data
 
     def delete(self, object_id):
-        """Delete a object within plasma."""
+        """Delete a object within the store."""
         client = self.connect()
         client.delete([object_id])
+        if object_id in self.keep_ids:
+            self.keep_ids.remove(object_id)
 
     def start(self):
-        """Start plasma server."""
-        try:
-            client = plasma.connect(self.path, int_num_retries=3)
-        except:
-            cmd_str = "plasma_store -m {} -s {}".format(self.size_shared_mem, self.path)
-            Popen(cmd_str, shell=True, stderr=PIPE)
-            logging.info("share buf: {}".format(cmd_str))
-            time.sleep(0.1)
+        """Create the shared memory object store."""
+        self.client[os.getpid()] = ShmObjectStore(
+            self.path, size=self.size_shared_mem, max_objects=self.max_objects, create=True)
+        logging.info("share buf: {} with size: {}".format(self.path, self.size_shared_mem))
 
     def connect(self):
-        """Connect to plasma server."""
+        """Attach to the store, once within each process."""
         pid = os.getpid()
         if pid in self.client:
             return self.client[pid]
         else:
-            self.client[pid] = plasma.connect(self.path)
-            # logging.debug("self.path", self.path)
+            self.client[pid] = ShmObjectStore(self.path)
             return self.client[pid]
 
     def close(self):
-        """Close plasma server."""
-        os.system("pkill -9 plasma")
+        """Close the store, it will be unlinked by the creator."""
+        client = self.client.pop(os.getpid(), None)
+        if client:
+            client.close()
 
 
-def test_buf_get_live():
-    """Test share buf live count."""
-    live_count = 10
+def test_buf_keep():
+    """Test share buf recycle over max_keep."""
     logging.set_verbosity(logging.DEBUG)
-    share_buf = ShareBuf(live=live_count, size=20000000, start=True)
+    share_buf = ShareBuf(live=10, size=20000000, max_keep=2, start=True)
     data = {"d{}".format(i): np.array(np.arange(i)) for i in range(5, 8)}
-    ds = serialize(data).to_buffer()
+    ds = serialize_to_buffer(data)
     b_id = share_buf.put(data_buffer=ds)
-    for _ in range(live_count // 2):
-        ret = share_buf.get_with_live_consume(b_id)
-        print(share_buf.live_info)
+    ret = share_buf.get_with_live_consume(b_id)
 
     b_id2 = share_buf.put(data_buffer=ds)
-
-    for _ in range(live_count // 2):
-        ret = share_buf.get_with_live_consume(b_id)
-        print(share_buf.live_info)
-    assert share_buf.live_info[b_id] < 1
-
-    # to remove the first one item
+    # to remove the first one item, while it is still in use
     b_id3 = share_buf.put(data_buffer=ds)
-    assert b_id not in share_buf.live_info
-    assert share_buf.live_info[b_id2] == live_count
-    # print(share_buf.live_info)
+    assert b_id not in share_buf.keep_ids
+    check_equal_dict(data, ret)
+    assert b_id in share_buf.connect().list()
+
+    del ret
+    assert b_id not in share_buf.connect().list()
+    assert share_buf.get(b_id) == {"data": None}
+    assert len(share_buf.connect().list()) == 2 and b_id3 in share_buf.keep_ids
+    share_buf.close()
 
 
 def test_share_buf_io():
@@ -240,12 +175,14 @@ def test_share_buf_io():
     share_buf = ShareBuf(live=10, size=20000000, start=True)
     data = {"d{}".format(i): np.array(np.arange(i)) for i in range(5, 8)}
     print(data)
-    ds = serialize(data).to_buffer()
+    ds = serialize_to_buffer(data)
     b_id = share_buf.put(data_buffer=ds)
     print("b_id", b_id)
     ret = share_buf.get(b_id)
     print("ret:", ret)
     check_equal_dict(data, ret)
+    del ret
+    share_buf.close()
 
 
 def check_equal_dict(d1: dict, d2: dict):
@@ -260,4 +197,4 @@ def check_equal_dict(d1: dict, d2: dict):
 
 if __name__ == "__main__":
     test_share_buf_io()
-    test_buf_get_live()
+    test_buf_keep()
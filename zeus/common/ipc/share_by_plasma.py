@@ -17,17 +17,21 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
-"""Share by plasma."""
-import sys
+"""
+Share by plasma.
+
+The name is kept for compatibility, objects are held within the built-in
+shared memory object store now, without the external plasma_store.
+"""
 import os
-import time
 from multiprocessing import Queue
-from subprocess import PIPE, Popen
 
 import lz4.frame
-from pyarrow import deserialize, plasma, serialize
 
 from zeus.common.util.register import Registers
+from zeus.common.ipc.serialize import serialize, deserialize, pack, \
+    packed_size, serialize_to_buffer
+from zeus.common.ipc.shm_store import ShmObjectStore
 
 
 @Registers.comm
@@ -35,11 +39,13 @@ class ShareByPlasma(object):
     """Share by plasma."""
 
     def __init__(self, comm_info):
-        """Init plasma component."""
+        """Init the shared memory store."""
         super(ShareByPlasma, self).__init__()
         self.size_shared_mem = comm_info.get("size", 1000000000)
         self.path = comm_info.get("path", "/tmp/plasma" + str(os.getpid()))
-        self.compress = comm_info.get("compress", True)
+        self.max_objects = comm_info.get("max_objects", 4096)
+        # lz4 compress the large messages, as default the zero-copy path is used
+        self.compress = comm_info.get("compress", False)
 
         self.control_q = Queue()
         self.client = {}
@@ -47,18 +53,28 @@ class ShareByPlasma(object):
         self.start()
 
     def send(self, data, name=None, block=True):
-        """Send data to plasma server."""
-        data_buffer = serialize(data['data']).to_buffer()
+        """
+        Send data to the object store.
+
+        Without block, StoreFullError raises at once while the store is full,
+        the data is kept to send again.
+        """
+        timeout = 10.0 if block else 0
+        frames = serialize(data['data'])
         compress_type = data['ctr_info'].get('compress_type', 'auto')
-        if compress_type in ['auto', 'compress']:
-            if sys.getsizeof(bytes(data_buffer)) > self.compress_threhold or compress_type == 'compress':
-                data_buffer = lz4.frame.compress(data_buffer)
-                data['ctr_info'].update({"compress_flag": True})
+        if compress_type == 'auto' and self.compress:
+            compress_type = 'compress' if packed_size(frames) > self.compress_threhold else 'none'
 
         client = self.connect()
-        object_id = client.put_raw_buffer(data_buffer)
+        if compress_type == 'compress':
+            data_buffer = lz4.frame.compress(pack(frames))
+            data['ctr_info'].update({"compress_flag": True})
+            object_id = client.put_raw_buffer(data_buffer, timeout)
+        else:
+            # pack the frames into shared memory directly, without an intermediate buffer
+            object_id = client.put_frames(frames, timeout)
 
-        ctr_info = serialize(data['ctr_info']).to_buffer()
+        ctr_info = serialize_to_buffer(data['ctr_info'])
         data['ctr_info'].update({'ctr_info_data': ctr_info})
         data['ctr_info'].update({'object_id': object_id})
         self.control_q.put(data['ctr_info'])
@@ -76,7 +92,7 @@ class ShareByPlasma(object):
         # else: state_msg
 
     def recv(self, name=None, block=True):
-        """Receive data from plasma server."""
+        """Receive data from the object store."""
         if not block and self.control_q.empty():
             return None
 
@@ -85,23 +101,24 @@ class ShareByPlasma(object):
         compress_flag = ctr_info.get('compress_flag', False)
 
         client = self.connect()
-        data = client.get_buffers([object_id])[0]
+        data = client.get(object_id)
         if compress_flag:
             data = lz4.frame.decompress(data)
         data = deserialize(data)
 
+        # the arrays received keep the object alive, until released.
         client.delete([object_id])
 
         return ctr_info, data
 
     def send_bytes(self, data_buffer, data_type="data"):
-        """Send data to plasma server without serialize."""
+        """Send data to the object store without serialize."""
         client = self.connect()
         object_id = client.put_raw_buffer(data_buffer)
         self.control_q.put((object_id, data_type))
 
     def recv_bytes(self, block):
-        """Receive data from plasma server without deserialize."""
+        """Receive data from the object store without deserialize."""
         if not block and self.control_q.empty():
             return None, None
 
@@ -109,19 +126,17 @@ class ShareByPlasma(object):
         object_id = ctr_info['object_id']
 
         client = self.connect()
-        data_buffer = client.get_buffers([object_id])
-        # client.delete([object_id])
+        data_buffer = client.get(object_id)
 
-        return ctr_info, data_buffer[0]
+        return ctr_info, data_buffer
 
     def delete(self, object_id):
         """Delete."""
         client = self.connect()
-        # print("list plasma: \n", client.list())
         client.delete([object_id])
 
     def send_multipart(self, data_buffer):
-        """Send multi-data to plasma server without serialize."""
+        """Send multi-data to the object store without serialize."""
         client = self.connect()
         self.control_q.put(len(data_buffer))
         for _buffer in data_buffer:
@@ -129,7 +144,7 @@ class ShareByPlasma(object):
             self.control_q.put(objec_id)
 
     def recv_multipart(self):
-        """Recieve multi-data from plasma server without deserialize."""
+        """Recieve multi-data from the object store without deserialize."""
         len_data = self.control_q.get()
         object_id = []
         client = self.connect()
@@ -137,30 +152,31 @@ class ShareByPlasma(object):
             _object_id = self.control_q.get()
             object_id.append(_object_id)
 
-        data_buffer = client.get_buffers(object_id)
+        data_buffer = [client.get(_id) for _id in object_id]
         client.delete(object_id)
 
         return data_buffer
 
     def start(self):
-        """Start plasma server."""
+        """Create the store, or share the one created with the same path."""
         try:
-            plasma.connect(self.path, int_num_retries=2)
-        except Exception:
-            cmd_str = "plasma_store -m {} -s {}".format(self.size_shared_mem, self.path)
-            Popen(cmd_str, shell=True, stderr=PIPE)
-            print(cmd_str)
-            time.sleep(0.1)
+            store = ShmObjectStore(self.path)
+        except FileNotFoundError:
+            store = ShmObjectStore(self.path, size=self.size_shared_mem,
+                                   max_objects=self.max_objects, create=True)
+        self.client[os.getpid()] = store
 
     def connect(self):
-        """Connect to plasma server."""
+        """Connect to the store, once within each process."""
         pid = os.getpid()
         if pid in self.client:
             return self.client[pid]
         else:
-            self.client[pid] = plasma.connect(self.path)
+            self.client[pid] = ShmObjectStore(self.path)
             return self.client[pid]
 
     def close(self):
-        """Close plasma server."""
-        os.system("pkill -9 plasma")
+        """Close the store, it will be unlinked by the creator."""
+        store = self.client.pop(os.getpid(), None)
+        if store:
+            store.close()
@@ -20,11 +20,9 @@
 """Share by raw array."""
 from ctypes import addressof, c_ubyte, memmove
 from multiprocessing import Queue, RawArray
-import pyarrow
-
-import lz4.frame
 
 from zeus.common.util.register import Registers
+from zeus.common.ipc.serialize import serialize, deserialize, pack_into
 
 
 @Registers.comm
@@ -43,28 +41,21 @@ class ShareByRawArray(object):
         self.size_mem_agent = int(self.size_shared_mem / self.agent_num)
 
     def send(self, data, name=None, block=True):
-        """Put data in share memory."""
+        """Put data in share memory, the frames are packed into it directly."""
         data_id, data = data
-        msg = lz4.frame.compress(pyarrow.serialize(data).to_buffer())
-
-        memmove(addressof(self.mem) + int(data_id *
-                                          self.size_mem_agent), msg, len(msg))
+        offset = int(data_id * self.size_mem_agent)
+        agent_mem = memoryview(self.mem)[offset: offset + self.size_mem_agent]
+        len_msg = pack_into(serialize(data), agent_mem)
 
-        self.control_q.put((data_id, len(msg)))
+        self.control_q.put((data_id, len_msg))
 
     def recv(self, name=None):
         """Get data from share memory."""
         data_id, len_data = self.control_q.get()
 
-        data = pyarrow.deserialize(
-            lz4.frame.decompress(
-                memoryview(self.mem)[
-                    int(data_id * self.size_mem_agent): int(
-                        data_id * self.size_mem_agent + len_data
-                    )
-                ]
-            )
-        )
+        # copy out, the slot of this agent will be rewritten by its next send
+        offset = int(data_id * self.size_mem_agent)
+        data = deserialize(bytearray(memoryview(self.mem)[offset: offset + len_data]))
 
         return data
 
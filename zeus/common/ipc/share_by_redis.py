@@ -20,9 +20,9 @@
 """Share by redis."""
 import time
 from subprocess import Popen
-import pyarrow
 import redis
 from zeus.common.util.register import Registers
+from zeus.common.ipc.serialize import deserialize, serialize_to_buffer
 
 
 @Registers.comm
@@ -44,13 +44,13 @@ class ShareByRedis(object):
 
     def send(self, data, name=None, block=True):
         """Send data to redis server."""
-        data_buffer = pyarrow.serialize(data).to_buffer()
+        data_buffer = bytes(serialize_to_buffer(data))
         self.redis.set(name, data_buffer)
 
     def recv(self, name=None):
         """Recieve data from redis server."""
         data_buffer = self.redis.get(name)
-        data = pyarrow.deserialize(data_buffer)
+        data = deserialize(data_buffer)
         return data
 
     def delete(self, name):
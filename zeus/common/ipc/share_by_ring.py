@@ -0,0 +1,248 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Share by ring.
+
+A single producer single consumer ring over shared memory, one ring for
+each explorer. The producer packs the serialized frames into the ring
+directly, and publishes them by advancing the head counter; the consumer
+advances the tail counter after copy the record out. Neither side takes
+a lock, the counters are 8-byte aligned and written by one side only.
+
+Each published record wakes the consumer through an eventfd (a pipe on
+the platforms without it), so the consumer could wait on many rings with
+one `select`, instead of polling them.
+
+    | head | tail | records ... |
+
+A record is a 64-byte header with the payload length and its commit
+word, followed by the payload padded to 64 bytes. A record never wraps
+around the end of the ring, a wrap marker fills the tail space instead.
+
+Ordering: the producer writes the payload, the size, then the commit
+word, and then the head. The commit word is the stream offset of the
+record plus one, so it is derived from the shared counters only, and a
+producer forked later on the same ring, e.g. a restarted explorer,
+continues the same sequence. The consumer trusts neither the size nor
+the payload before the word at its tail is tail + 1, even if the head
+has moved. A stale record at the same position carries an offset older
+by whole laps, and the zeroed memory carries 0, so neither is taken.
+The aligned 8-byte stores are atomic, and on x86-64 they are seen in
+program order (TSO), which makes a record complete once its commit
+word is seen. CPython could not emit a memory fence, so on the weakly
+ordered CPUs, e.g. ARM, the payload may still be seen after the commit
+word, and the ring warns at creation; use a zmq or plasma comm there.
+"""
+import os
+import platform
+import select
+import time
+from ctypes import c_ubyte
+from multiprocessing import RawArray
+
+import numpy as np
+from absl import logging
+
+from zeus.common.util.register import Registers
+from zeus.common.ipc.serialize import serialize, deserialize, serialize_to_buffer, \
+    packed_size, pack_into, unpack
+
+RING_ALIGN = 64
+_HEAD, _TAIL = 0, 8  # int64 index of the counters, in separated cache lines
+_DATA_OFFSET = 128
+_WRAP_MARKER = -1
+# spins on the commit word of a record which the head has covered
+_COMMIT_SPIN = 10000
+_TSO_MACHINES = ("x86_64", "amd64", "i386", "i686", "x86")
+
+
+def _align(size):
+    return (size + RING_ALIGN - 1) // RING_ALIGN * RING_ALIGN
+
+
+@Registers.comm
+class ShareByRing(object):
+    """Share by a lock-free SPSC ring with eventfd wakeup."""
+
+    def __init__(self, comm_info):
+        """Init the ring and the wakeup fd, before fork the producer."""
+        super(ShareByRing, self).__init__()
+        self.capacity = _align(comm_info.get("size", 32 * 1024 * 1024))
+        # max time to wait the consumer free space, before raising
+        self.send_timeout = comm_info.get("send_timeout", 60)
+
+        self.mem = RawArray(c_ubyte, _DATA_OFFSET + self.capacity)
+        self._counter = np.frombuffer(self.mem, dtype=np.int64, count=_DATA_OFFSET // 8)
+        self._data = memoryview(self.mem).cast("B")[_DATA_OFFSET:]
+        self._record_head = np.frombuffer(self.mem, dtype=np.int64, offset=_DATA_OFFSET)
+        if platform.machine().lower() not in _TSO_MACHINES:
+            logging.warning("ShareByRing relies on the x86 store ordering, "
+                            "not guaranteed on {}".format(platform.machine()))
+
+        if hasattr(os, "eventfd"):
+            self._read_fd = self._write_fd = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        else:
+            self._read_fd, self._write_fd = os.pipe()
+            os.set_blocking(self._read_fd, False)
+            os.set_blocking(self._write_fd, False)
+
+    def fileno(self):
+        """Return the fd readable while records are ready, for select."""
+        return self._read_fd
+
+    def _wakeup(self):
+        try:
+            if self._read_fd == self._write_fd:
+                os.eventfd_write(self._write_fd, 1)
+            else:
+                os.write(self._write_fd, b"\0")
+        except BlockingIOError:  # the consumer has been woken up yet
+            pass
+
+    def _drain(self):
+        try:
+            if self._read_fd == self._write_fd:
+                os.eventfd_read(self._read_fd)
+            else:
+                while os.read(self._read_fd, 4096):
+                    pass
+        except BlockingIOError:
+            pass
+
+    def _reserve(self, record_size):
+        """Wait free space for a record, return its position in the ring."""
+        if record_size > self.capacity:
+            raise ValueError("message with {} bytes over the ring size {}, "
+                             "increase the size of ShareByRing".format(record_size, self.capacity))
+
+        deadline = time.time() + self.send_timeout
+        head = int(self._counter[_HEAD])
+        while True:
+            tail = int(self._counter[_TAIL])
+            pos = head % self.capacity
+            skip = self.capacity - pos if pos + record_size > self.capacity else 0
+            if self.capacity - (head - tail) >= skip + record_size:
+                break
+            if time.time() > deadline:
+                raise TimeoutError("ring full for {}s, the consumer may be gone".format(
+                    self.send_timeout))
+            time.sleep(0.0005)
+
+        if skip:
+            self._record_head[pos // 8] = _WRAP_MARKER
+            self._record_head[pos // 8 + 1] = head + 1
+            head += skip
+            pos = 0
+        return head, pos
+
+    def _publish(self, frames):
+        size = packed_size(frames)
+        record_size = RING_ALIGN + _align(size)
+        head, pos = self._reserve(record_size)
+
+        pack_into(frames, self._data[pos + RING_ALIGN: pos + RING_ALIGN + size])
+        self._record_head[pos // 8] = size
+        # commit the record with its stream offset, written last
+        self._record_head[pos // 8 + 1] = head + 1
+
+        self._counter[_HEAD] = head + record_size
+        self._wakeup()
+
+    def send(self, data, name=None, block=True):
+        """Send the control info and data, packed into the ring directly."""
+        frames = [serialize_to_buffer(data["ctr_info"])]
+        frames.extend(serialize(data["data"]))
+        self._publish(frames)
+
+        cmd_type = str(data["ctr_info"].get("cmd"))
+        if cmd_type.startswith("train"):
+            data["data"].clear()
+
+    def _consume(self):
+        """Copy one record out, return None while the ring is empty."""
+        while True:
+            tail = int(self._counter[_TAIL])
+            if tail == int(self._counter[_HEAD]):
+                return None
+
+            pos = tail % self.capacity
+            if not self._committed(pos, tail):
+                # re-arm the fd, so the waiters on it come back soon
+                self._wakeup()
+                return None
+
+            size = int(self._record_head[pos // 8])
+            if size == _WRAP_MARKER:
+                self._counter[_TAIL] = tail + self.capacity - pos
+                continue
+
+            # copy out, the space returns to the producer at once
+            record = bytearray(self._data[pos + RING_ALIGN: pos + RING_ALIGN + size])
+            self._counter[_TAIL] = tail + RING_ALIGN + _align(size)
+            return tail + 1, record
+
+    def _committed(self, pos, tail):
+        """Wait the commit word of the record at pos to match its stream offset."""
+        for _ in range(_COMMIT_SPIN):
+            if self._record_head[pos // 8 + 1] == tail + 1:
+                return True
+        logging.debug("ring record at {} not committed yet".format(pos))
+        return False
+
+    def recv_bytes(self, block=True):
+        """
+        Receive the serialized control info and data frames.
+
+        :return: ctr_info dict, which carries its raw buffer within `ctr_info_data`,
+            and the data frames; (None, None) without record while not block.
+        """
+        while True:
+            # drain before check, a record published later re-arms the fd.
+            self._drain()
+            record = self._consume()
+            if record is not None:
+                break
+            if not block:
+                return None, None
+            select.select([self._read_fd], [], [], 1.0)
+
+        record_id, buf = record
+        frames = unpack(buf)
+        ctr_info = deserialize(frames[0])
+        ctr_info.update({"ctr_info_data": frames[0], "object_id": record_id})
+        return ctr_info, frames[1:]
+
+    def recv(self, name=None, block=True):
+        """Receive the control info and data."""
+        ctr_info, frames = self.recv_bytes(block)
+        if ctr_info is None:
+            return None
+        return ctr_info, deserialize(frames)
+
+    def delete(self, object_id):
+        """Do nothing, the record has been released while received."""
+
+    def close(self):
+        """Close the wakeup fd."""
+        for _fd in {self._read_fd, self._write_fd}:
+            try:
+                os.close(_fd)
+            except OSError as err:
+                logging.debug("close ring fd failed: {}".format(err))
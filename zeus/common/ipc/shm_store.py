@@ -0,0 +1,276 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Shared memory object store, to replace the external plasma_store.
+
+The store lives in one `multiprocessing.shared_memory` segment:
+
+    | header | slot table | data arena |
+
+Each object takes one slot of the table, which records its offset, size,
+reference count and a sequence number. The arena is allocated with page
+granularity, first-fit over the gaps between the live objects.
+The owner reference is dropped by `delete`, each `get` holds one more
+reference until the returned buffer is garbage collected, and the slot
+is recycled as soon as the count reaches zero.
+Processes on the same node share the store by name, the metadata updates
+are guarded with a file lock.
+"""
+import fcntl
+import os
+import struct
+import threading
+import time
+import weakref
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+from zeus.common.ipc.serialize import packed_size, pack_into
+
+STORE_MAGIC = 0x58545348  # "XTSH"
+PAGE_SIZE = 4096
+_HEADER = np.dtype([("magic", "<i8"), ("arena_size", "<i8"), ("max_objects", "<i8"),
+                    ("next_seq", "<i8"), ("data_offset", "<i8")])
+_SLOT = np.dtype([("refcnt", "<i8"), ("offset", "<i8"), ("size", "<i8"), ("seq", "<i8")])
+_OBJECT_ID = struct.Struct("<qq")
+
+
+class StoreFullError(MemoryError):
+    """Raise while the store could not hold a new object in time."""
+
+
+def _page_align(size):
+    return (size + PAGE_SIZE - 1) // PAGE_SIZE * PAGE_SIZE
+
+
+def store_name_from_path(path):
+    """Map the legacy plasma socket path into a shared memory name."""
+    return "xt_" + os.path.basename(path.rstrip("/"))
+
+
+class ShmObjectStore(object):
+    """Refcounted object store over shared memory."""
+
+    def __init__(self, path, size=None, max_objects=1024, create=False):
+        """
+        Create or attach the store.
+
+        :param path: store path, used for the lock file and the shm name.
+        :param size: arena size in bytes, used by the creator.
+        :param max_objects: slot number, used by the creator.
+        :param create: create a new store, or attach to an existing one.
+        """
+        self.path = path
+        self.name = store_name_from_path(path)
+        self._owner = create
+        self._pid = None
+        self._thread_lock = None
+        self._lock_file = None
+
+        if create:
+            arena_size = _page_align(int(size))
+            data_offset = _page_align(_HEADER.itemsize + max_objects * _SLOT.itemsize)
+            self._shm = _SharedMemory(self.name, create=True, size=data_offset + arena_size)
+            header = np.frombuffer(self._shm.buf, dtype=_HEADER, count=1)
+            header[0] = (STORE_MAGIC, arena_size, max_objects, 0, data_offset)
+        else:
+            self._shm = _attach_untracked(self.name)
+
+        self._header = np.frombuffer(self._shm.buf, dtype=_HEADER, count=1)
+        if self._header["magic"][0] != STORE_MAGIC:
+            raise ValueError("invalid object store: {}".format(self.name))
+
+        max_objects = int(self._header["max_objects"][0])
+        self._slots = np.frombuffer(self._shm.buf, dtype=_SLOT, count=max_objects,
+                                    offset=_HEADER.itemsize)
+        if create:
+            self._slots[:] = 0
+        data_offset = int(self._header["data_offset"][0])
+        self.arena_size = int(self._header["arena_size"][0])
+        self._data = np.frombuffer(self._shm.buf, dtype=np.uint8,
+                                   count=self.arena_size, offset=data_offset)
+
+    def _locked(self):
+        # flock is bound to the open file, re-open it within each process
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread_lock = threading.Lock()
+            self._lock_file = open(self.path + ".lock", "a+")
+        return _StoreLock(self._thread_lock, self._lock_file)
+
+    def _alloc(self, size):
+        """Find a free slot and a free arena range, return slot index or None."""
+        slots = self._slots
+        free_slots = np.flatnonzero(slots["refcnt"] <= 0)
+        if free_slots.size == 0:
+            return None
+
+        need = _page_align(max(size, 1))
+        used = slots[slots["refcnt"] > 0]
+        order = np.argsort(used["offset"])
+        starts = used["offset"][order]
+        ends = starts + (used["size"][order] + PAGE_SIZE - 1) // PAGE_SIZE * PAGE_SIZE
+        gap_starts = np.concatenate(([0], ends))
+        gap_ends = np.concatenate((starts, [self.arena_size]))
+        fit = np.flatnonzero(gap_ends - gap_starts >= need)
+        if fit.size == 0:
+            return None
+
+        slot = int(free_slots[0])
+        seq = int(self._header["next_seq"][0])
+        self._header["next_seq"] = seq + 1
+        slots[slot] = (1, gap_starts[fit[0]], size, seq)
+        return slot
+
+    def create(self, size, timeout=10.0):
+        """
+        Allocate an object, and wait the space released until timeout.
+
+        :param size: object size in bytes.
+        :param timeout: seconds to wait, 0 tries only once, for the callers
+            that must not block, e.g. within an event loop.
+        :return: object id and a writable memoryview of the object.
+        """
+        deadline = time.time() + timeout
+        while True:
+            with self._locked():
+                slot = self._alloc(size)
+            if slot is not None:
+                break
+            if time.time() > deadline:
+                raise StoreFullError("object store {} full, need {} bytes, with {} live objects".format(
+                    self.name, size, int(np.count_nonzero(self._slots["refcnt"] > 0))))
+            time.sleep(0.001)
+
+        offset = int(self._slots[slot]["offset"])
+        object_id = _OBJECT_ID.pack(slot, int(self._slots[slot]["seq"]))
+        return object_id, memoryview(self._data[offset: offset + size])
+
+    def put_frames(self, frames, timeout=10.0):
+        """Put serialized frames as one object."""
+        object_id, buf = self.create(packed_size(frames), timeout)
+        pack_into(frames, buf)
+        return object_id
+
+    def put_raw_buffer(self, data_buffer, timeout=10.0):
+        """Put a bytes-like buffer as one object."""
+        src = memoryview(data_buffer).cast("B")
+        object_id, buf = self.create(src.nbytes, timeout)
+        buf[:] = src
+        return object_id
+
+    def get(self, object_id):
+        """
+        Get the object as a zero-copy memoryview, None if it has gone.
+
+        The object is pinned until the returned view, and everything built
+        upon it, is released.
+        """
+        slot, seq = _OBJECT_ID.unpack(bytes(object_id))
+        with self._locked():
+            item = self._slots[slot]
+            if item["refcnt"] <= 0 or item["seq"] != seq:
+                return None
+            self._slots["refcnt"][slot] += 1
+            offset, size = int(item["offset"]), int(item["size"])
+
+        owner = self._data[offset: offset + size]
+        weakref.finalize(owner, self._release, slot, seq)
+        return memoryview(owner)
+
+    def _release(self, slot, seq):
+        if self._slots is None:  # closed yet
+            return
+        with self._locked():
+            if self._slots["seq"][slot] == seq and self._slots["refcnt"][slot] > 0:
+                self._slots["refcnt"][slot] -= 1
+
+    def delete(self, object_ids):
+        """Drop the owner reference of the objects."""
+        for object_id in object_ids:
+            slot, seq = _OBJECT_ID.unpack(bytes(object_id))
+            self._release(slot, seq)
+
+    def list(self):
+        """List the live objects, as {object_id: sequence number}."""
+        with self._locked():
+            live = np.flatnonzero(self._slots["refcnt"] > 0)
+            return {_OBJECT_ID.pack(int(_slot), int(self._slots["seq"][_slot])):
+                    int(self._slots["seq"][_slot]) for _slot in live}
+
+    def close(self):
+        """Detach from the store, the creator unlinks the segment as well."""
+        self._header = self._slots = self._data = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # views still exported, the mapping is released along with them
+            self._shm._buf = self._shm._mmap = None  # pylint: disable=W0212
+        if self._lock_file:
+            self._lock_file.close()
+        if self._owner:
+            self._shm.unlink()
+            try:
+                os.remove(self.path + ".lock")
+            except OSError:
+                pass
+
+
+class _SharedMemory(shared_memory.SharedMemory):
+    """Keep quiet while the process exits with the array views alive."""
+
+    def __del__(self):
+        try:
+            self.close()
+        except BufferError:
+            pass
+
+
+def _attach_untracked(name):
+    """
+    Attach an existing segment without the resource tracker.
+
+    Otherwise, the tracker would unlink the segment when the attached
+    process exits, and only the creator should do that.
+    """
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return _SharedMemory(name, create=False)
+    finally:
+        resource_tracker.register = register
+
+
+class _StoreLock(object):
+    """Lock among threads and processes."""
+
+    def __init__(self, thread_lock, lock_file):
+        self._thread_lock = thread_lock
+        self._lock_file = lock_file
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._thread_lock.release()
@@ -60,6 +60,10 @@ class UniComm(object):
         """Delete."""
         return self.comm.delete(name)
 
+    def fileno(self):
+        """Return the fd to wait with select, for the comm supports it."""
+        return self.comm.fileno()
+
     @property
     def info(self):
         """Fetch comm info."""
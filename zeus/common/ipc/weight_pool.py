@@ -0,0 +1,214 @@
+# Copyright (C) 2020. Huawei Technologies Co., Ltd. All rights reserved.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+"""
+Shared memory weight pool, with one versioned slot per member.
+
+Each slot is one `multiprocessing.shared_memory` segment:
+
+    | version | nbytes | pad | weights bytes |
+
+The slot is written only by its member, guarded with a seqlock: the
+version turns odd while writing, and even after it, so the readers retry
+if the version is odd or changed during the copy. Only the small layout
+of each slot goes through the `meta` dict, which could be a
+`multiprocessing.Manager` dict shared among processes. Within one process,
+the pool is shared by the learner threads, a lock guards its slots.
+"""
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from zeus.common.ipc.shm_store import _SharedMemory, _attach_untracked
+
+HEADER_SIZE = 64
+
+
+class _Slot(object):
+    """Attached slot segment."""
+
+    def __init__(self, shm, layout):
+        self.shm = shm
+        self.layout = layout
+        self.name = shm.name
+        self.header = np.frombuffer(shm.buf, dtype=np.int64, count=2)
+        self.data = np.frombuffer(shm.buf, dtype=np.uint8,
+                                  count=int(self.header[1]), offset=HEADER_SIZE)
+
+    def close(self):
+        self.header = self.data = None
+        try:
+            self.shm.close()
+        except BufferError:  # views returned by `read` still alive
+            pass
+
+
+class ShmWeightPool(object):
+    """Weights exchange among the population members over shared memory."""
+
+    def __init__(self, meta, prefix=None):
+        """
+        Create the pool.
+
+        :param meta: dict to hold the slot layout of each member.
+        :param prefix: shm name prefix of the slots.
+        """
+        self.meta = meta
+        self.prefix = prefix or "xt_pool_{}_{}".format(os.getpid(), uuid.uuid4().hex[:6])
+        self._slots = dict()
+        self._owned = dict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"meta": self.meta, "prefix": self.prefix}
+
+    def __setstate__(self, state):
+        self.__init__(state["meta"], state["prefix"])
+
+    @staticmethod
+    def _layout_of(weights):
+        """Get the layout, [(key, shape, dtype, offset, nbytes)] and total bytes."""
+        if isinstance(weights, dict):
+            items = weights.items()
+        else:
+            items = enumerate(weights)
+
+        layout, offset = list(), 0
+        for key, val in items:
+            val = np.asarray(val)
+            layout.append((key, val.shape, val.dtype.str, offset, val.nbytes))
+            offset += (val.nbytes + 63) // 64 * 64
+        return (isinstance(weights, dict), layout), offset
+
+    def _create_slot(self, member, layout, nbytes):
+        """Create the own slot of member, replace the old one if exists."""
+        old = self._owned.pop(member, None)
+        info = self.meta.get(member)
+        generation = 0 if info is None else int(info["shm"].rsplit("_", 1)[-1]) + 1
+        name = "{}_{}_{}".format(self.prefix, member, generation)
+
+        shm = _SharedMemory(name, create=True, size=HEADER_SIZE + max(nbytes, 1))
+        np.frombuffer(shm.buf, dtype=np.int64, count=2)[:] = (0, nbytes)
+        slot = _Slot(shm, layout)
+        self._owned[member] = slot
+        self._slots[member] = slot
+        self.meta[member] = {"shm": name, "layout": layout}
+
+        if old is not None:
+            old.close()
+            old.shm.unlink()
+        return slot
+
+    def _own_slot(self, member, layout, nbytes):
+        slot = self._owned.get(member)
+        if slot is None or slot.layout != layout:
+            slot = self._create_slot(member, layout, nbytes)
+        return slot
+
+    def _slot(self, member):
+        """Attach the newest slot of member."""
+        info = self.meta.get(member)
+        if info is None:
+            raise KeyError("member {} without weights in pool".format(member))
+
+        slot = self._slots.get(member)
+        if slot is None or slot.name != info["shm"]:
+            if member in self._owned:
+                slot = self._owned[member]
+            else:
+                if slot is not None:
+                    slot.close()
+                slot = _Slot(_attach_untracked(info["shm"]), info["layout"])
+            self._slots[member] = slot
+        return slot
+
+    def publish(self, member, weights):
+        """
+        Write the weights into the own slot of member.
+
+        :return: the version of the slot.
+        """
+        layout, nbytes = self._layout_of(weights)
+        values = weights.values() if layout[0] else weights
+        with self._lock:
+            slot = self._own_slot(member, layout, nbytes)
+            slot.header[0] += 1
+            for val, (_, shape, dtype, offset, size) in zip(values, layout[1]):
+                dst = slot.data[offset: offset + size].view(dtype).reshape(shape)
+                np.copyto(dst, val)
+            slot.header[0] += 1
+            return int(slot.header[0])
+
+    def copy(self, src_member, dst_member, retry_interval=0.001):
+        """
+        Copy the slot of src_member into the own slot of dst_member.
+
+        :return: the version copied from src_member.
+        """
+        with self._lock:
+            src = self._slot(src_member)
+            dst = self._own_slot(dst_member, src.layout, src.data.size)
+
+            dst.header[0] += 1
+            while True:
+                version = int(src.header[0])
+                if version % 2:
+                    time.sleep(retry_interval)
+                    continue
+                np.copyto(dst.data, src.data)
+                if int(src.header[0]) == version:
+                    break
+            dst.header[0] += 1
+            return version
+
+    def read(self, member):
+        """Return the weights of member, as views on the own slot."""
+        with self._lock:
+            slot = self._owned.get(member)
+            if slot is None:
+                raise KeyError("member {} without own slot".format(member))
+
+            is_dict, layout = slot.layout
+            values = [slot.data[offset: offset + size].view(dtype).reshape(shape)
+                      for _, shape, dtype, offset, size in layout]
+        if is_dict:
+            return {key: val for (key, *_), val in zip(layout, values)}
+        return values
+
+    def version(self, member):
+        """Return the current version of member's slot."""
+        with self._lock:
+            return int(self._slot(member).header[0])
+
+    def close(self, member=None):
+        """Detach the slots, and unlink the own slots of member, or of all."""
+        with self._lock:
+            for _member in list(self._owned):
+                if member is None or _member == member:
+                    slot = self._owned.pop(_member)
+                    self._slots.pop(_member, None)
+                    slot.close()
+                    slot.shm.unlink()
+            if member is None:
+                for slot in self._slots.values():
+                    slot.close()
+                self._slots.clear()
@@ -26,7 +26,7 @@ import json
 import os
 import threading
 import platform
-from collections import deque
+from collections import Counter, deque
 from time import time
 
 import numpy as np
@@ -84,8 +84,13 @@ BOARD_GROUP_MAP = {
     "mean_explore_ms": "explorer",
     "mean_wait_model_ms": "explorer",
     "mean_explore_reward": "explorer",
+    "mean_mcts_sims_per_sec": "explorer",
     "mean_predictor_wait_ms": "predictor",
     "mean_predictor_infer_ms": "predictor",
+    "mean_predictor_queue_ms": "predictor",
+    "mean_predictor_batch_size": "predictor",
+    "predictor_batch_p50": "predictor",
+    "predictor_batch_p90": "predictor",
     # "bm_rewards": "benchmark",
     # "eval_criteria": "benchmark",
 }
@@ -226,6 +231,13 @@ def time_to_str(sec):
     return _str
 
 
+def _hist_percentile(hist, percent):
+    """Get the percentile of the values counted in hist, {value: count}."""
+    values = sorted(hist)
+    counts = np.cumsum([hist[_value] for _value in values])
+    return values[int(np.searchsorted(counts, counts[-1] * percent / 100.))]
+
+
 class StatsRecorder(threading.Thread):
     """
     StatsRecorder implemented with threading.Thread.
@@ -263,7 +275,13 @@ class StatsRecorder(threading.Thread):
             "explore_ms": deque(maxlen=explore_deque_len),
             "wait_model_ms": deque(maxlen=explore_deque_len),
             "restore_model_ms": deque(maxlen=explore_deque_len),
-            "mean_explore_reward": deque(maxlen=explore_deque_len)
+            "mean_explore_reward": deque(maxlen=explore_deque_len),
+            "mean_mcts_sims_per_sec": deque(maxlen=explore_deque_len),
+            "mean_predictor_wait_ms": deque(maxlen=explore_deque_len),
+            "mean_predictor_infer_ms": deque(maxlen=explore_deque_len),
+            "mean_predictor_queue_ms": deque(maxlen=explore_deque_len),
+            "mean_predictor_batch_size": deque(maxlen=explore_deque_len),
+            "predictor_batch_hist": deque(maxlen=explore_deque_len),
         }
 
         self.local_data_writer = LocalDataWriter(
@@ -274,6 +292,9 @@ class StatsRecorder(threading.Thread):
                               "custom_criteria", "battle_won")
         self.local_data_writer.add_new_train_event(self.bm_args)
 
+        # callables to receive each stats processed, e.g. the benchmark probe
+        self.listeners = list()
+
     def update(self, **kwargs):
         """Update with new status received."""
         self._data.update(**kwargs)
@@ -330,6 +351,11 @@ class StatsRecorder(threading.Thread):
             "wait_model_ms",
             "restore_model_ms",
             "mean_explore_reward",
+            "mean_mcts_sims_per_sec",
+            "mean_predictor_wait_ms",
+            "mean_predictor_infer_ms",
+            "mean_predictor_queue_ms",
+            "mean_predictor_batch_size",
         ):
             if "mean_explore_reward" not in self.explore_stats:
                 # extend explore reward
@@ -350,6 +376,16 @@ class StatsRecorder(threading.Thread):
                         "train_reward_avg": np.nanmean(self.explore_stats[target_key])})
                     self._data.pop(target_key)
 
+        # summarize the batch sizes the predictors run, with the merged histogram
+        if self.explore_stats["predictor_batch_hist"]:
+            batch_hist = Counter()
+            for _hist in self.explore_stats["predictor_batch_hist"]:
+                batch_hist.update({int(_size): _count for _size, _count in _hist.items()})
+            self._data.update({
+                "predictor_batch_p50": _hist_percentile(batch_hist, 50),
+                "predictor_batch_p90": _hist_percentile(batch_hist, 90),
+            })
+
         _info = self._data
         _train_count = _info["train_count"]
         _step = _info["step"]
@@ -404,6 +440,9 @@ class StatsRecorder(threading.Thread):
             # logging.debug("to update stats: {}".format(stats))
             self.update(**stats)
 
+        for listener in self.listeners:
+            listener(self._name, stats)
+
         if not self.could_show_stats():
             return
 
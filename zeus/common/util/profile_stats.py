@@ -23,7 +23,7 @@ import os
 import psutil
 import tracemalloc
 import pprint
-from collections import deque
+from collections import Counter, deque
 from time import time
 from absl import logging
 import numpy as np
@@ -99,20 +99,35 @@ class PredictStats(object):
     """
     Predictor status records.
 
-    handle the wait and inference time of predictor.
+    handle the wait, queueing and inference time of predictor,
+    and the histogram of the batch sizes it runs.
     """
 
     def __init__(self):
         """Init with default value."""
         self.obs_wait_time = 0.0
+        self.queue_time = 0.0
         self.inference_time = 0.0
         self.iters = 0.0
+        self.batches = 0
+        self.batch_hist = Counter()
+
+    def add_batch(self, batch_size, queue_time, inference_time):
+        """Record one batched inference."""
+        self.iters += batch_size
+        self.batches += 1
+        self.batch_hist[batch_size] += 1
+        self.queue_time += queue_time
+        self.inference_time += inference_time
 
     def get(self):
         """Get agent status and clear the buffer."""
         ret = {
             "mean_predictor_wait_ms": self.obs_wait_time * 1000 / self.iters,
             "mean_predictor_infer_ms": self.inference_time * 1000 / self.iters,
+            "mean_predictor_queue_ms": self.queue_time * 1000 / self.iters,
+            "mean_predictor_batch_size": self.iters / max(self.batches, 1),
+            "predictor_batch_hist": dict(sorted(self.batch_hist.items())),
         }
         self.reset()
         return ret
@@ -120,8 +135,11 @@ class PredictStats(object):
     def reset(self):
         """Reset buffer."""
         self.obs_wait_time = 0.0
+        self.queue_time = 0.0
         self.inference_time = 0.0
         self.iters = 0.0
+        self.batches = 0
+        self.batch_hist = Counter()
 
 
 class AgentStats(object):
@@ -177,7 +195,7 @@ class AgentGroupStats(object):
         self.n_agents = n_agents
         self.env_api_type = env_type
         self._stats = dict()
-        self.ext_attr = "mean_explore_reward"
+        self.ext_attrs = ("mean_explore_reward", "mean_mcts_sims_per_sec")
 
     def update_with_agent_stats(self, agent_stats: list):
         """Update agent status to agent group."""
@@ -192,9 +210,10 @@ class AgentGroupStats(object):
             }
         )
 
-        if self.ext_attr in agent_stats[0] and agent_stats[0][self.ext_attr] is not np.nan:
-            self._stats.update(
-                {self.ext_attr: np.nanmean([sta[self.ext_attr] for sta in agent_stats])})
+        for ext_attr in self.ext_attrs:
+            if ext_attr in agent_stats[0] and agent_stats[0][ext_attr] is not np.nan:
+                self._stats.update(
+                    {ext_attr: np.nanmean([sta[ext_attr] for sta in agent_stats])})
 
     def get(self):
         """Get the newest one-explore-status of agent group."""
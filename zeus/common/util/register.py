@@ -17,8 +17,18 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 # THE SOFTWARE.
-"""Register factory."""
-
+"""
+Register factory.
+
+The registries are filled lazily: `register_xt_defaults` reads the manifest
+of (registry, name) -> module generated from the `@Registers.xx` decorators
+of the default modules, and a module is only imported when one of its names
+is first looked up. Names out of the manifest are searched among the default
+modules and the python files within the work directory, by their source.
+Set `XT_EAGER_REGISTER=1` to import all the default modules at once, as before.
+"""
+
+import ast
 import re
 import importlib
 import os
@@ -43,9 +53,12 @@ class RegisterStub(object):  # pylint: disable=too-few-public-methods
         """Initialize Register stub."""
         self._dict = dict()
         self._name = name
+        self._lazy = dict()
 
     def __getitem__(self, key):
-        """Get item."""
+        """Get item, import its module at the first look up."""
+        if key not in self._dict:
+            self._load(key)
         try:
             return self._dict[key]
         except Exception as exc:
@@ -55,6 +68,9 @@ class RegisterStub(object):  # pylint: disable=too-few-public-methods
 
             raise exc
 
+    def __contains__(self, key):
+        return key in self._dict or key in self._lazy
+
     def __call__(self, param):
         """Call function."""
         if not callable(param):
@@ -68,6 +84,21 @@ class RegisterStub(object):  # pylint: disable=too-few-public-methods
         self._dict[register_name] = param
         return param
 
+    def add_lazy(self, key, module_names):
+        """Record the modules to import when `key` is first looked up."""
+        if key not in self._dict:
+            self._lazy[key] = list(module_names)
+
+    def _load(self, key):
+        """Import the module(s) which register `key`."""
+        for full_name in self._lazy.pop(key, list()):
+            _import_registered_module(full_name, key)
+
+        if key not in self._dict:
+            full_name = _scan_user_modules(self._name, key)
+            if full_name:
+                _import_registered_module(full_name, key)
+
 
 class Registers(object):  # pylint: disable=too-few-public-methods, invalid-name
     """All module registers within class instance."""
@@ -165,6 +196,112 @@ def get_class_name(base_path, module_name):
     return cls_name
 
 
+def _source_root():
+    """Return the dir holding the `xt` and `zeus` packages."""
+    return dirname(dirname(xt.__file__)) if xt else os.getcwd()
+
+
+def _module_file(full_name):
+    file_name = full_name.replace(".", "/") + ".py"
+    target_f = os.path.join(_source_root(), file_name)
+    # develop, zeus on the up one level of xt.
+    if not os.path.exists(target_f):
+        target_f = os.path.join(_source_root(), "..", file_name)
+    return target_f
+
+
+def _default_module_names():
+    for base_path, module_list in DEFAULT_MODULE_STUBS:
+        for module_name in module_list:
+            yield base_path + module_name
+
+
+def scan_registered(file_name):
+    """Find the (registry, name) decorated with `@Registers.xx`, without import."""
+    try:
+        with open(file_name, "r", encoding="utf-8") as pyf:
+            source = pyf.read()
+    except (IOError, UnicodeDecodeError):
+        return list()
+    if "Registers." not in source:
+        return list()
+
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return list()
+
+    registered = list()
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.ClassDef, ast.FunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            if isinstance(decorator, ast.Attribute) \
+                    and isinstance(decorator.value, ast.Name) \
+                    and decorator.value.id == "Registers":
+                registered.append((decorator.attr, node.name))
+    return registered
+
+
+def generate_register_manifest():
+    """Build the manifest {registry: {name: [module, ...]}} of the default modules."""
+    manifest = defaultdict(dict)
+    for full_name in _default_module_names():
+        for registry, name in scan_registered(_module_file(full_name)):
+            manifest[registry].setdefault(name, list()).append(full_name)
+    return {registry: dict(sorted(names.items())) for registry, names in sorted(manifest.items())}
+
+
+def write_register_manifest(file_name=None):
+    """Write the manifest of the default modules as a python module."""
+    file_name = file_name or os.path.join(dirname(os.path.abspath(__file__)), "register_manifest.py")
+    with open(file_name, "w", encoding="utf-8") as pyf:
+        pyf.write('"""Generated by `write_register_manifest`, do not edit."""\n\n')
+        pyf.write("REGISTER_MANIFEST = {\n")
+        for registry, names in generate_register_manifest().items():
+            pyf.write("    {!r}: {{\n".format(registry))
+            for name, modules in names.items():
+                pyf.write("        {!r}: {!r},\n".format(name, modules))
+            pyf.write("    },\n")
+        pyf.write("}\n")
+    return file_name
+
+
+def _load_register_manifest():
+    try:
+        from zeus.common.util.register_manifest import REGISTER_MANIFEST
+        return REGISTER_MANIFEST
+    except ImportError:
+        logging.debug("register manifest not found, scan the default modules.")
+        return generate_register_manifest()
+
+
+def _import_registered_module(full_name, key=None):
+    try:
+        importlib.import_module(full_name)
+        logging.debug("Loaded {}!".format(full_name))
+    except ImportError as error:
+        logging.debug("{} import failed with error:{}".format(full_name, error))
+        if key is None:
+            try:
+                key = get_class_name("", full_name)
+            except BaseException:
+                key = "un-known-cls"
+        REGISTER_ERRORS[key] = str(error)
+
+
+def _scan_user_modules(registry, key):
+    """Search the default modules and the work dir for `key`, by source."""
+    candidates = [(full_name, _module_file(full_name)) for full_name in _default_module_names()]
+    candidates.extend((path_to_module_format(os.path.basename(_file)), _file)
+                      for _file in glob.glob(os.path.join(os.getcwd(), "*.py")))
+
+    for full_name, file_name in candidates:
+        if (registry, key) in scan_registered(file_name):
+            return full_name
+    return None
+
+
 def register_xt_defaults():
     """Register default modules."""
     # add `pwd` into path.
@@ -172,29 +309,23 @@ def register_xt_defaults():
     if current_work_dir not in sys.path:
         sys.path.append(current_work_dir)
 
+    if os.environ.get("XT_EAGER_REGISTER", "0") == "1":
+        import_xt_defaults()
+        return
+
+    for registry, names in _load_register_manifest().items():
+        stub = getattr(Registers, registry, None)
+        if stub is None:
+            logging.warning("unknown registry in manifest: {}".format(registry))
+            continue
+        for name, modules in names.items():
+            stub.add_lazy(name, modules)
+
+
+def import_xt_defaults():
+    """Import all the default modules, and register them at once."""
     default_modules = DEFAULT_MODULE_STUBS
 
     logging.debug("start to import all modules: {}".format(default_modules))
-    import_error_track = list()
-
-    for base_path, module_list in default_modules:
-        for module_name in module_list:
-            try:
-                if base_path != "":
-                    full_name = base_path + module_name
-                else:
-                    full_name = module_name
-                importlib.import_module(full_name)
-                logging.debug("Loaded {}!".format(full_name))
-            except ImportError as error:
-                import_error_track.append((module_name, error))
-                try:
-                    cls_name = get_class_name(base_path, module_name)
-                except BaseException as exc:
-                    cls_name = "un-known-cls"
-
-                REGISTER_ERRORS[cls_name] = str(error)
-
-    # logging out the error among register operation
-    for module, error in import_error_track:
-        logging.debug("{} import failed with error:{}".format(module, error))
+    for full_name in _default_module_names():
+        _import_registered_module(full_name)
@@ -0,0 +1,75 @@
+"""Generated by `write_register_manifest`, do not edit."""
+
+REGISTER_MANIFEST = {
+    'agent': {
+        'AtariDqn': ['xt.agent.dqn.atari_dqn'],
+        'AtariImpala': ['xt.agent.impala.atari_impala'],
+        'AtariImpalaOpt': ['xt.agent.impala.atari_impala_opt'],
+        'AtariImpalaTf': ['xt.agent.impala.atari_impala_tf'],
+        'AtariPpo': ['xt.agent.ppo.atari_ppo'],
+        'CartpoleDqn': ['xt.agent.dqn.cartpole_dqn'],
+        'CartpoleImpala': ['xt.agent.impala.cartpole_impala'],
+        'CartpoleImpalaTf': ['xt.agent.impala.cartpole_impala_tf'],
+        'CartpolePpo': ['xt.agent.ppo.cartpole_ppo'],
+        'InfoFlowDqn': ['xt.agent.dqn.infoflow_dqn'],
+        'Muzero': ['xt.agent.muzero.muzero'],
+        'MuzeroAtari': ['xt.agent.muzero.muzero_atari'],
+        'MuzeroAtariFull': ['xt.agent.muzero.muzero_atari_full'],
+        'PPO': ['xt.agent.ppo.ppo'],
+        'StarCraftQMix': ['xt.agent.qmix.starcraft_qmix'],
+        'StarCraftSCC': ['xt.agent.scc.starcraft_scc'],
+    },
+    'algorithm': {
+        'DQN': ['xt.algorithm.dqn.dqn'],
+        'DQNInfoFlowAlg': ['xt.algorithm.dqn.dqn_infoflw_alg'],
+        'IMPALA': ['xt.algorithm.impala.impala'],
+        'IMPALAOpt': ['xt.algorithm.impala.impala_opt'],
+        'Muzero': ['xt.algorithm.muzero.muzero'],
+        'PPO': ['xt.algorithm.ppo.ppo'],
+        'QMixAlg': ['xt.algorithm.qmix.qmix_alg'],
+        'SCCAlg': ['xt.algorithm.scc.scc_alg'],
+    },
+    'comm': {
+        'CommByZmq': ['zeus.common.ipc.comm_by_zmq'],
+        'LocalMsg': ['zeus.common.ipc.local_msg'],
+        'Message': ['zeus.common.ipc.message'],
+        'ShareByPlasma': ['zeus.common.ipc.share_by_plasma'],
+        'ShareByRawArray': ['zeus.common.ipc.share_by_raw_array'],
+        'ShareByRedis': ['zeus.common.ipc.share_by_redis'],
+        'ShareByRing': ['zeus.common.ipc.share_by_ring'],
+    },
+    'env': {
+        'AtariEnv': ['xt.environment.gym.atari_env'],
+        'GymEnv': ['xt.environment.gym.gym_env'],
+        'MaEnvCatchPigs': ['xt.environment.ma.catchpigs'],
+        'StarCraft2Xt': ['xt.environment.ma.env_starcraft'],
+        'SyntheticEnv': ['xt.environment.synthetic.synthetic_env'],
+        'VectorAtariEnv': ['xt.environment.gym.atari_env'],
+    },
+    'model': {
+        'DqnCnn': ['xt.model.dqn.dqn_cnn'],
+        'DqnCnnPong': ['xt.model.dqn.dqn_cnn_pong'],
+        'DqnCnnZeus': ['xt.model.dqn.dqn_cnn_zeus'],
+        'DqnInfoFlowModel': ['xt.model.dqn.dqn_rec_model'],
+        'DqnMlp': ['xt.model.dqn.dqn_mlp'],
+        'DqnMlpZeus': ['xt.model.dqn.dqn_mlp_zeus'],
+        'DqnZeus': ['xt.model.dqn.dqn_zeus'],
+        'ImpalaCnn': ['xt.model.impala.impala_cnn'],
+        'ImpalaCnnOpt': ['xt.model.impala.impala_cnn_opt'],
+        'ImpalaCnnZeus': ['xt.model.impala.impala_cnn_zeus'],
+        'ImpalaMlp': ['xt.model.impala.impala_mlp'],
+        'ImpalaMlpZeus': ['xt.model.impala.impala_mlp_zeus'],
+        'MuzeroAtari': ['xt.model.muzero.muzero_atari'],
+        'MuzeroCnn': ['xt.model.muzero.muzero_cnn'],
+        'MuzeroMlp': ['xt.model.muzero.muzero_mlp'],
+        'MuzeroModel': ['xt.model.muzero.muzero_model'],
+        'PPO': ['xt.model.ppo.ppo'],
+        'PigPpoCnn': ['xt.model.ppo.ppo_cnn_pigs'],
+        'PpoCnn': ['xt.model.ppo.ppo_cnn'],
+        'PpoCnnZeus': ['xt.model.ppo.ppo_cnn_zeus'],
+        'PpoMlp': ['xt.model.ppo.ppo_mlp'],
+        'PpoMlpZeus': ['xt.model.ppo.ppo_mlp_zeus'],
+        'QMixModel': ['xt.model.qmix.qmix_tf'],
+        'SCCModel': ['xt.model.scc.scc_tf'],
+    },
+}